@@ -0,0 +1,97 @@
+"""Round trips and latency of chat email enrichment against message count.
+
+Compares the old per-message ``find_one`` loop with the batched ``$in`` query
+and the ``$lookup`` aggregation. Needs a local MongoDB; run from ``backend/``:
+
+    python -m bench.bench_chat_enrichment --uri mongodb://localhost:27017/
+"""
+import argparse
+import datetime
+import time
+
+from bson import ObjectId
+from pymongo import MongoClient, monitoring
+
+from utils.chat import load_messages
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def seed(db, n_messages, n_users):
+    db.users.drop()
+    db.chats.drop()
+    user_ids = db.users.insert_many(
+        [{'email': f'user{i}@example.com', 'role': 'user'} for i in range(n_users)]
+    ).inserted_ids
+    now = datetime.datetime.utcnow()
+    db.chats.insert_many([{
+        'chat_type': 'workspace',
+        'workspace_id': 'bench',
+        'sender': str(user_ids[i % n_users]),
+        'message': f'message {i}',
+        'timestamp': now + datetime.timedelta(milliseconds=i),
+    } for i in range(n_messages)])
+
+
+def per_message(db, query):
+    messages = list(db.chats.find(query).sort('timestamp', 1))
+    for m in messages:
+        m['_id'] = str(m['_id'])
+        sender_doc = db.users.find_one({'_id': ObjectId(m['sender'])})
+        m['sender_email'] = sender_doc.get('email') if sender_doc else 'Unknown'
+    return messages
+
+
+def measure(counter, fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        counter.count = 0
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return counter.count, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500, 2000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    client = MongoClient(args.uri, event_listeners=[counter])
+    db = client['mixer_bench']
+    query = {'chat_type': 'workspace', 'workspace_id': 'bench'}
+    strategies = [
+        ('per-message find_one', lambda: per_message(db, query)),
+        ('batched $in', lambda: load_messages(db, query)),
+        ('$lookup', lambda: load_messages(db, query, use_lookup=True)),
+    ]
+
+    print(f"{'messages':>8}  {'strategy':<22}{'round trips':>12}{'best ms':>10}")
+    try:
+        for size in args.sizes:
+            seed(db, size, args.users)
+            for name, fn in strategies:
+                trips, ms = measure(counter, fn, args.repeat)
+                print(f'{size:>8}  {name:<22}{trips:>12}{ms:>10.1f}')
+    finally:
+        client.drop_database('mixer_bench')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Delivery latency and idle CPU of pushed chat versus 3-second polling.
+
+Push: N subscribers wait on one workspace channel of an in-process ChatHub
+(optionally split across two hubs joined by an InMemoryBackplane, as two
+workers would be). The publisher sends messages and every subscriber records
+how long each took to arrive.
+
+Polling: the same N clients each issue one workspace chat request every
+3 seconds. Delivery latency is the wait for the next poll plus the request
+itself; idle CPU is the request cost times the poll rate. The request cost is
+measured against a local MongoDB through the Flask test client.
+
+Run from ``backend/``:
+
+    python -m bench.bench_chat_push --subscribers 1000
+"""
+import argparse
+import datetime
+import json
+import statistics
+import threading
+import time
+
+import jwt
+
+from utils.pubsub import ChatHub, InMemoryBackplane
+
+POLL_INTERVAL = 3.0
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def bench_push(n_subscribers, n_messages, idle_seconds, workers):
+    backplane = InMemoryBackplane()
+    hubs = [ChatHub(backplane) for _ in range(workers)]
+    channel = 'workspace:bench'
+    latencies = []
+    lock = threading.Lock()
+    ready = threading.Barrier(n_subscribers + 1)
+
+    def subscriber(hub):
+        sub = hub.subscribe(channel)
+        ready.wait()
+        for _ in range(n_messages):
+            data = sub.get(timeout=30)
+            received = time.perf_counter()
+            with lock:
+                latencies.append(received - json.loads(data)['sent'])
+        hub.unsubscribe(sub)
+
+    threads = [threading.Thread(target=subscriber, args=(hubs[i % workers],), daemon=True)
+               for i in range(n_subscribers)]
+    for t in threads:
+        t.start()
+    ready.wait()
+
+    # Idle: everyone connected, nothing published
+    cpu = time.process_time()
+    time.sleep(idle_seconds)
+    idle_cpu = (time.process_time() - cpu) / idle_seconds
+
+    for _ in range(n_messages):
+        hubs[0].publish(channel, json.dumps({'sent': time.perf_counter()}))
+        time.sleep(0.05)
+    for t in threads:
+        t.join()
+    return latencies, idle_cpu
+
+
+def bench_poll_request(n_requests):
+    import app as backend
+
+    application = backend.create_app()
+    db = backend.db
+    user = db.users.insert_one({'email': 'bench@example.com', 'role': 'user'}).inserted_id
+    now = datetime.datetime.utcnow()
+    db.chats.insert_many([{
+        'chat_type': 'workspace', 'workspace_id': 'bench', 'sender': str(user),
+        'message': f'message {i}', 'timestamp': now + datetime.timedelta(milliseconds=i),
+    } for i in range(200)])
+    token = jwt.encode({'user_id': str(user), 'exp': now + datetime.timedelta(hours=1)},
+                       application.config['SECRET_KEY'], algorithm='HS256')
+    client = application.test_client()
+    headers = {'x-access-token': token}
+    try:
+        timings = []
+        cpu = time.process_time()
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            client.get('/api/workspace/chat/bench', headers=headers)
+            timings.append(time.perf_counter() - start)
+        cpu_per_request = (time.process_time() - cpu) / n_requests
+    finally:
+        db.users.delete_one({'_id': user})
+        db.chats.delete_many({'workspace_id': 'bench'})
+    return statistics.median(timings), cpu_per_request
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--idle-seconds', type=float, default=5.0)
+    parser.add_argument('--workers', type=int, default=2, help='hubs sharing one backplane')
+    parser.add_argument('--poll-requests', type=int, default=200)
+    parser.add_argument('--skip-poll', action='store_true', help='do not measure polling against Mongo')
+    args = parser.parse_args()
+
+    latencies, idle_cpu = bench_push(args.subscribers, args.messages, args.idle_seconds, args.workers)
+    print(f'push  subscribers={args.subscribers} workers={args.workers}')
+    print(f'  delivery p50={percentile(latencies, 50) * 1000:.2f} ms '
+          f'p99={percentile(latencies, 99) * 1000:.2f} ms')
+    print(f'  idle CPU={idle_cpu * 100:.2f}% of one core')
+
+    if args.skip_poll:
+        return
+    request_latency, cpu_per_request = bench_poll_request(args.poll_requests)
+    polls_per_second = args.subscribers / POLL_INTERVAL
+    print(f'poll  clients={args.subscribers} interval={POLL_INTERVAL:.0f}s')
+    print(f'  delivery p50={(POLL_INTERVAL / 2 + request_latency) * 1000:.0f} ms '
+          f'p99={(POLL_INTERVAL * 0.99 + request_latency) * 1000:.0f} ms')
+    print(f'  idle CPU={polls_per_second * cpu_per_request * 100:.1f}% of one core '
+          f'({polls_per_second:.0f} req/s at {cpu_per_request * 1000:.2f} ms CPU each)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""jsonify of calculation-history-like documents, old conversion loop versus the BSON encoder.
+
+``loop`` is what the routes used to do: copy each document, stringify its
+ids and dates by hand, then let Flask's stdlib encoder write it.
+``encoder`` hands the raw documents to :class:`utils.bson_json.BSONJSONEncoder`
+with orjson switched off, and ``orjson`` with it on. No MongoDB needed; run
+from ``backend/``:
+
+    python -m bench.bench_json --docs 1000 10000 --repeat 5
+"""
+import argparse
+import datetime
+import random
+import time
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask import Flask, jsonify
+
+from utils import bson_json
+
+
+def make_docs(n, seed=0):
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+    return [{
+        '_id': ObjectId(),
+        'user_id': str(ObjectId()),
+        'workspace_id': ObjectId(),
+        'kind': rng.choice(('design', 'sweep')),
+        'status': 'completed',
+        'engine_version': '1.4.0',
+        'created_at': now - datetime.timedelta(seconds=i * 37),
+        'inputs': {'P_ct': round(rng.uniform(1, 30), 3), 'n_ct': rng.randint(30, 200),
+                   'L': rng.randint(3, 10), 'price': Decimal128(str(round(rng.uniform(1e5, 1e7), 2)))},
+        'result': {'engine': {'kieu_dong_co': f'4A{rng.randint(71, 250)}', 'cong_suat_kw': 7.5},
+                   'ratios': [round(rng.uniform(1, 6), 4) for _ in range(4)],
+                   'shafts': [{'P': rng.random() * 10, 'n': rng.random() * 1500, 'T': rng.random() * 1e5}
+                              for _ in range(4)]},
+    } for i in range(n)]
+
+
+def convert_loop(docs):
+    out = []
+    for doc in docs:
+        doc = dict(doc)
+        doc['_id'] = str(doc['_id'])
+        doc['workspace_id'] = str(doc['workspace_id'])
+        doc['created_at'] = doc['created_at'].isoformat() + 'Z'
+        doc['inputs'] = dict(doc['inputs'], price=float(doc['inputs']['price'].to_decimal()))
+        out.append(doc)
+    return out
+
+
+def best_of(repeat, fn):
+    times, size = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn())
+        times.append(time.perf_counter() - start)
+    return min(times), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--docs', type=int, nargs='+', default=[1000, 10_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    plain, bson_app = Flask('plain'), Flask('bson')
+    bson_json.install(bson_app)
+    orjson = bson_json.orjson
+
+    def respond(app, docs):
+        with app.test_request_context():
+            return jsonify({'history': docs}).get_data()
+
+    print(f"{'docs':>7}  {'variant':<9}{'ms':>9}{'bytes':>11}")
+    for n in args.docs:
+        docs = make_docs(n)
+        rows = [('loop',) + best_of(args.repeat, lambda: respond(plain, convert_loop(docs)))]
+        bson_json.orjson = None
+        rows.append(('encoder',) + best_of(args.repeat, lambda: respond(bson_app, docs)))
+        bson_json.orjson = orjson
+        if orjson is not None:
+            rows.append(('orjson',) + best_of(args.repeat, lambda: respond(bson_app, docs)))
+        for name, seconds, size in rows:
+            print(f'{n:>7}  {name:<9}{seconds * 1000:>9.1f}{size:>11}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Motor selection latency: in-memory bisect index against the Mongo aggregation.
+
+Seeds a synthetic catalog of standard power and speed steps and times the
+same random queries through both paths. Needs a local MongoDB; run from
+``backend/``:
+
+    python -m bench.bench_motor_search --motors 1000 10000 --queries 2000
+"""
+import argparse
+import random
+import time
+
+from pymongo import MongoClient
+
+from indexes import ensure_indexes
+from utils.motors import MotorIndex, import_motors, search_motors
+
+POWERS = (0.37, 0.55, 0.75, 1.1, 1.5, 2.2, 3, 4, 5.5, 7.5, 11, 15, 18.5, 22, 30, 37, 45, 55, 75, 90)
+SPEEDS = (720, 730, 960, 970, 1420, 1440, 1455, 1460, 2850, 2880, 2910, 2930)
+
+
+def seed(db, n, rng):
+    db.motors.drop()
+    db.motor_imports.drop()
+    ensure_indexes(db)
+    import_motors(db, ({'kieu_dong_co': f'M{i}', 'cong_suat_kw': rng.choice(POWERS),
+                        'van_toc_50Hz': rng.choice(SPEEDS), 'hieu_suat': round(rng.uniform(0.75, 0.95), 3)}
+                       for i in range(n)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--motors', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--tolerance', type=float, default=250)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    client = MongoClient(args.uri)
+    db = client['mixer_bench']
+    print(f"{'motors':>8}  {'path':<14}{'load ms':>9}{'median us':>11}{'p99 us':>10}")
+    try:
+        for n in args.motors:
+            seed(db, n, rng)
+            index = MotorIndex(db)
+            start = time.perf_counter()
+            index.load()
+            load_ms = (time.perf_counter() - start) * 1000
+            queries = [(rng.uniform(0.2, 80), rng.choice((750, 1000, 1500, 3000))) for _ in range(args.queries)]
+            paths = [
+                ('memory', load_ms, lambda p, s: index.search(p, s, 10, None, args.tolerance)),
+                ('mongo', 0, lambda p, s: search_motors(db.motors, p, s, 10, None, args.tolerance)),
+            ]
+            for name, load, fn in paths:
+                times = []
+                for power, speed in queries:
+                    start = time.perf_counter()
+                    fn(power, speed)
+                    times.append((time.perf_counter() - start) * 1e6)
+                times.sort()
+                print(f'{n:>8}  {name:<14}{load:>9.1f}{times[len(times) // 2]:>11.1f}'
+                      f'{times[int(len(times) * 0.99)]:>10.1f}')
+    finally:
+        client.drop_database('mixer_bench')
+
+
+if __name__ == '__main__':
+    main()
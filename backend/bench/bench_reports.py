@@ -0,0 +1,89 @@
+"""PDF report throughput and peak memory for short and long reports.
+
+A design report fits on one page; a sweep report with enough designs runs to
+about 20 pages. Each case renders in a fresh process so its peak RSS is its
+own. Cached downloads are timed as the cost of a cache hit plus streaming.
+Run from ``backend/``:
+
+    python -m bench.bench_reports --seconds 5
+"""
+import argparse
+import multiprocessing
+import re
+import resource
+import sys
+import time
+
+import engine
+from engine import sweep
+from utils.cache import TTLCache
+from utils.report import ReportRenderer, iter_chunks
+
+
+def design_case():
+    params = engine.normalize_params({'P': 5, 'n': 60, 'L': 5, 'HB1': 250, 'HB2': 230})
+    return {'_id': 'bench', 'parameters': params}, engine.run(params)
+
+
+def sweep_case(designs):
+    fixed = {'P': 5, 'n': 60, 'L': 5}
+    grid = {'u_h': {'min': 8, 'max': 20, 'num': 60}, 'u_x': {'min': 3, 'max': 6, 'num': 60}}
+    result = sweep.sweep(sweep.normalize_sweep(fixed, grid), grid, {'T_III': 'min'}, top_k=designs)
+    return {'_id': 'bench', 'kind': 'sweep', 'parameters': {'fixed': fixed, 'grid': grid},
+            'result': result}, None
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_case(name, designs, seconds, font_path, queue):
+    calculation, report = design_case() if designs is None else sweep_case(designs)
+    start = time.perf_counter()
+    renderer = ReportRenderer(font_path)
+    setup = time.perf_counter() - start
+    count, data = 0, b''
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        data = renderer.render(calculation, report)
+        count += 1
+    cold = count / (time.perf_counter() - start)
+
+    cache = TTLCache(16, 3600)
+    cache.set('bench', data)
+    hits = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds / 5:
+        for _ in iter_chunks(cache.get('bench')):
+            pass
+        hits += 1
+    cached = hits / (time.perf_counter() - start)
+    pages = len(re.findall(rb'/Type /Page\b', data))
+    queue.put((name, pages, len(data), setup, cold, cached, peak_rss_mb(), renderer.unicode))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--font', help='TrueType font (default: DejaVu Sans if installed)')
+    parser.add_argument('--designs', type=int, default=1000,
+                        help='designs in the long sweep report (1000 is about 20 pages)')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    print(f"{'report':<10}{'pages':>6}{'KiB':>8}{'setup s':>9}{'reports/s':>11}"
+          f"{'cached/s':>11}{'peak RSS MB':>13}  font")
+    for name, designs in (('1-page', None), ('20-page', args.designs)):
+        proc = ctx.Process(target=run_case, args=(name, designs, args.seconds, args.font, queue))
+        proc.start()
+        name, pages, size, setup, cold, cached, rss, unicode = queue.get()
+        proc.join()
+        print(f'{name:<10}{pages:>6}{size / 1024:>8.1f}{setup:>9.2f}{cold:>11.1f}'
+              f'{cached:>11.0f}{rss:>13.1f}  {"unicode" if unicode else "core"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Batched ratio-split solvers versus the wizard's 50-step bisection.
+
+Draws random lanes from the usual parameter box and reports time and the
+largest deviation of ``u1`` from the exact Newton solution. Run from
+``backend/``:
+
+    python -m bench.bench_solver --lanes 1000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine.solver import RatioSplitTable, bisect_ratio_split, solve_ratio_split
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lanes', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    build, table = timed(RatioSplitTable)
+    print(f'table: {table.nodes.size} nodes, built in {build * 1000:.1f} ms, '
+          f'measured max |t error| {table.max_error:.2e}, verified bound {table.tol_t:.0e}')
+    rng = np.random.default_rng(args.seed)
+    print(f"{'lanes':>9}  {'solver':<10}{'seconds':>10}{'max |du1|':>12}")
+    for lanes in args.lanes:
+        inputs = (rng.uniform(8, 20, lanes), rng.uniform(0.3, 0.6, lanes),
+                  rng.uniform(0.25, 0.3, lanes), rng.uniform(1.0, 1.1, lanes))
+        t_newton, (exact, _) = timed(solve_ratio_split, *inputs)
+        for name, fn in (('bisection', bisect_ratio_split), ('newton', solve_ratio_split),
+                         ('table', table.ratio_split)):
+            seconds, (u1, _) = timed(fn, *inputs) if name != 'newton' else (t_newton, (exact, None))
+            print(f'{lanes:>9}  {name:<10}{seconds:>10.4f}{np.max(np.abs(u1 - exact)):>12.2e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Vectorized design-space sweep versus a per-point Python loop.
+
+The loop calls ``engine.evaluate`` once per grid point on scalars, as a naive
+port of the wizard would; its time is extrapolated from a sample of points.
+Run from ``backend/``:
+
+    python -m bench.bench_sweep --points 100000 1000000
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from engine.design import evaluate, normalize_params
+from engine.sweep import parse_axis, sweep
+
+FIXED = {'P': 7.5, 'n': 40, 'L': 5, 'HB1': 300, 'HB2': 250}
+
+
+def make_grid(points):
+    # Five axes; u_h carries whatever is left after the other four
+    grid = {
+        'eta_spur': {'min': 0.94, 'max': 0.97, 'num': 10},
+        'eta_chain': {'min': 0.90, 'max': 0.94, 'num': 10},
+        'u_x': {'min': 3, 'max': 6, 'num': 10},
+        'psi_bd': {'min': 0.3, 'max': 0.6, 'num': 10},
+    }
+    grid['u_h'] = {'min': 8, 'max': 20, 'num': max(1, points // 10_000)}
+    return grid
+
+
+def per_point(fixed, grid, sample):
+    names = list(grid)
+    axes = [parse_axis(name, grid[name]) for name in names]
+    start = time.perf_counter()
+    for values in itertools.islice(itertools.product(*axes), sample):
+        evaluate(**{**fixed, **dict(zip(names, values))})
+    return (time.perf_counter() - start) / sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--loop-sample', type=int, default=2000)
+    args = parser.parse_args()
+
+    fixed = normalize_params(FIXED)
+    loop_cost = per_point(fixed, make_grid(args.loop_sample), args.loop_sample)
+    print(f"{'points':>10}{'vectorized s':>15}{'loop s (est.)':>15}{'speedup':>10}")
+    for points in args.points:
+        grid = make_grid(points)
+        total = int(np.prod([parse_axis(k, v).size for k, v in grid.items()]))
+        start = time.perf_counter()
+        sweep(fixed, grid, {'P_ct': 'min', 'T_III': 'min'})
+        vectorized = time.perf_counter() - start
+        loop = loop_cost * total
+        print(f'{total:>10}{vectorized:>15.3f}{loop:>15.1f}{loop / vectorized:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main()
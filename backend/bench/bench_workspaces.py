@@ -0,0 +1,87 @@
+"""Round trips, latency and payload of the workspace listing.
+
+Compares the old per-workspace ``find`` of full user documents with the
+batched ``$in`` over the union of member ids. Needs a local MongoDB; run
+from ``backend/``:
+
+    python -m bench.bench_workspaces --workspaces 50 100 --members 100
+"""
+import argparse
+import datetime
+import json
+import random
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from bench.bench_chat_enrichment import CommandCounter, measure
+from indexes import ensure_indexes
+from utils.bson_json import to_json
+from utils.workspaces import ArrayMembers, page_workspaces
+
+
+def seed(db, n_workspaces, n_members, n_users):
+    db.users.drop()
+    db.workspaces.drop()
+    ensure_indexes(db)
+    # Hashes like the real ones, so the old payload size is realistic
+    user_ids = [str(i) for i in db.users.insert_many([{
+        'email': f'user{i}@example.com', 'role': 'user',
+        'password': 'pbkdf2:sha256:260000$' + 'x' * 80,
+        'created_at': datetime.datetime.utcnow(),
+    } for i in range(n_users)]).inserted_ids]
+    rng = random.Random(0)
+    now = datetime.datetime.utcnow()
+    db.workspaces.insert_many([{
+        'name': f'ws{i}', 'code': str(100000 + i), 'owner': user_ids[0],
+        'members': [user_ids[0]] + rng.sample(user_ids[1:], n_members - 1),
+        'created_at': now - datetime.timedelta(minutes=i),
+    } for i in range(n_workspaces)])
+    return user_ids[0]
+
+
+def per_workspace(db, user_id):
+    workspaces = []
+    for ws in db.workspaces.find({'members': user_id}):
+        ws['_id'] = str(ws['_id'])
+        ws['created_at'] = ws['created_at'].isoformat()
+        members = list(db.users.find({'_id': {'$in': [ObjectId(u) for u in ws['members']]}}))
+        for m in members:
+            m['_id'] = str(m['_id'])
+            m['created_at'] = m['created_at'].isoformat()
+        ws['members'] = members
+        workspaces.append(ws)
+    return workspaces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--workspaces', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--members', type=int, default=100)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    client = MongoClient(args.uri, event_listeners=[counter])
+    db = client['mixer_bench']
+    print(f"{'workspaces':>10}  {'strategy':<24}{'round trips':>12}{'best ms':>10}{'KiB':>10}")
+    try:
+        for n in args.workspaces:
+            user_id = seed(db, n, args.members, args.users)
+            strategies = [
+                ('per-workspace find', lambda: per_workspace(db, user_id)),
+                ('batched $in', lambda: page_workspaces(db, ArrayMembers(db), user_id)[0]),
+                ('batched $in, limit 20', lambda: page_workspaces(db, ArrayMembers(db), user_id, limit=20)[0]),
+            ]
+            for name, fn in strategies:
+                trips, ms = measure(counter, fn, args.repeat)
+                size = len(json.dumps(fn(), default=to_json)) / 1024
+                print(f'{n:>10}  {name:<24}{trips:>12}{ms:>10.1f}{size:>10.1f}')
+    finally:
+        client.drop_database('mixer_bench')
+
+
+if __name__ == '__main__':
+    main()
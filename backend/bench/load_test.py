@@ -0,0 +1,146 @@
+"""Throughput and latency of a running server on the auth, list and chat endpoints.
+
+Registers ``--users`` accounts (``loadtest<i>@example.com``, reused on later
+runs), puts them in one workspace with ``--messages`` chat messages, then
+drives each scenario from ``--concurrency`` threads for ``--duration``
+seconds over keep-alive connections. Thread ``i`` always acts as user
+``i % users`` and messages are fixed, so runs against the same database
+are comparable. Start the server first, e.g. from ``backend/``:
+
+    SECRET_KEY=dev gunicorn -c gunicorn.conf.py wsgi:app
+    python -m bench.load_test --url http://127.0.0.1:5000 --concurrency 32 --duration 20
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+PASSWORD = 'load-test-password'
+SCENARIOS = ('auth', 'list', 'chat', 'chat-send')
+
+
+class Client:
+    """One keep-alive connection; reconnects after errors."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = None
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['x-access-token'] = token
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            self.conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            return 0, None
+        return response.status, data
+
+
+def setup(url, n_users, n_messages):
+    client = Client(url)
+    tokens = []
+    for i in range(n_users):
+        email = f'loadtest{i}@example.com'
+        client.request('POST', '/api/register', {'email': email, 'password': PASSWORD})
+        status, data = client.request('POST', '/api/login', {'email': email, 'password': PASSWORD})
+        if status != 200:
+            raise SystemExit(f'login of {email} failed: {status} {data!r}')
+        tokens.append(json.loads(data)['token'])
+    _, data = client.request('GET', '/api/workspace/list', token=tokens[0])
+    workspace = next((ws for ws in json.loads(data)['workspaces'] if ws['name'] == 'loadtest'), None)
+    if workspace is None:
+        _, data = client.request('POST', '/api/workspace/create', {'name': 'loadtest'}, tokens[0])
+        workspace = json.loads(data)['workspace']
+        for token in tokens[1:]:
+            client.request('POST', '/api/workspace/join', {'code': workspace['code']}, token)
+        for i in range(n_messages):
+            client.request('POST', '/api/workspace/chat/send',
+                           {'workspace_id': workspace['_id'], 'message': f'seed message {i}'},
+                           tokens[i % n_users])
+    return tokens, workspace['_id']
+
+
+def requests_for(scenario, tokens, workspace_id):
+    """``make(thread, n)`` returning the ``(method, path, body, token)`` of a scenario's n-th call."""
+    def make(thread, n):
+        user = thread % len(tokens)
+        if scenario == 'auth':
+            return 'POST', '/api/login', {'email': f'loadtest{user}@example.com', 'password': PASSWORD}, None
+        if scenario == 'list':
+            return 'GET', '/api/workspace/list', None, tokens[user]
+        if scenario == 'chat':
+            return 'GET', f'/api/workspace/chat/{workspace_id}?limit=50', None, tokens[user]
+        return 'POST', '/api/workspace/chat/send', {
+            'workspace_id': workspace_id, 'message': f'load test {thread}-{n}'}, tokens[user]
+    return make
+
+
+def run(url, make, concurrency, duration, warmup):
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from, stop_at = start + warmup, start + warmup + duration
+
+    def worker(thread):
+        client, local, counts, n = Client(url), [], {}, 0
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+            status, _ = client.request(*make(thread, n))
+            n += 1
+            if now >= measure_from:
+                local.append(time.perf_counter() - now)
+                counts[status] = counts.get(status, 0) + 1
+        with lock:
+            latencies.extend(local)
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(latencies), statuses
+
+
+def percentile(ordered, q):
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=2)
+    args = parser.parse_args()
+
+    tokens, workspace_id = setup(args.url, args.users, args.messages)
+    print(f'{args.concurrency} threads, {args.duration:g} s per scenario after {args.warmup:g} s warm-up')
+    print(f"{'scenario':<10}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  errors")
+    for scenario in args.scenarios:
+        make = requests_for(scenario, tokens, workspace_id)
+        latencies, statuses = run(args.url, make, args.concurrency, args.duration, args.warmup)
+        errors = {status: count for status, count in statuses.items() if not 200 <= status < 300}
+        print(f'{scenario:<10}{len(latencies):>9}{len(latencies) / args.duration:>9.1f}'
+              f'{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.95) * 1000:>9.1f}'
+              f'{percentile(latencies, 0.99) * 1000:>9.1f}  {errors or "-"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Check that a cold worker imports the app and runs create_app within a time budget.
+
+Each run is a fresh interpreter timing ``import app; app.create_app()``
+(no Mongo needed: the factory opens no connections). The check fails when
+the fastest run exceeds ``--budget-ms`` or when a module that should load
+lazily (NumPy, fpdf, fontTools) was imported during start-up. Exits 1 on
+failure; ``tests/test_startup.py`` runs the same probe under pytest. Run
+from ``backend/``:
+
+    python -m bench.startup_budget --budget-ms 300 --runs 5 --top 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Loaded on first use by the routes that need them
+LAZY_MODULES = ('numpy', 'fpdf', 'fontTools')
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import app
+app.create_app()
+print(json.dumps({'seconds': time.perf_counter() - start,
+                  'loaded': [m for m in %r if m in sys.modules]}))
+''' % (LAZY_MODULES,)
+
+
+def probe(cwd=None):
+    out = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True,
+                         cwd=cwd).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def slowest_imports(n):
+    """The ``n`` top-level imports with the largest cumulative time, from ``-X importtime``."""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app; app.create_app()'],
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # One space after the bar, then two per level of nesting; app is level 0
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=300)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=0, help='also list the N slowest imports')
+    args = parser.parse_args()
+
+    results = [probe() for _ in range(args.runs)]
+    times = [r['seconds'] * 1000 for r in results]
+    loaded = sorted({m for r in results for m in r['loaded']})
+    print(f'start-up over {args.runs} runs: min {min(times):.0f} ms, '
+          f'median {statistics.median(times):.0f} ms, budget {args.budget_ms:.0f} ms')
+    for micros, name in slowest_imports(args.top) if args.top else ():
+        print(f'  {micros / 1000:>7.1f} ms  {name}')
+
+    failures = []
+    if min(times) > args.budget_ms:
+        failures.append(f'start-up takes {min(times):.0f} ms, over the {args.budget_ms:.0f} ms budget')
+    if loaded:
+        failures.append(f'imported at start-up instead of on first use: {", ".join(loaded)}')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Create workspaces concurrently and check every join code is unique.
+
+Threads insert through the same :class:`~utils.codes.CodeAllocator` the
+app uses, against the real unique index, then one aggregation confirms
+that no code appears twice. 500k workspaces fill half of the default
+10^6-code space, so expect collisions (retries) but no duplicates. Needs a
+local MongoDB; run from ``backend/``:
+
+    python -m bench.stress_workspace_codes --workspaces 500000 --threads 32
+"""
+import argparse
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import MongoClient
+
+from indexes import ensure_indexes
+from utils.codes import CodeAllocator
+
+
+def create(db, allocator, start, count):
+    now = datetime.datetime.utcnow()
+    for i in range(start, start + count):
+        allocator.insert(db.workspaces, {'name': f'ws{i}', 'owner': 'stress', 'members': ['stress'],
+                                         'member_count': 1, 'created_at': now})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--workspaces', type=int, default=500_000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--length', type=int, default=6)
+    parser.add_argument('--attempts', type=int, default=64,
+                        help='retries per insert; the last inserts see a half-full code space')
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri, maxPoolSize=args.threads)
+    db = client['mixer_bench']
+    db.workspaces.drop()
+    ensure_indexes(db)
+    allocator = CodeAllocator(args.length, attempts=args.attempts)
+    share, extra = divmod(args.workspaces, args.threads)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            offset, futures = 0, []
+            for t in range(args.threads):
+                count = share + (t < extra)
+                futures.append(pool.submit(create, db, allocator, offset, count))
+                offset += count
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start
+
+        stats = allocator.stats()
+        total = db.workspaces.count_documents({})
+        duplicates = list(db.workspaces.aggregate([
+            {'$group': {'_id': '$code', 'n': {'$sum': 1}}},
+            {'$match': {'n': {'$gt': 1}}},
+            {'$count': 'codes'},
+        ], allowDiskUse=True))
+        duplicates = duplicates[0]['codes'] if duplicates else 0
+        print(f'workspaces    {total} of {args.workspaces} in {elapsed:.1f}s '
+              f'({total / elapsed:.0f}/s, {args.threads} threads)')
+        print(f'code space    {stats["capacity"]} ({total / stats["capacity"]:.0%} used)')
+        print(f'collisions    {stats["collisions"]} retried, '
+              f'{stats["collisions"] / max(total, 1):.3f} per insert, max {stats["max_attempts"]} attempts')
+        print(f'duplicates    {duplicates}')
+        if duplicates or total != args.workspaces:
+            raise SystemExit(1)
+    finally:
+        client.drop_database('mixer_bench')
+
+
+if __name__ == '__main__':
+    main()
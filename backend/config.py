@@ -1,6 +1,96 @@
 import datetime
+import os
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
 
 class Config:
-    SECRET_KEY = '12345'  # replace in prod
-    MONGO_URI = "mongodb://localhost:27017/mixer_db"
+    SECRET_KEY = os.environ.get('SECRET_KEY', '12345')  # replace in prod
+    MONGO_URI = os.environ.get('MONGO_URI', "mongodb://localhost:27017/mixer_db")
+    # Connection pool of each process; size it to the threads serving requests plus the
+    # background tailers (chat backplane), so requests never queue for a socket
+    MONGO_MAX_POOL_SIZE = _env_int('MONGO_MAX_POOL_SIZE', 32)
+    # Connections kept open while idle, so a burst after a quiet spell skips the handshakes
+    MONGO_MIN_POOL_SIZE = _env_int('MONGO_MIN_POOL_SIZE', 4)
+    MONGO_MAX_IDLE_TIME_MS = _env_int('MONGO_MAX_IDLE_TIME_MS', 300000)
+    # Fail a request that waits this long for a pooled connection instead of piling up behind it
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = _env_int('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000)
+    MONGO_CONNECT_TIMEOUT_MS = _env_int('MONGO_CONNECT_TIMEOUT_MS', 5000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = _env_int('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)
+    # Longer than the slowest legitimate query (workspace exports read in batches)
+    MONGO_SOCKET_TIMEOUT_MS = _env_int('MONGO_SOCKET_TIMEOUT_MS', 30000)
     JWT_EXPIRATION_HOURS = 2
+    # Route modules to load (see routes/__init__.py); leave some out for a pool serving one area
+    BLUEPRINTS = ('auth', 'workspace', 'calculation', 'export', 'chat', 'admin', 'catalog')
+    # Join sender/receiver emails with a $lookup aggregation instead of a batched $in query
+    CHAT_ENRICH_LOOKUP = False
+    # Upper bound for the `limit` query parameter on paginated chat endpoints
+    CHAT_PAGE_LIMIT_MAX = 500
+    # 'local' keeps push events inside this process; 'mongo' shares them between workers
+    CHAT_BACKPLANE = 'local'
+    CHAT_STREAM_HEARTBEAT = 15
+    # Cache of the id/email/role of authenticated users, so token_required skips Mongo
+    USER_CACHE_SIZE = 10000
+    USER_CACHE_TTL = 60
+    # Put role and email in issued tokens and trust them instead of loading the user
+    JWT_ROLE_CLAIMS = False
+    # Seconds before a role change or deletion made by another process reaches this one
+    JWT_REVOCATION_CHECK_INTERVAL = 5
+    # In-process tier of the calculation cache; the Mongo tier expires via a TTL index
+    CALC_CACHE_SIZE = 1024
+    CALC_CACHE_TTL = 600
+    # Worker processes for `async` calculations and sweeps, and how many one user may queue
+    CALC_JOB_WORKERS = 2
+    CALC_JOB_PER_USER = 2
+    # Seconds after which a job still pending or running is taken to be lost and marked failed
+    CALC_JOB_STALE_AFTER = 3600
+    # TrueType font for PDF reports (DejaVu Sans is used when installed); None falls back to Helvetica
+    PDF_FONT_PATH = None
+    # Import fpdf and load report fonts when a worker starts instead of on its first PDF download
+    PDF_PRELOAD = False
+    PDF_CACHE_SIZE = 128
+    PDF_CACHE_TTL = 3600
+    HISTORY_PAGE_LIMIT = 50
+    HISTORY_PAGE_LIMIT_MAX = 500
+    # Page size once a client pages with `after`; a request without `limit` or `after` gets every workspace
+    WORKSPACE_PAGE_LIMIT = 100
+    WORKSPACE_PAGE_LIMIT_MAX = 500
+    # Keep memberships in the workspace_members collection instead of a members array on each
+    # workspace; run migrate_workspace_members.py before enabling it
+    WORKSPACE_MEMBERS_COLLECTION = False
+    # Digits in a workspace join code; 10^n codes in total, keep well under half of them in use
+    WORKSPACE_CODE_LENGTH = 6
+    # Browsers and proxies may reuse reference catalogs this long before revalidating with the ETag
+    REFERENCE_MAX_AGE = 300
+    # Seconds between checks for catalog edits made by other processes
+    REFERENCE_CHECK_INTERVAL = 5
+    # Leveled JSON logs written by a background thread; DEBUG adds per-route detail
+    LOG_LEVEL = 'INFO'
+    # Fraction of requests whose INFO/DEBUG records are kept, per endpoint; warnings are always kept
+    LOG_SAMPLE_RATES = {'chat.get_workspace_chat': 0.1, 'chat.get_direct_chat': 0.1,
+                        'calculation.calculation_status': 0.1}
+    LOG_SAMPLE_DEFAULT = 1.0
+    # Bearer token required to scrape /metrics; None leaves it open (keep it off the public network)
+    METRICS_TOKEN = None
+    ADMIN_USERS_PAGE_LIMIT = 50
+    ADMIN_USERS_PAGE_LIMIT_MAX = 500
+    CATALOG_PAGE_LIMIT = 50
+    CATALOG_PAGE_LIMIT_MAX = 500
+    # Motors whose rated speed is further than this (rpm) from the requested one are not offered
+    MOTOR_SPEED_TOLERANCE = 250
+    MOTOR_SEARCH_LIMIT = 10
+    MOTOR_SEARCH_LIMIT_MAX = 100
+    # Seconds between checks for motor imports made by other processes
+    MOTOR_INDEX_CHECK_INTERVAL = 30
+    # Workspace exports read calculations in batches and keep this many renders in flight
+    EXPORT_BATCH_SIZE = 100
+    EXPORT_WINDOW = 4
+
+
+class ProductionConfig(Config):
+    """Settings for wsgi.py; SECRET_KEY must come from the environment."""
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    # Workers share push events through Mongo
+    CHAT_BACKPLANE = 'mongo'
@@ -0,0 +1,18 @@
+"""Mixer-drum drive-train design engine.
+
+The functions here are pure and operate on NumPy arrays, so a single call
+evaluates one design or a whole batch of parameter sets by broadcasting.
+NumPy is only imported when one of them is first used; ``ENGINE_VERSION``
+is available without it.
+"""
+import importlib
+
+from .constants import ENGINE_VERSION
+
+__all__ = ['ENGINE_VERSION', 'evaluate', 'normalize_params', 'run']
+
+
+def __getattr__(name):
+    if name in ('evaluate', 'normalize_params', 'run'):
+        return getattr(importlib.import_module('.design', __name__), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
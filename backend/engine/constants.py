@@ -0,0 +1,18 @@
+"""Engine version and catalogs, importable without NumPy.
+
+The app needs these at start-up (cache keys, seeded reference catalogs)
+long before the first calculation loads the numeric code.
+"""
+ENGINE_VERSION = '1.0'
+
+# Mirrors the catalogs in Calculation.js: (key, label, covered range, open range)
+EFFICIENCY_CATALOG = [
+    ('eta_spur', 'Bộ truyền bánh răng trụ', (0.96, 0.98), (0.94, 0.97)),
+    ('eta_bevel', 'Bộ truyền bánh răng côn', (0.95, 0.97), (0.93, 0.96)),
+    ('eta_chain', 'Bộ truyền xích', (0.92, 0.96), (0.90, 0.94)),
+    ('eta_bearing', 'Một cặp ổ lăn', (0.97, 0.99), (0.97, 0.99)),
+]
+TRANSMISSION_CATALOG = [
+    ('u_h', 'Hộp giảm tốc côn-trụ 2 cấp', (8, 20)),
+    ('u_x', 'Truyền động xích', (3, 6)),
+]
@@ -0,0 +1,206 @@
+"""Step-by-step drive design, ported from ``forntend/src/components/Calculation.js``.
+
+Every formula keeps the frontend's constants and rounding so that the server
+and the wizard agree to the last printed digit.
+"""
+import numpy as np
+
+from .constants import EFFICIENCY_CATALOG, ENGINE_VERSION, TRANSMISSION_CATALOG
+from .solver import solve_ratio_split
+
+# Synchronous speed the wizard assumes for the selected motor (rpm)
+MOTOR_SPEED = 1500
+# Working hours per year used for the equivalent number of load cycles
+HOURS_PER_YEAR = 300 * 8 * 2
+
+DEFAULTS = {
+    # The wizard initialises each slider to the middle of its "open" range
+    **{key: round((lo + hi) / 2, 3) for key, _, _, (lo, hi) in EFFICIENCY_CATALOG},
+    **{key: round((lo + hi) / 2, 1) for key, _, (lo, hi) in TRANSMISSION_CATALOG},
+    'K_be': 0.27,
+    'c_K': 1.05,
+    'psi_ba': 0.3,
+    'psi_bd': 0.6,
+}
+REQUIRED = ('P', 'n', 'L')
+OPTIONAL = ('HB1', 'HB2')
+
+
+def normalize_params(data, check_hardness=True):
+    """Validate request data into a flat dict of floats, filling wizard defaults.
+
+    Raises ``ValueError`` for missing or non-numeric inputs and, unless
+    ``check_hardness`` is off, for hardness values that violate
+    ``HB1 >= HB2 + 10``.
+    """
+    data = data or {}
+    params = {}
+    for key in REQUIRED:
+        if data.get(key) in (None, ''):
+            raise ValueError(f'{key} is required')
+        params[key] = float(data[key])
+    for key, default in DEFAULTS.items():
+        value = data.get(key)
+        params[key] = default if value in (None, '') else float(value)
+    for key in OPTIONAL:
+        if data.get(key) not in (None, ''):
+            params[key] = float(data[key])
+    if check_hardness and 'HB1' in params and 'HB2' in params and params['HB1'] < params['HB2'] + 10:
+        raise ValueError('HB1 must be at least HB2 + 10')
+    return params
+
+
+def js_round(x):
+    """``Math.round``: halves round towards +infinity."""
+    return np.floor(np.asarray(x, dtype=float) + 0.5)
+
+
+def system_efficiency(eta_spur, eta_bevel, eta_chain, eta_bearing):
+    # Three pairs of rolling bearings
+    return eta_spur * eta_bevel * eta_chain * eta_bearing ** 3
+
+
+def required_power(P, eta):
+    with np.errstate(divide='ignore'):
+        return np.where(eta > 0, P / np.where(eta > 0, eta, 1), np.inf)
+
+
+def ratio_split(u_h, psi_bd, K_be, c_K):
+    """Split the gearbox ratio ``u_h`` into bevel ``u1`` and spur ``u2`` stages.
+
+    Solves the same equation as ``solveKpsiEq`` on every lane at once; see
+    :mod:`engine.solver`.
+    """
+    return solve_ratio_split(u_h, psi_bd, K_be, c_K)
+
+
+def torque(P, n):
+    """Shaft torque in N·mm, rounded like the wizard; 0 where the speed is 0."""
+    n = np.asarray(n, dtype=float)
+    safe = np.where(n != 0, n, 1)
+    return np.where(n != 0, js_round(9.55e6 * P / safe), 0)
+
+
+def shaft_table(P, n, eta_spur, eta_chain, eta_bearing, u1, u2):
+    """Power, speed and torque of shafts I–III and the drum (``Tải``)."""
+    bearing = eta_bearing ** 3
+    P_III = P / (eta_chain * bearing)
+    P_II = P_III / (eta_spur * bearing)
+    n_I = np.full(np.shape(u1), float(MOTOR_SPEED))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n_II = np.where(u1 != 0, n_I / u1, 0)
+        n_III = np.where(u2 != 0, n_II / u2, 0)
+    # Calculation.js reports P_III on shaft I as well; kept for parity with the wizard
+    return {
+        'I': {'P': P_III, 'n': n_I, 'T': torque(P_III, n_I)},
+        'II': {'P': P_II, 'n': n_II, 'T': torque(P_II, n_II)},
+        'III': {'P': P_III, 'n': n_III, 'T': torque(P_III, n_III)},
+        'Tải': {'P': P, 'n': n, 'T': torque(P, n)},
+    }
+
+
+def bevel_limits(HB1, HB2, L, u1):
+    """Contact/bending stress limits and life factors of the bevel pair."""
+    HB1 = np.asarray(HB1, dtype=float)
+    HB2 = np.asarray(HB2, dtype=float)
+    NHO1 = 30 * HB1 ** 2.4
+    NHO2 = 30 * HB2 ** 2.4
+    NHE1 = 60 * np.asarray(L, dtype=float) * HOURS_PER_YEAR * MOTOR_SPEED
+    NHE2 = NHE1 / np.where(u1 != 0, u1, 1)
+    with np.errstate(divide='ignore'):
+        KHL1 = (NHO1 / NHE1) ** (1 / 6)
+        KHL2 = (NHO2 / NHE2) ** (1 / 6)
+    return {
+        'sigma_H_lim1': 2 * HB1 + 70,
+        'sigma_H_lim2': 2 * HB2 + 70,
+        'sigma_F_lim1': 1.8 * HB1,
+        'sigma_F_lim2': 1.8 * HB2,
+        'KHL1': KHL1,
+        'KHL2': KHL2,
+    }
+
+
+def chain_teeth(u_x):
+    """Sprocket teeth: ``z1 = 29 − 2·u_x`` truncated, ``z2 = round(z1·u_x)``."""
+    u_x = np.asarray(u_x, dtype=float)
+    z1 = np.trunc(29 - 2 * u_x)
+    return z1, js_round(z1 * u_x)
+
+
+def evaluate(P, n, L, eta_spur, eta_bevel, eta_chain, eta_bearing, u_h, u_x,
+             K_be, c_K, psi_bd, HB1=None, HB2=None, ratio_solver=ratio_split, **_):
+    """Run the whole chain on broadcastable inputs and return a dict of arrays.
+
+    ``ratio_solver`` can swap in e.g. :meth:`engine.solver.RatioSplitTable.ratio_split`.
+    """
+    P = np.asarray(P, dtype=float)
+    n = np.asarray(n, dtype=float)
+    eta = system_efficiency(eta_spur, eta_bevel, eta_chain, eta_bearing)
+    u1, u2 = ratio_solver(u_h, psi_bd, K_be, c_K)
+    out = {
+        'eta': eta,
+        'P_ct': required_power(P, eta),
+        'u_ch': np.multiply(u_h, u_x),
+        'n_sb': n * np.multiply(u_h, u_x),
+        'u1': u1,
+        'u2': u2,
+    }
+    for shaft, values in shaft_table(P, n, eta_spur, eta_chain, eta_bearing, u1, u2).items():
+        for key, value in values.items():
+            out[f'{key}_{shaft}'] = value
+    if HB1 is not None and HB2 is not None:
+        out.update(bevel_limits(HB1, HB2, L, u1))
+    out['z1'], out['z2'] = chain_teeth(u_x)
+    return out
+
+
+def _num(value, digits=None):
+    value = float(value)
+    if not np.isfinite(value):
+        return None
+    return round(value, digits) if digits is not None else value
+
+
+def run(params):
+    """Evaluate one normalized parameter set into structured wizard steps."""
+    out = evaluate(**params)
+    steps = [
+        {'step': 'efficiency', 'results': {
+            **{label: _num(params[key] ** 3 if key == 'eta_bearing' else params[key], 3)
+               for key, label, _, _ in EFFICIENCY_CATALOG},
+            'η hệ': _num(out['eta'], 3),
+            'P_ct': _num(out['P_ct'], 3),
+        }},
+        {'step': 'transmission_ratio', 'results': {
+            **{label: params[key] for key, label, _ in TRANSMISSION_CATALOG},
+            'u_ch': _num(out['u_ch'], 3),
+            'n_sb': _num(out['n_sb'], 3),
+        }},
+        {'step': 'ratio_split', 'results': {
+            'u1': _num(out['u1'], 3),
+            'u2': _num(out['u2'], 3),
+        }},
+        {'step': 'shaft_characteristic', 'results': {
+            shaft: {
+                'P': _num(out[f'P_{shaft}'], 3),
+                'n': _num(out[f'n_{shaft}']),
+                'T': _num(out[f'T_{shaft}']),
+            } for shaft in ('I', 'II', 'III', 'Tải')
+        }},
+    ]
+    if 'sigma_H_lim1' in out:
+        steps.append({'step': 'bevel_gear', 'results': {
+            'σH_lim1': _num(out['sigma_H_lim1'], 1),
+            'σH_lim2': _num(out['sigma_H_lim2'], 1),
+            'σF_lim1': _num(out['sigma_F_lim1'], 1),
+            'σF_lim2': _num(out['sigma_F_lim2'], 1),
+            'KHL1': _num(out['KHL1'], 3),
+            'KHL2': _num(out['KHL2'], 3),
+        }})
+    steps.append({'step': 'chain', 'results': {
+        'chain z1': int(out['z1']),
+        'chain z2': int(out['z2']),
+    }})
+    summary = {key: _num(out[key]) for key in ('eta', 'P_ct', 'u_ch', 'n_sb', 'u1', 'u2')}
+    summary.update({'z1': int(out['z1']), 'z2': int(out['z2'])})
+    return {'engine_version': ENGINE_VERSION, 'summary': summary, 'steps': steps}
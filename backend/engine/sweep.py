@@ -0,0 +1,214 @@
+"""Design-space sweeps: evaluate a grid of drive configurations in one pass.
+
+Each swept input becomes one axis of a sparse ``meshgrid``; ``evaluate``
+broadcasts over the axes, so intermediate results only reach full grid size
+where an output actually depends on every swept input.
+"""
+import math
+
+import numpy as np
+
+from .design import DEFAULTS, REQUIRED, evaluate, normalize_params
+from .solver import RatioSplitTable
+
+SWEEPABLE = REQUIRED + tuple(DEFAULTS) + ('HB1', 'HB2')
+MAX_POINTS = 2_000_000
+MAX_RESULTS = 200
+STAT_PERCENTILES = (5, 50, 95)
+
+_split_table = None
+
+
+def split_table():
+    # Built on first use; a few milliseconds, then shared by every sweep
+    global _split_table
+    if _split_table is None:
+        _split_table = RatioSplitTable()
+    return _split_table
+
+
+def _range(name, spec):
+    lo, hi = float(spec['min']), float(spec['max'])
+    if not (np.isfinite(lo) and np.isfinite(hi)):
+        raise ValueError(f'{name}: min and max must be finite')
+    return lo, hi
+
+
+def axis_length(name, spec):
+    """Number of values ``parse_axis`` would produce, worked out without allocating them."""
+    if isinstance(spec, (list, tuple)):
+        return len(spec)
+    if isinstance(spec, dict):
+        lo, hi = _range(name, spec)
+        if 'step' in spec:
+            step = float(spec['step'])
+            if not step > 0 or not np.isfinite(step):
+                raise ValueError(f'{name}: step must be positive')
+            # Same count as np.arange(lo, hi + step / 2, step)
+            return max(math.ceil((hi - lo + step / 2) / step), 0)
+        return int(spec.get('num', 10))
+    return 1
+
+
+def check_grid(grid):
+    """Reject unknown inputs and grids over ``MAX_POINTS`` before any axis is built."""
+    unknown = set(grid) - set(SWEEPABLE)
+    if unknown:
+        raise ValueError(f'Cannot sweep {", ".join(sorted(unknown))}')
+    total = 1
+    for name, spec in grid.items():
+        if isinstance(spec, (list, tuple)) and not all(
+                isinstance(v, (int, float)) and not isinstance(v, bool) and np.isfinite(v) for v in spec):
+            raise ValueError(f'{name}: values must be finite numbers')
+        length = axis_length(name, spec)
+        if length < 1:
+            raise ValueError(f'{name}: expected a non-empty list or range')
+        if length > MAX_POINTS:
+            raise ValueError(f'{name} has {length} values; the limit is {MAX_POINTS}')
+        total *= length
+    if total > MAX_POINTS:
+        raise ValueError(f'Grid has {total} points; the limit is {MAX_POINTS}')
+    return total
+
+
+def parse_axis(name, spec):
+    """Turn ``[v, ...]`` or ``{'min', 'max', 'num'|'step'}`` into a 1-D array."""
+    length = axis_length(name, spec)
+    if length > MAX_POINTS:
+        raise ValueError(f'{name} has {length} values; the limit is {MAX_POINTS}')
+    if isinstance(spec, (list, tuple)):
+        values = np.asarray(spec, dtype=float)
+    elif isinstance(spec, dict):
+        lo, hi = _range(name, spec)
+        if 'step' in spec:
+            values = np.arange(lo, hi + float(spec['step']) / 2, float(spec['step']))
+        else:
+            values = np.linspace(lo, hi, max(length, 0))
+    else:
+        values = np.asarray([spec], dtype=float)
+    if values.ndim != 1 or values.size == 0:
+        raise ValueError(f'{name}: expected a non-empty list or range')
+    return values
+
+
+def first_value(name, spec):
+    """The first value of an axis, without building it."""
+    if isinstance(spec, (list, tuple)):
+        if not spec:
+            raise ValueError(f'{name}: expected a non-empty list or range')
+        return float(spec[0])
+    if isinstance(spec, dict):
+        return _range(name, spec)[0]
+    return float(spec)
+
+
+def normalize_sweep(fixed, grid):
+    """Validate the grid size and the fixed inputs of a sweep; swept inputs need no fixed value.
+
+    Swept axes are only checked for type and size here. Rules across inputs,
+    such as ``HB1 >= HB2 + 10``, apply per grid point: :func:`feasible_mask`
+    drops the points that break them.
+    """
+    check_grid(grid)
+    first = {name: first_value(name, spec) for name, spec in grid.items()}
+    params = normalize_params({**(fixed or {}), **first}, check_hardness=not {'HB1', 'HB2'} & set(grid))
+    for name in grid:
+        params.pop(name, None)
+    return params
+
+
+def build_grid(fixed, grid):
+    """Return ``(inputs, axis_names, axis_values, shape)`` for a sparse grid."""
+    check_grid(grid)
+    names = list(grid)
+    axes = [parse_axis(name, grid[name]) for name in names]
+    shape = tuple(a.size for a in axes)
+    inputs = dict(fixed)
+    inputs.update(zip(names, np.meshgrid(*axes, indexing='ij', sparse=True)))
+    return inputs, names, axes, shape
+
+
+def feasible_mask(inputs, out, shape):
+    ok = np.isfinite(out['P_ct']) & (out['u1'] > 0) & (out['u2'] > 0) & (out['z1'] > 0)
+    if 'KHL1' in out:
+        ok = ok & (np.asarray(inputs['HB1']) >= np.asarray(inputs['HB2']) + 10)
+    return np.broadcast_to(ok, shape)
+
+
+def pareto_front(a, b):
+    """Indices of points not dominated when minimising both ``a`` and ``b``."""
+    order = np.lexsort((b, a))
+    best_b = np.minimum.accumulate(b[order])
+    # A point survives when it improves on every point with a smaller or equal ``a``
+    keep = np.empty(order.size, dtype=bool)
+    keep[0] = True
+    keep[1:] = b[order][1:] < best_b[:-1]
+    return order[keep]
+
+
+def summarize(values):
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return None
+    stats = {'min': float(values.min()), 'max': float(values.max()), 'mean': float(values.mean())}
+    for p, v in zip(STAT_PERCENTILES, np.percentile(values, STAT_PERCENTILES)):
+        stats[f'p{p}'] = float(v)
+    return stats
+
+
+def sweep(fixed, grid, objectives=None, top_k=10, max_results=MAX_RESULTS):
+    """Evaluate every grid point and return the best designs and statistics.
+
+    ``objectives`` maps one or two output names to ``'min'`` or ``'max'``.
+    With one objective the ``top_k`` best designs are returned; with two the
+    Pareto-optimal set is returned, thinned evenly to ``max_results``.
+    """
+    objectives = objectives or {'P_ct': 'min'}
+    if not 1 <= len(objectives) <= 2:
+        raise ValueError('Give one objective for top-k or two for a Pareto front')
+    if not 1 <= top_k <= max_results:
+        raise ValueError(f'top_k must be between 1 and {max_results}')
+    inputs, names, axes, shape = build_grid(fixed, grid)
+    # One grid point tells which outputs exist, before the full pass is paid for
+    sample = evaluate(**{**inputs, **{name: axis[0] for name, axis in zip(names, axes)}})
+    for key, sense in objectives.items():
+        if key not in sample:
+            raise ValueError(f'Unknown objective {key}')
+        if sense not in ('min', 'max'):
+            raise ValueError(f'Objective {key} must be min or max')
+    out = evaluate(**inputs, ratio_solver=split_table().ratio_split)
+
+    mask = feasible_mask(inputs, out, shape)
+    feasible = np.flatnonzero(mask)
+    # Outputs stay broadcast views; only feasible values are ever copied, one output at a time
+    full = {key: np.broadcast_to(value, shape) for key, value in out.items()}
+    # Minimise everything internally
+    scores = [full[k][mask] * (1 if s == 'min' else -1) for k, s in objectives.items()]
+
+    if len(scores) == 1:
+        k = min(top_k, feasible.size)
+        best = np.argpartition(scores[0], k - 1)[:k] if k else np.array([], dtype=int)
+        chosen = best[np.argsort(scores[0][best])]
+        mode = 'top_k'
+    else:
+        chosen = pareto_front(*scores) if feasible.size else np.array([], dtype=int)
+        if chosen.size > max_results:
+            chosen = chosen[np.linspace(0, chosen.size - 1, max_results).astype(int)]
+        mode = 'pareto'
+
+    designs = []
+    for idx in feasible[chosen]:
+        position = np.unravel_index(idx, shape)
+        designs.append({
+            'inputs': {name: float(axis[i]) for name, axis, i in zip(names, axes, position)},
+            'outputs': {key: float(values[position]) for key, values in full.items()},
+        })
+
+    return {
+        'mode': mode,
+        'objectives': objectives,
+        'points': int(np.prod(shape, dtype=np.int64)),
+        'feasible': int(feasible.size),
+        'designs': designs,
+        'statistics': {key: summarize(values[mask]) for key, values in full.items()},
+    }
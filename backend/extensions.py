@@ -1,10 +1,74 @@
-from flask import Flask
-from flask_cors import CORS
-from flask_pymongo import PyMongo
+"""Process-wide extensions shared by the app factory and the routes.
 
-mongo = PyMongo()
+``mongo`` owns one pooled ``MongoClient`` per process. It is created on
+first use rather than in :meth:`Mongo.init_app`, and again whenever the
+process id changes, so a client opened before a pre-fork server forks its
+workers is never used by them (pymongo clients are not fork-safe). ``db``
+always resolves to the current process's database.
+"""
+import os
+import threading
 
-def init_app(app: Flask):
-    app.config.from_object('config.Config')
-    CORS(app)
-    mongo.init_app(app)
+from pymongo import MongoClient
+from werkzeug.local import LocalProxy
+
+# Config key -> MongoClient option
+POOL_OPTIONS = {
+    'MONGO_MAX_POOL_SIZE': 'maxPoolSize',
+    'MONGO_MIN_POOL_SIZE': 'minPoolSize',
+    'MONGO_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+    'MONGO_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+    'MONGO_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+}
+
+
+class Mongo:
+    def __init__(self):
+        self.uri = None
+        self.options = {}
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, event_listeners=()):
+        self.uri = app.config['MONGO_URI']
+        self.options = {option: app.config[key] for key, option in POOL_OPTIONS.items()
+                        if app.config.get(key) is not None}
+        self.options['event_listeners'] = list(event_listeners)
+        self.close()
+        app.extensions['mongo'] = self
+
+    @property
+    def client(self):
+        client = self._client
+        if client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    if self.uri is None:
+                        raise RuntimeError('Mongo used before init_app')
+                    # connect=False: no sockets or monitor threads until the first operation
+                    self._client = MongoClient(self.uri, connect=False, **self.options)
+                    self._pid = os.getpid()
+                client = self._client
+        return client
+
+    @property
+    def db(self):
+        return self.client.get_default_database()
+
+    def collection(self, name):
+        """Proxy to collection ``name`` that follows the client across forks."""
+        return LocalProxy(lambda: self.db[name])
+
+    def close(self):
+        with self._lock:
+            # An inherited client belongs to the parent; only close our own
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = self._pid = None
+
+
+mongo = Mongo()
+db = LocalProxy(lambda: mongo.db)
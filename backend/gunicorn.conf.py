@@ -0,0 +1,42 @@
+"""Gunicorn settings for wsgi.py; every value can be overridden from the environment.
+
+Workers are processes, each with its own Mongo pool (MONGO_MAX_POOL_SIZE in
+config.py) and its own caches; threads serve requests inside a worker. The
+app spends most of a request waiting on Mongo, so a few threads per worker
+keep the CPU busy. Every open chat stream holds one thread for as long as
+the client stays connected, so raise GUNICORN_THREADS with the number of
+concurrent chat viewers, and keep threads below the pool size.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+# Chat streams send a heartbeat every 15 s; anything silent for this long is gone
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot accumulate; jitter avoids restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+# Workers import the app themselves: the chat backplane thread, the job pools and the
+# Mongo client then belong to the worker instead of being forked from the master
+preload_app = False
+accesslog = None  # the app logs every request itself
+
+
+def on_starting(server):
+    # Indexes and backfills once per deploy, before any worker serves, on a short-lived
+    # client of the master's own
+    from pymongo import MongoClient
+
+    from app import prepare_database
+    from config import Config
+
+    client = MongoClient(Config.MONGO_URI)
+    try:
+        prepare_database(client.get_default_database())
+    finally:
+        client.close()
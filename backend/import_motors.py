@@ -0,0 +1,45 @@
+"""Load a motor catalog from CSV into the ``motors`` collection.
+
+    python import_motors.py catalog.csv --uri mongodb://localhost:27017/ --db mixer_db
+
+Rows are upserted by model (``kieu_dong_co``), so re-importing an edited
+file updates it in place; ``--replace`` also deletes motors the file no
+longer lists. Running servers pick the import up within
+``MOTOR_INDEX_CHECK_INTERVAL`` seconds.
+"""
+import argparse
+import sys
+
+from pymongo import MongoClient
+
+from indexes import ensure_indexes
+from utils.motors import import_motors, read_motor_csv
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import a motor catalog from CSV.')
+    parser.add_argument('csv', help='file with model, power (kW) and speed (rpm) columns')
+    parser.add_argument('--uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--db', default='mixer_db')
+    parser.add_argument('--delimiter', default=',')
+    parser.add_argument('--replace', action='store_true',
+                        help='delete motors that are not in the file')
+    args = parser.parse_args(argv)
+
+    db = MongoClient(args.uri)[args.db]
+    # The unique model index is what makes re-imports update instead of duplicate
+    ensure_indexes(db)
+    try:
+        with open(args.csv, newline='', encoding='utf-8-sig') as f:
+            docs = list(read_motor_csv(f, args.delimiter))
+        counts = import_motors(db, docs, replace=args.replace, source=args.csv)
+    except ValueError as e:
+        print(f'{args.csv}: {e}', file=sys.stderr)
+        return 1
+    print(f"{counts['rows']} rows: {counts['inserted']} added, {counts['updated']} updated, "
+          f"{counts['removed']} removed.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""Index declarations for every collection, plus a query-plan audit.
+
+``ensure_indexes(db)`` is idempotent and runs at startup. The audit runs the
+queries issued by the routes through ``explain()`` and reports any plan that
+falls back to a collection scan:
+
+    python indexes.py ensure --uri mongodb://localhost:27017/ --db mixer_db
+    python indexes.py audit  --uri mongodb://localhost:27017/
+    python indexes.py dedupe --uri mongodb://localhost:27017/ --db mixer_db
+
+``audit`` seeds a freshly named scratch database (``mixer_db_audit_<random>``),
+ensures the indexes there, explains every query, drops it again and exits
+non-zero on a COLLSCAN; it never touches the database named by ``--db``.
+
+A unique index cannot be built while the collection holds duplicate keys,
+which legacy data may. ``ensure_indexes`` then skips that index, logs the
+offending keys and carries on. ``dedupe`` resolves what is safe to resolve
+automatically: clashing workspace codes get fresh codes, clashing sibling
+folders are renamed ``<name> (2)``, ``<name> (3)``, ... and repeated
+membership rows are deleted; in every case the oldest document keeps its
+key. Duplicate user emails and motor models are only listed, since merging
+accounts or catalog rows needs a person to decide; fix them by hand, then
+run ``ensure``.
+"""
+import argparse
+import datetime
+import sys
+import uuid
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient
+from pymongo.errors import DuplicateKeyError
+
+from utils.codes import CodeAllocator
+from utils.log import get_logger
+
+log = get_logger('indexes')
+
+# Shared calculation reports are recomputed on demand once they expire
+CALC_RESULT_TTL = 30 * 24 * 3600
+
+INDEXES = {
+    'users': [
+        IndexModel([('email', ASCENDING)], unique=True, name='email_unique'),
+        # Admin directory: newest first or by email, optionally within a role
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)], name='created_timeline'),
+        IndexModel([('role', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                   name='role_timeline'),
+        IndexModel([('role', ASCENDING), ('email', ASCENDING)], name='role_email'),
+    ],
+    'workspaces': [
+        IndexModel([('code', ASCENDING)], unique=True, name='code_unique'),
+        # Workspace list pages: newest first, _id breaks ties
+        IndexModel([('members', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                   name='member_timeline'),
+    ],
+    'workspace_members': [
+        IndexModel([('workspace_id', ASCENDING), ('user_id', ASCENDING)], unique=True,
+                   name='workspace_user'),
+        IndexModel([('user_id', ASCENDING), ('workspace_id', ASCENDING)], name='user_workspace'),
+    ],
+    'chats': [
+        # _id breaks timestamp ties for keyset pagination
+        IndexModel([('chat_type', ASCENDING), ('workspace_id', ASCENDING),
+                    ('timestamp', ASCENDING), ('_id', ASCENDING)], name='workspace_timeline'),
+        IndexModel([('chat_type', ASCENDING), ('timestamp', DESCENDING)], name='type_timeline'),
+        IndexModel([('sender', ASCENDING), ('receiver', ASCENDING), ('timestamp', ASCENDING)],
+                   name='conversation'),
+        IndexModel([('receiver', ASCENDING), ('timestamp', ASCENDING)], name='inbox'),
+    ],
+    'calculations': [
+        # History pages: newest first, _id breaks ties
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                   name='user_timeline'),
+        IndexModel([('workspace_id', ASCENDING)], name='workspace'),
+        # Active jobs of a user (the per-user limit) and stale jobs at start-up
+        IndexModel([('status', ASCENDING), ('user_id', ASCENDING), ('created_at', ASCENDING)],
+                   name='status_user'),
+    ],
+    'calc_results': [
+        IndexModel([('created_at', ASCENDING)], expireAfterSeconds=CALC_RESULT_TTL, name='expiry'),
+        IndexModel([('catalog_version', ASCENDING)], name='catalog_version'),
+    ],
+    'revoked_tokens': [
+        IndexModel([('expires_at', ASCENDING)], expireAfterSeconds=0, name='expiry'),
+        IndexModel([('revoked_at', ASCENDING)], name='revoked_at'),
+    ],
+    'proposals': [
+        IndexModel([('status', ASCENDING), ('timestamp', ASCENDING)], name='status_timeline'),
+    ],
+    'motors': [
+        IndexModel([('kieu_dong_co', ASCENDING)], unique=True, name='model_unique'),
+        # Selection: power range first, then speed range or order within it
+        IndexModel([('cong_suat_kw', ASCENDING), ('van_toc_50Hz', ASCENDING)], name='power_speed'),
+    ],
+    'catalog_folders': [
+        # Children of a folder by name; names are unique among siblings
+        IndexModel([('parent_id', ASCENDING), ('folder_name', ASCENDING)], unique=True,
+                   name='parent_name'),
+        # Subtrees are anchored prefix regexes on the materialized path
+        IndexModel([('path', ASCENDING)], name='path'),
+    ],
+    'catalog': [
+        IndexModel([('folder_path', ASCENDING), ('_id', ASCENDING)], name='folder_items'),
+    ],
+}
+
+
+def duplicates(db, collection, model, limit=20):
+    """Key values held by more than one document (at most ``limit``), with their ``_id`` s oldest first."""
+    fields = list(model.document['key'])
+    pipeline = [
+        {'$sort': {'_id': 1}},
+        {'$group': {'_id': {f: f'${f}' for f in fields}, 'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}},
+    ]
+    if limit:
+        pipeline.append({'$limit': limit})
+    return list(db[collection].aggregate(pipeline, allowDiskUse=True))
+
+
+def ensure_indexes(db):
+    """Create every declared index that does not exist yet.
+
+    Returns ``(collection, index name, duplicates)`` for each unique index
+    skipped because existing documents share a key; see ``dedupe``.
+    """
+    skipped = []
+    for collection, models in INDEXES.items():
+        for model in models:
+            # One at a time: a failed build would otherwise abort the whole batch
+            try:
+                db[collection].create_indexes([model])
+            except DuplicateKeyError:
+                found = duplicates(db, collection, model)
+                skipped.append((collection, model.document['name'], found))
+                log.error('unique index %s.%s skipped: %d duplicate keys, e.g. %s; run indexes.py dedupe',
+                          collection, model.document['name'], len(found), [d['_id'] for d in found[:5]])
+    return skipped
+
+
+def _unique_model(collection, name):
+    return next(m for m in INDEXES[collection] if m.document['name'] == name)
+
+
+def _dedupe_codes(db, allocator):
+    changed = 0
+    for dup in duplicates(db, 'workspaces', _unique_model('workspaces', 'code_unique'), limit=None):
+        for _id in dup['ids'][1:]:
+            code = allocator.generate()
+            while db.workspaces.find_one({'code': code}, {'_id': 1}):
+                code = allocator.generate()
+            db.workspaces.update_one({'_id': _id}, {'$set': {'code': code}})
+            changed += 1
+    return changed
+
+
+def _dedupe_folders(db):
+    changed = 0
+    model = _unique_model('catalog_folders', 'parent_name')
+    for dup in duplicates(db, 'catalog_folders', model, limit=None):
+        parent, name = dup['_id'].get('parent_id'), dup['_id'].get('folder_name')
+        suffix = 2
+        for _id in dup['ids'][1:]:
+            while db.catalog_folders.find_one({'parent_id': parent, 'folder_name': f'{name} ({suffix})'}):
+                suffix += 1
+            db.catalog_folders.update_one({'_id': _id}, {'$set': {'folder_name': f'{name} ({suffix})'}})
+            suffix += 1
+            changed += 1
+    return changed
+
+
+def _dedupe_members(db):
+    changed = 0
+    model = _unique_model('workspace_members', 'workspace_user')
+    for dup in duplicates(db, 'workspace_members', model, limit=None):
+        changed += db.workspace_members.delete_many({'_id': {'$in': dup['ids'][1:]}}).deleted_count
+    return changed
+
+
+def dedupe(db, code_length=6):
+    """Resolve duplicate keys that block unique indexes; returns ``(fixed, manual)``.
+
+    ``fixed`` counts changed documents per index, ``manual`` lists the
+    duplicates of ``users.email_unique`` and ``motors.model_unique`` left for
+    a person to merge.
+    """
+    fixed = {
+        'workspaces.code_unique': _dedupe_codes(db, CodeAllocator(code_length)),
+        'catalog_folders.parent_name': _dedupe_folders(db),
+        'workspace_members.workspace_user': _dedupe_members(db),
+    }
+    manual = [(collection, name, found) for collection, name in (('users', 'email_unique'),
+                                                                 ('motors', 'model_unique'))
+              for found in [duplicates(db, collection, _unique_model(collection, name), limit=None)] if found]
+    return fixed, manual
+
+
+# (description, collection, filter, sort) for the queries the routes issue
+USER_ID = '64b000000000000000000001'
+OTHER_ID = '64b000000000000000000002'
+AUDIT_QUERIES = [
+    ('login / register by email', 'users', {'email': 'user0@example.com'}, None),
+    ('user directory', 'users', {}, [('created_at', -1), ('_id', -1)]),
+    ('user directory by role', 'users', {'role': 'admin'}, [('created_at', -1), ('_id', -1)]),
+    ('user directory email prefix', 'users', {'email': {'$regex': '^user1'}}, [('email', 1)]),
+    ('user directory role by email', 'users', {'role': 'user'}, [('email', 1)]),
+    ('join / detail by code', 'workspaces', {'code': '100000'}, None),
+    ('list workspaces of a member', 'workspaces', {'members': USER_ID},
+     [('created_at', -1), ('_id', -1)]),
+    ('membership check', 'workspace_members', {'workspace_id': 'w0', 'user_id': USER_ID}, None),
+    ('members of workspaces', 'workspace_members', {'workspace_id': {'$in': ['w0', 'w1']}}, None),
+    ('workspaces of a member', 'workspace_members', {'user_id': USER_ID}, None),
+    ('workspace chat', 'chats',
+     {'chat_type': 'workspace', 'workspace_id': 'w0'}, [('timestamp', 1), ('_id', 1)]),
+    ('delete workspace chat', 'chats', {'chat_type': 'workspace', 'workspace_id': 'w0'}, None),
+    ('direct chat with admin', 'chats',
+     {'chat_type': 'direct', '$or': [{'sender': USER_ID, 'receiver': 'admin'},
+                                     {'sender': 'admin', 'receiver': USER_ID}]},
+     [('timestamp', 1), ('_id', 1)]),
+    ('chat between two users', 'chats',
+     {'$or': [{'sender': USER_ID, 'receiver': OTHER_ID},
+              {'sender': OTHER_ID, 'receiver': USER_ID}]}, [('timestamp', 1), ('_id', 1)]),
+    ('admin inbox', 'chats', {'$or': [{'receiver': 'admin'}, {'sender': 'admin'}]},
+     [('timestamp', 1), ('_id', 1)]),
+    ('admin direct chats', 'chats', {'chat_type': 'direct'}, [('timestamp', -1), ('_id', -1)]),
+    ('calculation history', 'calculations', {'user_id': USER_ID},
+     [('created_at', -1), ('_id', -1)]),
+    ('calculation history of a workspace', 'calculations',
+     {'user_id': USER_ID, 'workspace_id': 'w0', 'status': 'completed'},
+     [('created_at', -1), ('_id', -1)]),
+    ('delete workspace calculations', 'calculations', {'workspace_id': 'w0'}, None),
+    ('active jobs of a user', 'calculations',
+     {'status': {'$in': ['pending', 'running']}, 'user_id': USER_ID}, None),
+    ('stale jobs', 'calculations',
+     {'status': {'$in': ['pending', 'running']}, 'created_at': {'$lt': datetime.datetime(2024, 1, 1)}}, None),
+    ('revocations since the last pull', 'revoked_tokens',
+     {'revoked_at': {'$gte': datetime.datetime(2024, 1, 1)}}, None),
+    ('pending proposals', 'proposals', {'status': 'pending'}, [('timestamp', 1)]),
+    ('motor search', 'motors', {'cong_suat_kw': {'$gte': 5.5}, 'van_toc_50Hz': {'$gte': 1200, '$lte': 1700}},
+     [('cong_suat_kw', 1), ('van_toc_50Hz', 1)]),
+    ('child folders', 'catalog_folders', {'parent_id': None}, [('folder_name', 1)]),
+    ('folder subtree', 'catalog_folders', {'path': {'$regex': '^,f0,'}}, None),
+    ('catalog items of a folder', 'catalog', {'folder_path': ',f0,'}, [('folder_path', 1), ('_id', 1)]),
+    ('catalog items of a subtree', 'catalog', {'folder_path': {'$regex': '^,f0,'}},
+     [('folder_path', 1), ('_id', 1)]),
+]
+
+
+def seed(db, n=200):
+    """Fill a scratch database with enough documents for realistic plans."""
+    now = datetime.datetime.utcnow()
+    users = [{'email': f'user{i}@example.com', 'role': 'admin' if i % 50 == 0 else 'user',
+              'created_at': now - datetime.timedelta(minutes=i)} for i in range(n)]
+    db.users.insert_many(users)
+    db.workspaces.insert_many([{'name': f'ws{i}', 'code': str(100000 + i), 'created_at': now,
+                                'members': [USER_ID, str(ObjectId())]} for i in range(n)])
+    db.workspace_members.insert_many([{'workspace_id': f'w{i}', 'user_id': uid}
+                                      for i in range(n) for uid in (USER_ID, str(ObjectId()))])
+    db.chats.insert_many([{
+        'chat_type': 'workspace' if i % 2 else 'direct',
+        'workspace_id': f'w{i % 10}',
+        'sender': USER_ID if i % 3 else 'admin',
+        'receiver': 'admin' if i % 3 else OTHER_ID,
+        'message': f'message {i}',
+        'timestamp': now + datetime.timedelta(seconds=i),
+    } for i in range(n)])
+    db.calculations.insert_many([{'user_id': USER_ID, 'workspace_id': f'w{i % 10}',
+                                  'created_at': now} for i in range(n)])
+    db.revoked_tokens.insert_many([{'_id': str(ObjectId()), 'revoked_at': now - datetime.timedelta(hours=i),
+                                    'expires_at': now + datetime.timedelta(hours=24 - i)} for i in range(n)])
+    db.proposals.insert_many([{'sender': USER_ID, 'status': 'pending' if i % 2 else 'approved',
+                               'timestamp': now} for i in range(n)])
+    db.motors.insert_many([{'kieu_dong_co': f'M{i}', 'cong_suat_kw': 0.5 * (i % 60),
+                            'van_toc_50Hz': (750, 1000, 1500, 3000)[i % 4]} for i in range(n)])
+    db.catalog_folders.insert_many([{'folder_name': f'folder{i}', 'parent_id': None,
+                                     'path': f',f{i % 10},' + ('' if i < 10 else f'{i},')}
+                                    for i in range(n)])
+    db.catalog.insert_many([{'name': f'item{i}', 'folder_path': f',f{i % 10},'} for i in range(n)])
+
+
+def _stages(plan):
+    yield plan.get('stage')
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from _stages(child)
+
+
+def audit(db, queries=AUDIT_QUERIES):
+    """Explain every query and return ``(description, stages)`` for each COLLSCAN."""
+    failures = []
+    for description, collection, query, sort in queries:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain()['queryPlanner']['winningPlan']
+        stages = [s for s in _stages(plan) if s]
+        if 'COLLSCAN' in stages:
+            failures.append((description, stages))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ensure or audit MongoDB indexes.')
+    parser.add_argument('command', choices=['ensure', 'audit', 'dedupe'])
+    parser.add_argument('--uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--db', default='mixer_db',
+                        help='database to index or dedupe; audit only uses it to name its scratch database')
+    parser.add_argument('--code-length', type=int, default=6, help='length of replacement workspace codes')
+    args = parser.parse_args(argv)
+
+    client = MongoClient(args.uri)
+    if args.command == 'ensure':
+        skipped = ensure_indexes(client[args.db])
+        for collection, name, found in skipped:
+            print(f'SKIPPED {collection}.{name}: {len(found)} duplicate keys, e.g. {found[0]["_id"]}')
+        print('Indexes ensured.' if not skipped else 'Run `indexes.py dedupe`, then `ensure` again.')
+        return 1 if skipped else 0
+    if args.command == 'dedupe':
+        fixed, manual = dedupe(client[args.db], args.code_length)
+        for index, count in fixed.items():
+            print(f'{index}: {count} documents changed')
+        for collection, name, found in manual:
+            print(f'MANUAL {collection}.{name}: ' + '; '.join(
+                f'{d["_id"]} x{d["count"]} ids {[str(i) for i in d["ids"]]}' for d in found))
+        return 1 if manual else 0
+
+    # A fresh name every run, so the drops below can only ever hit the scratch database
+    name = f'{args.db}_audit_{uuid.uuid4().hex[:12]}'
+    db = client[name]
+    try:
+        seed(db)
+        ensure_indexes(db)
+        failures = audit(db)
+    finally:
+        client.drop_database(name)
+    for description, stages in failures:
+        print(f'COLLSCAN: {description} -> {" > ".join(stages)}')
+    print(f'{len(AUDIT_QUERIES) - len(failures)}/{len(AUDIT_QUERIES)} queries use an index.')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
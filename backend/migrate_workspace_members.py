@@ -0,0 +1,35 @@
+"""Move workspace membership from ``members`` arrays to ``workspace_members``.
+
+    python migrate_workspace_members.py --uri mongodb://localhost:27017/ --db mixer_db
+
+Safe to re-run. Set ``WORKSPACE_MEMBERS_COLLECTION`` once it has completed;
+pass ``--drop-arrays`` only after every process uses the collection, since
+processes still on the array layout would otherwise lose all members.
+"""
+import argparse
+import sys
+
+from pymongo import MongoClient
+
+from indexes import ensure_indexes
+from utils.workspaces import migrate_members
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Migrate workspace members to their own collection.')
+    parser.add_argument('--uri', default='mongodb://localhost:27017/')
+    parser.add_argument('--db', default='mixer_db')
+    parser.add_argument('--drop-arrays', action='store_true',
+                        help='remove the members arrays after copying them')
+    args = parser.parse_args(argv)
+
+    db = MongoClient(args.uri)[args.db]
+    # The unique (workspace_id, user_id) index is what makes re-runs skip existing rows
+    ensure_indexes(db)
+    workspaces, memberships = migrate_members(db, drop_arrays=args.drop_arrays)
+    print(f'{workspaces} workspaces migrated, {memberships} memberships added.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
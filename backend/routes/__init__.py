@@ -0,0 +1,16 @@
+"""Blueprints, one module per area, imported only when registered.
+
+``create_app`` registers the names in ``BLUEPRINTS``; a worker pool that
+serves one area (chat streams, say) can list just that one and never
+imports the others or what they depend on.
+"""
+import importlib
+
+BLUEPRINTS = ('auth', 'workspace', 'calculation', 'export', 'chat', 'admin', 'catalog')
+
+
+def register_blueprints(app, names=BLUEPRINTS):
+    for name in names:
+        if name not in BLUEPRINTS:
+            raise ValueError(f'unknown blueprint {name!r}; expected one of {", ".join(BLUEPRINTS)}')
+        app.register_blueprint(importlib.import_module(f'{__name__}.{name}_routes').bp)
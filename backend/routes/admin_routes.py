@@ -0,0 +1,159 @@
+import datetime
+
+from bson import ObjectId
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.security import generate_password_hash
+
+import services
+from extensions import db
+from utils.auth import admin_required, invalidate_user
+from utils.motors import import_motors, read_motor_csv
+from utils.pagination import parse_limit
+from utils.users import count_directory, directory_query, page_directory
+
+bp = Blueprint('admin', __name__, url_prefix='/api')
+
+@bp.route('/admin/workspaces', methods=['GET'])
+@admin_required  # or use @user_required with proper admin check inside
+def admin_list_workspaces(current_user):
+    # Optionally check if current_user has admin role
+    return jsonify({'workspaces': db.workspaces.find({})}), 200
+
+# --------------------------
+# 14. Add User (Admin Only)
+# --------------------------
+@bp.route('/admin/add_user', methods=['POST'])
+@admin_required
+def admin_add_user(current_user):
+    data = request.get_json()
+    if not data or not data.get('email') or not data.get('password'):
+        return jsonify({'message': 'Email and password required'}), 400
+    if db.users.find_one({'email': data['email']}):
+        return jsonify({'message': 'Email already exists'}), 400
+    hashed_password = generate_password_hash(data['password'], method='pbkdf2:sha256')
+    user = {
+        'email': data['email'],
+        'password': hashed_password,
+        'role': data.get('role', 'user'),
+        'created_at': datetime.datetime.utcnow()
+    }
+    result = db.users.insert_one(user)
+    return jsonify({'message': 'User added successfully', 'user_id': str(result.inserted_id)}), 201
+
+# --------------------------
+# 15. Delete User (Admin Only)
+# --------------------------
+@bp.route('/admin/user/delete', methods=['DELETE'])
+@admin_required
+def admin_delete_user(current_user):
+    data = request.get_json()
+    if not data or not data.get('user_id'):
+        return jsonify({'message': 'User ID required'}), 400
+    try:
+        db.users.delete_one({'_id': ObjectId(data['user_id'])})
+    except Exception:
+        return jsonify({'message': 'Invalid user ID'}), 400
+    invalidate_user(data['user_id'])
+    return jsonify({'message': 'User deleted successfully'}), 200
+
+@bp.route('/admin/user/role', methods=['PUT'])
+@admin_required
+def admin_set_user_role(current_user):
+    data = request.get_json()
+    if not data or not data.get('user_id') or data.get('role') not in ('user', 'admin'):
+        return jsonify({'message': "User ID and a role of 'user' or 'admin' required"}), 400
+    try:
+        result = db.users.update_one({'_id': ObjectId(data['user_id'])}, {'$set': {'role': data['role']}})
+    except Exception:
+        return jsonify({'message': 'Invalid user ID'}), 400
+    if not result.matched_count:
+        return jsonify({'message': 'User not found'}), 404
+    invalidate_user(data['user_id'])
+    return jsonify({'message': 'Role updated successfully'}), 200
+
+@bp.route('/admin/auth/cache_stats', methods=['GET'])
+@admin_required
+def auth_cache_stats(current_user):
+    return jsonify({'user_cache': services.user_cache.stats(),
+                    'revocations': services.revocations.stats()}), 200
+
+@bp.route('/admin/calculate/cache_stats', methods=['GET'])
+@admin_required
+def calc_cache_stats(current_user):
+    return jsonify({'calc_cache': services.calc_cache.stats()}), 200
+
+@bp.route('/admin/calculate/cache/invalidate', methods=['POST'])
+@admin_required
+def calc_cache_invalidate(current_user):
+    # Published through the reference catalogs so every process switches, not only this one
+    version = services.reference.bump()
+    return jsonify({'message': 'Calculation cache invalidated', 'catalog_version': version}), 200
+@bp.route('/admin/users', methods=['GET'])
+@admin_required
+def get_all_users(current_user):
+    """One page of users: ``q`` (email prefix), ``role``, ``sort`` (created_at or email),
+    ``order`` (asc/desc), ``after`` and ``limit``. Only email, role and created_at are returned.
+    """
+    args = request.args
+    if args.get('order') not in (None, '', 'asc', 'desc'):
+        return jsonify({'message': "order must be 'asc' or 'desc'"}), 400
+    direction = {'asc': 1, 'desc': -1}.get(args.get('order'))
+    try:
+        limit = parse_limit(args.get('limit'), current_app.config['ADMIN_USERS_PAGE_LIMIT'],
+                            current_app.config['ADMIN_USERS_PAGE_LIMIT_MAX'])
+        users, next_cursor = page_directory(db, directory_query(args), args.get('sort') or 'created_at',
+                                            direction, args.get('after'), limit)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({'users': users, 'next_cursor': next_cursor}), 200
+
+@bp.route('/admin/users/count', methods=['GET'])
+@admin_required
+def count_users(current_user):
+    """User totals for the dashboard; takes the same ``q`` and ``role`` filters as the listing."""
+    try:
+        query = directory_query(request.args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify(count_directory(db, query)), 200
+
+@bp.route('/admin/engines/import', methods=['POST'])
+@admin_required
+def admin_import_engines(current_user):
+    """Upsert motors from an uploaded CSV (``file`` field, or the raw body); ``replace=1`` mirrors it."""
+    upload = request.files.get('file')
+    data = upload.read() if upload else request.get_data()
+    if not data:
+        return jsonify({'message': 'CSV file required'}), 400
+    try:
+        text = data.decode('utf-8-sig')
+        counts = import_motors(db, list(read_motor_csv(text.splitlines(), request.args.get('delimiter', ','))),
+                               replace=request.args.get('replace') in ('1', 'true'),
+                               source=upload.filename if upload else 'upload')
+    except (UnicodeDecodeError, ValueError) as e:
+        return jsonify({'message': f'Invalid CSV: {e}'}), 400
+    services.motor_index.load()
+    return jsonify({'message': 'Motors imported', **counts}), 200
+
+@bp.route('/admin/reference', methods=['GET'])
+@admin_required
+def admin_list_reference(current_user):
+    return jsonify({'version': services.reference.version, 'catalogs': services.reference.catalogs()}), 200
+
+@bp.route('/admin/reference/<name>', methods=['GET'])
+@admin_required
+def admin_get_reference(current_user, name):
+    items = services.reference.items(name)
+    if items is None:
+        return jsonify({'message': 'Catalog not found'}), 404
+    return jsonify({'name': name, 'items': items}), 200
+
+@bp.route('/admin/reference/<name>', methods=['PUT'])
+@admin_required
+def admin_update_reference(current_user, name):
+    data = request.get_json(silent=True) or {}
+    try:
+        version = services.reference.update(name, data.get('items'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({'message': 'Catalog updated', 'version': version}), 200
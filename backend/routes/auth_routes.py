@@ -1,46 +1,109 @@
-from flask import Blueprint, request, jsonify, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
-import jwt, datetime
-from extensions import mongo
-from utils.mongo import to_obj_id, stringify_id
+import datetime
+
+import jwt
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from extensions import db
+from utils.auth import token_required
 
 bp = Blueprint('auth', __name__, url_prefix='/api')
 
+# --------------------------
+# 1. User Registration
+# --------------------------
 @bp.route('/register', methods=['POST'])
 def register():
-    data = request.get_json() or {}
-    if not data.get('email') or not data.get('password'):
-        return jsonify({'message': 'Missing fields'}), 400
-    if mongo.db.users.find_one({'email': data['email']}):
-        return jsonify({'message': 'Email exists'}), 400
+    data = request.get_json()
+    if not data or not data.get('email') or not data.get('password'):
+        return jsonify({'message': 'Missing required fields'}), 400
 
+    if db.users.find_one({'email': data['email']}):
+        return jsonify({'message': 'Email already exists'}), 400
+
+    hashed_password = generate_password_hash(data['password'], method='pbkdf2:sha256')
     user = {
         'email': data['email'],
-        'password': generate_password_hash(data['password']),
-        'role': 'user',
+        'password': hashed_password,
+        'role': 'user',  # default role
         'created_at': datetime.datetime.utcnow()
     }
-    res = mongo.db.users.insert_one(user)
-    return jsonify({'message':'Registered','user_id':str(res.inserted_id)}), 201
+    result = db.users.insert_one(user)
+    return jsonify({'message': 'Registration successful!', 'user_id': str(result.inserted_id)}), 201
 
+# --------------------------
+# 2. User Login
+# --------------------------
 @bp.route('/login', methods=['POST'])
 def login():
-    data = request.get_json() or {}
-    user = mongo.db.users.find_one({'email': data.get('email')})
-    if not user or not check_password_hash(user['password'], data.get('password','')):
-        return jsonify({'message':'Invalid credentials'}), 401
+    data = request.get_json()
+    if not data or not data.get('email') or not data.get('password'):
+        return jsonify({'message': 'Missing required fields'}), 400
+
+    user = db.users.find_one({'email': data['email']})
+    if not user or not check_password_hash(user['password'], data['password']):
+        return jsonify({'message': 'Invalid email or password'}), 401
 
-    token = jwt.encode({
+    claims = {
         'user_id': str(user['_id']),
+        # Compared with revocations, so a login after a role change gets trusted claims again
+        'iat': datetime.datetime.utcnow(),
         'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=current_app.config['JWT_EXPIRATION_HOURS'])
-    }, current_app.config['SECRET_KEY'], algorithm="HS256")
+    }
+    if current_app.config['JWT_ROLE_CLAIMS']:
+        claims['role'] = user.get('role', 'user')
+        claims['email'] = user['email']
+    token = jwt.encode(claims, current_app.config['SECRET_KEY'], algorithm="HS256")
+    
+    # Ensure token is a string
+    if isinstance(token, bytes):
+        token = token.decode('utf-8')
+    
+    # Return token along with user details
+# in /api/login
     return jsonify({
-        'message':'Login successful',
+        'message': 'Login successful',
         'token': token,
-        'user': stringify_id(user)
+        'user': {
+            '_id': str(user['_id']),
+            'email': user['email'],
+            'role': user.get('role', 'user')
+        }
     }), 200
 
+
+
+
+# --------------------------
+# 3. User Logout (Client-side removal of token)
+# --------------------------
 @bp.route('/logout', methods=['POST'])
 @token_required
 def logout(**kwargs):
-    return jsonify({'message':'Logout successful'}), 200
+    return jsonify({'message': 'Logout successful! Please remove your token on client side.'}), 200
+
+# --------------------------
+# Admin Seed Endpoint (Create Admin Account)
+# --------------------------
+@bp.route('/seed_admin', methods=['POST'])
+def seed_admin():
+    seed_key = request.headers.get('x-seed-key')
+    if seed_key != "admin_creation_secret":
+        return jsonify({'message': 'Not authorized to seed admin account'}), 403
+
+    data = request.get_json()
+    if not data or not data.get('email') or not data.get('password'):
+        return jsonify({'message': 'Missing required fields'}), 400
+
+    if db.users.find_one({'email': data['email']}):
+        return jsonify({'message': 'An account with that email already exists'}), 400
+
+    hashed_password = generate_password_hash(data['password'], method='pbkdf2:sha256')
+    admin_user = {
+        'email': data['email'],
+        'password': hashed_password,
+        'role': 'admin',
+        'created_at': datetime.datetime.utcnow()
+    }
+    result = db.users.insert_one(admin_user)
+    return jsonify({'message': 'Admin account created successfully!', 'user_id': str(result.inserted_id)}), 201
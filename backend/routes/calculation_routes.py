@@ -0,0 +1,186 @@
+import datetime
+
+from bson import ObjectId
+from flask import Blueprint, current_app, jsonify, request
+
+import engine
+import services
+from extensions import db
+from services import calculation_report
+from utils.auth import user_required
+from utils.history import (active_jobs_query, find_calculation, history_projection, history_query,
+                           history_summary, page_history)
+from utils.jobs import ACTIVE, CANCELLED, COMPLETED, FAILED, RUNNING, JobLimitExceeded
+from utils.log import get_logger
+from utils.pagination import parse_limit
+
+bp = Blueprint('calculation', __name__, url_prefix='/api')
+log = get_logger('calculation')
+
+# --------------------------
+# 8. Input Parameters & Calculation (Regular Users Only)
+# --------------------------
+def wants_async(data):
+    return str(data.get('async', request.args.get('async', ''))).lower() in ('true', '1')
+
+def set_job_status(job_id, status, result=None, error=None):
+    update = {'status': status}
+    if status == RUNNING:
+        update['started_at'] = datetime.datetime.utcnow()
+    elif status in (COMPLETED, FAILED, CANCELLED):
+        update['finished_at'] = datetime.datetime.utcnow()
+    if result:
+        update.update(result)
+    if error:
+        update['error'] = error
+        log.warning('Calculation job %s failed: %s', job_id, error)
+    # A job cancelled while its worker was busy stays cancelled
+    db.calculations.update_one({'_id': ObjectId(job_id), 'status': {'$in': list(ACTIVE)}},
+                               {'$set': update})
+
+def enqueue_calculation(current_user, calc_entry, task):
+    """Store ``calc_entry`` as a pending job and run ``task(job_id)`` in the background."""
+    owner = str(current_user['_id'])
+    calc_entry.update({'user_id': owner, 'status': 'pending',
+                       'created_at': datetime.datetime.utcnow()})
+    calc_id = db.calculations.insert_one(calc_entry).inserted_id
+    # Counted in Mongo after inserting, so the limit holds across workers and concurrent requests
+    active = db.calculations.count_documents(
+        active_jobs_query(owner, current_app.config['CALC_JOB_STALE_AFTER']))
+    if active > current_app.config['CALC_JOB_PER_USER']:
+        db.calculations.delete_one({'_id': calc_id})
+        return jsonify({'message': 'Too many calculations in progress'}), 429
+    try:
+        services.calc_jobs.submit(str(calc_id), owner, task, set_job_status)
+    except JobLimitExceeded as e:
+        db.calculations.delete_one({'_id': calc_id})
+        return jsonify({'message': str(e)}), 429
+    return jsonify({'message': 'Calculation queued', 'calc_id': str(calc_id), 'status': 'pending'}), 202
+
+@bp.route('/calculate', methods=['POST'])
+@user_required
+def calculate(current_user):
+    data = request.get_json()
+    try:
+        params = engine.normalize_params(data)
+        if wants_async(data):
+            def task(job_id):
+                result_key, report, _ = services.calc_cache.get_or_compute(
+                    params, lambda p: services.calc_jobs.run(job_id, engine.run, p))
+                return {'result': report['summary'], 'result_key': result_key,
+                        'engine_version': report['engine_version']}
+            return enqueue_calculation(current_user, {
+                'workspace_id': data.get('workspace_id'),
+                'parameters': params,
+            }, task)
+        result_key, report, source = services.calc_cache.get_or_compute(params, engine.run)
+        calc_entry = {
+            'user_id': str(current_user['_id']),
+            'workspace_id': data.get('workspace_id'),
+            'parameters': params,
+            'result': report['summary'],
+            # Steps live once per distinct input in calc_results; see calculation_report()
+            'result_key': result_key,
+            'engine_version': report['engine_version'],
+            'status': 'completed',
+            'created_at': datetime.datetime.utcnow()
+        }
+        result = db.calculations.insert_one(calc_entry)
+        return jsonify({
+            'message': 'Calculation successful',
+            'calc_id': str(result.inserted_id),
+            'result': report['summary'],
+            'steps': report['steps'],
+            'cache': source
+        }), 200
+    except Exception as e:
+        # Bad input is routine; anything else is a bug worth a traceback
+        if isinstance(e, ValueError):
+            log.info('Calculation rejected: %s', e)
+        else:
+            log.exception('Calculation failed')
+        return jsonify({'message': 'Calculation error', 'error': str(e)}), 400
+
+@bp.route('/calculate/sweep', methods=['POST'])
+@user_required
+def calculate_sweep(current_user):
+    data = request.get_json() or {}
+    grid = data.get('grid') or {}
+    if not grid:
+        return jsonify({'message': 'grid is required'}), 400
+    from engine import sweep
+
+    try:
+        top_k = int(data.get('top_k', 10))
+    except (TypeError, ValueError):
+        top_k = 0
+    if not 1 <= top_k <= sweep.MAX_RESULTS:
+        return jsonify({'message': f'top_k must be an integer from 1 to {sweep.MAX_RESULTS}'}), 400
+    try:
+        fixed = sweep.normalize_sweep(data.get('fixed'), grid)
+        if wants_async(data):
+            # normalize_sweep has checked the grid size; evaluation happens in a worker
+            args = (fixed, grid, data.get('objectives'), top_k)
+            return enqueue_calculation(current_user, {
+                'kind': 'sweep',
+                'workspace_id': data.get('workspace_id'),
+                'parameters': {'fixed': fixed, 'grid': grid,
+                               'objectives': data.get('objectives'), 'top_k': top_k},
+            }, lambda job_id: {'result': services.calc_jobs.run(job_id, sweep.sweep, *args)})
+        report = sweep.sweep(fixed, grid, data.get('objectives'), top_k)
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'message': 'Sweep error', 'error': str(e)}), 400
+    return jsonify(report), 200
+
+@bp.route('/calculate/<calc_id>/status', methods=['GET'])
+@user_required
+def calculation_status(current_user, calc_id):
+    calculation = find_calculation(db, calc_id, str(current_user['_id']))
+    if not calculation:
+        return jsonify({'message': 'Calculation not found'}), 404
+    response = {'calc_id': calc_id, 'status': calculation.get('status', 'completed')}
+    for key in ('kind', 'error', 'created_at', 'started_at', 'finished_at'):
+        if calculation.get(key) is not None:
+            response[key] = calculation[key]
+    if response['status'] == 'completed':
+        response['result'] = calculation.get('result')
+        if calculation.get('kind') != 'sweep':
+            response['steps'] = calculation_report(calculation)['steps']
+    return jsonify(response), 200
+
+@bp.route('/calculate/<calc_id>/cancel', methods=['POST'])
+@user_required
+def cancel_calculation(current_user, calc_id):
+    calculation = find_calculation(db, calc_id, str(current_user['_id']))
+    if not calculation:
+        return jsonify({'message': 'Calculation not found'}), 404
+    if calculation.get('status') not in ACTIVE:
+        return jsonify({'message': f"Calculation is already {calculation.get('status')}"}), 409
+    services.calc_jobs.cancel(calc_id)
+    # Also covers jobs queued by another process or lost in a restart
+    set_job_status(calc_id, CANCELLED)
+    return jsonify({'message': 'Calculation cancelled', 'calc_id': calc_id, 'status': 'cancelled'}), 200
+
+# --------------------------
+# 10. View Calculation History (Regular Users Only)
+# --------------------------
+@bp.route('/history', methods=['GET'])
+@user_required
+def history(current_user):
+    """Newest-first calculations, filtered by workspace_id, status, kind, from and to.
+
+    Pages are ``limit`` long (``after`` takes the previous ``cursor``), ``fields``
+    picks the projection and ``summary=true`` adds aggregate statistics.
+    """
+    maximum = current_app.config['HISTORY_PAGE_LIMIT_MAX']
+    try:
+        query = history_query(str(current_user['_id']), request.args)
+        projection = history_projection(request.args.get('fields'))
+        limit = parse_limit(request.args.get('limit'), current_app.config['HISTORY_PAGE_LIMIT'], maximum)
+        history_list, cursor = page_history(db, query, request.args.get('after'), limit, projection)
+    except ValueError as e:
+        return jsonify({'message': 'Invalid history query', 'error': str(e)}), 400
+    response = {'history': history_list, 'cursor': cursor, 'has_more': cursor is not None}
+    if request.args.get('summary') == 'true':
+        response['summary'] = history_summary(db, query)
+    return jsonify(response), 200
@@ -0,0 +1,208 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+from pymongo.errors import DuplicateKeyError
+
+import services
+from extensions import db
+from utils.auth import admin_required, user_required
+from utils.catalog import (child_folders, create_folder, create_item, delete_folder, find_folder,
+                           item_projection, move_folder, page_items)
+from utils.log import get_logger
+from utils.mongo import to_obj_id
+from utils.motors import search_motors
+from utils.pagination import parse_limit
+
+bp = Blueprint('catalog', __name__, url_prefix='/api')
+log = get_logger('catalog')
+
+# --------------------------
+# 13. View Catalog Items (Regular Users Only)
+# --------------------------
+@bp.route('/catalog', methods=['GET'])
+@user_required
+def view_catalog(current_user):
+    """One page of the items in ``folder_id`` (unfiled items without it).
+
+    ``subtree=1`` includes every subfolder; ``fields`` projects, ``after`` and
+    ``limit`` page through the result.
+    """
+    folder = None
+    if request.args.get('folder_id'):
+        folder = find_folder(db, request.args['folder_id'])
+        if not folder:
+            return jsonify({'message': 'Folder not found'}), 404
+    try:
+        limit = parse_limit(request.args.get('limit'), current_app.config['CATALOG_PAGE_LIMIT'],
+                            current_app.config['CATALOG_PAGE_LIMIT_MAX'])
+        items, next_cursor = page_items(db, folder, request.args.get('subtree') in ('1', 'true'),
+                                        request.args.get('after'), limit,
+                                        item_projection(request.args.get('fields')))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({'catalog': items, 'next_cursor': next_cursor}), 200
+
+@bp.route('/catalog/folders', methods=['GET'])
+@user_required
+def view_catalog_folders(current_user):
+    """Child folders of ``parent_id``, or the top-level folders without it."""
+    parent = None
+    if request.args.get('parent_id'):
+        parent = find_folder(db, request.args['parent_id'])
+        if not parent:
+            return jsonify({'message': 'Folder not found'}), 404
+    return jsonify({'folders': child_folders(db, parent)}), 200
+
+# --------------------------
+# 16. Create Catalog Folder (Admin Only)
+# --------------------------
+@bp.route('/admin/catalog/folder/create', methods=['POST'])
+@admin_required
+def create_catalog_folder(current_user):
+    data = request.get_json()
+    if not data or not data.get('folder_name'):
+        return jsonify({'message': 'Folder name required'}), 400
+    parent = None
+    if data.get('parent_id'):
+        parent = find_folder(db, data['parent_id'])
+        if not parent:
+            return jsonify({'message': 'Parent folder not found'}), 404
+    try:
+        folder = create_folder(db, data['folder_name'], parent)
+    except DuplicateKeyError:
+        return jsonify({'message': 'Folder already exists'}), 400
+    return jsonify({'message': 'Folder created', 'folder_id': folder['_id'], 'folder': folder}), 201
+
+# --------------------------
+# 17. Delete Catalog Folder (Admin Only)
+# --------------------------
+@bp.route('/admin/catalog/folder/delete', methods=['DELETE'])
+@admin_required
+def delete_catalog_folder(current_user):
+    data = request.get_json()
+    if not data or not data.get('folder_id'):
+        return jsonify({'message': 'Folder ID required'}), 400
+    folder = find_folder(db, data['folder_id'])
+    if not folder:
+        return jsonify({'message': 'Folder not found'}), 404
+    folders, items = delete_folder(db, folder)
+    return jsonify({'message': 'Folder deleted', 'folders_deleted': folders, 'items_deleted': items}), 200
+
+# --------------------------
+# 18. Edit Catalog Folder (Admin Only)
+# --------------------------
+@bp.route('/admin/catalog/folder/edit', methods=['PUT'])
+@admin_required
+def edit_catalog_folder(current_user):
+    data = request.get_json()
+    if not data or not data.get('folder_id') or not data.get('new_name'):
+        return jsonify({'message': 'Folder ID and new name required'}), 400
+    oid = to_obj_id(data['folder_id'])
+    if oid is None:
+        return jsonify({'message': 'Invalid folder ID'}), 400
+    try:
+        result = db.catalog_folders.update_one({'_id': oid}, {'$set': {'folder_name': data['new_name']}})
+    except DuplicateKeyError:
+        return jsonify({'message': 'Folder already exists'}), 400
+    if not result.matched_count:
+        return jsonify({'message': 'Folder not found'}), 404
+    return jsonify({'message': 'Folder updated successfully'}), 200
+
+@bp.route('/admin/catalog/folder/move', methods=['PUT'])
+@admin_required
+def move_catalog_folder(current_user):
+    """Move a folder with everything below it under ``parent_id`` (top level if null)."""
+    data = request.get_json()
+    if not data or not data.get('folder_id'):
+        return jsonify({'message': 'Folder ID required'}), 400
+    folder = find_folder(db, data['folder_id'])
+    parent = find_folder(db, data['parent_id']) if data.get('parent_id') else None
+    if not folder or (data.get('parent_id') and not parent):
+        return jsonify({'message': 'Folder not found'}), 404
+    try:
+        folders, items = move_folder(db, folder, parent)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except DuplicateKeyError:
+        return jsonify({'message': 'Target folder already has a folder of that name'}), 400
+    return jsonify({'message': 'Folder moved', 'folders_moved': folders, 'items_moved': items}), 200
+
+@bp.route('/admin/catalog/item/create', methods=['POST'])
+@admin_required
+def create_catalog_item(current_user):
+    data = request.get_json()
+    if not data or not data.get('name'):
+        return jsonify({'message': 'Item name required'}), 400
+    folder = None
+    if data.get('folder_id'):
+        folder = find_folder(db, data['folder_id'])
+        if not folder:
+            return jsonify({'message': 'Folder not found'}), 404
+    fields = {k: v for k, v in data.items() if k not in ('_id', 'folder_id', 'folder_path', 'created_at')}
+    item = create_item(db, fields, folder)
+    return jsonify({'message': 'Item created', 'item': item}), 201
+
+@bp.route('/admin/catalog/item/delete', methods=['DELETE'])
+@admin_required
+def delete_catalog_item(current_user):
+    data = request.get_json()
+    oid = to_obj_id((data or {}).get('item_id'))
+    if not oid:
+        return jsonify({'message': 'Item ID required'}), 400
+    if not db.catalog.delete_one({'_id': oid}).deleted_count:
+        return jsonify({'message': 'Item not found'}), 404
+    return jsonify({'message': 'Item deleted'}), 200
+# --------------------------
+# Reference Data (efficiency, ratio, material and motor catalogs)
+# --------------------------
+def reference_response(name):
+    entry = services.reference.get(name)
+    if entry is None:
+        return jsonify({'message': 'Catalog not found'}), 404
+    body, etag = entry
+    headers = {'Cache-Control': f"public, max-age={current_app.config['REFERENCE_MAX_AGE']}"}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={**headers, 'ETag': f'"{etag}"'})
+    response = Response(body, mimetype='application/json', headers=headers)
+    response.set_etag(etag)
+    return response
+
+@bp.route('/reference/<name>', methods=['GET'])
+def get_reference(name):
+    return reference_response(name)
+
+@bp.route('/get_efficiency', methods=['GET'])
+def get_efficiency():
+    return reference_response('get_efficiency')
+
+@bp.route('/getTransmissionRatios', methods=['GET'])
+def get_transmission_ratios():
+    return reference_response('get_transmission_ratios')
+
+@bp.route('/getEngineData', methods=['GET'])
+def get_engine_data():
+    return reference_response('get_engine_data')
+
+@bp.route('/engines/search', methods=['GET'])
+def search_engines():
+    """Motors with ``cong_suat_kw >= power``, smallest first, then ``van_toc_50Hz`` nearest ``speed``.
+
+    ``power`` is required; ``speed``, ``max_power``, ``tolerance`` (rpm) and
+    ``limit`` are optional. ``source=mongo`` runs the query in the database
+    instead of the in-memory index.
+    """
+    args = request.args
+    try:
+        power = float(args['power'])
+        speed = float(args['speed']) if args.get('speed') else None
+        max_power = float(args['max_power']) if args.get('max_power') else None
+        tolerance = float(args.get('tolerance') or current_app.config['MOTOR_SPEED_TOLERANCE'])
+        limit = parse_limit(args.get('limit'), current_app.config['MOTOR_SEARCH_LIMIT'],
+                            current_app.config['MOTOR_SEARCH_LIMIT_MAX'])
+    except KeyError:
+        return jsonify({'message': 'power is required'}), 400
+    except ValueError:
+        return jsonify({'message': 'power, speed, max_power, tolerance and limit must be numbers'}), 400
+    if args.get('source') == 'mongo':
+        motors = search_motors(db.motors, power, speed, limit, max_power, tolerance)
+    else:
+        motors = services.motor_index.search(power, speed, limit, max_power, tolerance)
+    return jsonify({'success': True, 'engines': motors}), 200
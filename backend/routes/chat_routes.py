@@ -0,0 +1,277 @@
+import datetime
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from extensions import db
+from services import chat_hub, workspace_members
+from utils.auth import admin_required, stream_token_required, stream_user_required, user_required
+from utils.chat import chat_event, load_messages, page_messages
+from utils.log import get_logger
+from utils.mongo import to_obj_id
+from utils.pagination import parse_limit
+from utils.pubsub import direct_channel, sse_events, workspace_channel
+
+bp = Blueprint('chat', __name__, url_prefix='/api')
+log = get_logger('chat')
+
+# --------------------------
+# 11. Chat – Direct Messaging (Regular Users Only)
+#    Chat is defined by user (direct message) rather than by workspace.
+# --------------------------
+@bp.route('/chat/send', methods=['POST'])
+@user_required
+def send_chat(current_user):
+    data = request.get_json()
+    # For non-admin users, override receiver_id to 'admin' if not provided
+    if current_user.get('role') != 'admin':
+        data['receiver_id'] = 'admin'
+    if not data or not data.get('receiver_id') or not data.get('message'):
+        return jsonify({'message': 'Receiver and message required'}), 400
+    chat_msg = {
+        'sender': str(current_user['_id']),
+        'receiver': data['receiver_id'],
+        'message': data['message'],
+        'timestamp': datetime.datetime.utcnow()
+    }
+    db.chats.insert_one(chat_msg)
+    # Only regular users get here, so the conversation is the sender's
+    chat_hub.publish(direct_channel(chat_msg['sender']), chat_event(chat_msg, current_user.get('email')))
+    return jsonify({'message': 'Message sent'}), 200
+
+def load_chat_messages(query, sort=1, fields=('sender',)):
+    return load_messages(db, query, sort, fields, use_lookup=current_app.config['CHAT_ENRICH_LOOKUP'])
+
+def chat_page_response(query, fields=('sender',)):
+    """Serve one page of a conversation, honouring `since`, `before` and `limit`."""
+    since = request.args.get('since')
+    before = request.args.get('before')
+    maximum = current_app.config['CHAT_PAGE_LIMIT_MAX']
+    try:
+        # Incremental polls are always bounded; a plain request keeps returning full history
+        limit = parse_limit(request.args.get('limit'), maximum if since else None, maximum)
+        messages, page = page_messages(db, query, since, before, limit, fields,
+                                       use_lookup=current_app.config['CHAT_ENRICH_LOOKUP'])
+    except ValueError:
+        return jsonify({'message': 'Invalid cursor or limit'}), 400
+    return jsonify({'messages': messages, **page}), 200
+
+@bp.route('/chat/admin', methods=['GET'])
+@admin_required
+def get_all_user_chats(current_user):
+    messages = load_chat_messages({
+        '$or': [
+            {'receiver': 'admin'},
+            {'sender': 'admin'}
+        ]
+    })
+    return jsonify({'messages': messages}), 200
+
+@bp.route('/chat/<other_user_id>', methods=['GET'])
+@user_required
+def get_chat(current_user, other_user_id):
+    return chat_page_response({
+        '$or': [
+            {'sender': str(current_user['_id']), 'receiver': other_user_id},
+            {'sender': other_user_id, 'receiver': str(current_user['_id'])}
+        ]
+    }, fields=('sender', 'receiver'))
+@bp.route('/chat/admin/direct/send', methods=['POST'])
+@admin_required
+def admin_send_direct_chats(current_user):
+    data = request.get_json()
+    if not data or not data.get('receiver_id') or not data.get('message'):
+        return jsonify({'message': 'Receiver and message required'}), 400
+
+    # Set sender explicitly to "admin" for clarity in the direct chat fetch
+    chat_msg = {
+        'chat_type': 'direct',
+        'sender': 'admin',  # Use a literal string "admin" here
+        'receiver': data['receiver_id'],
+        'message': data['message'],
+        'timestamp': datetime.datetime.utcnow()
+    }
+    db.chats.insert_one(chat_msg)
+    chat_hub.publish(direct_channel(data['receiver_id']), chat_event(chat_msg, 'admin'))
+    return jsonify({'message': 'Direct reply sent from admin'}), 200
+
+
+@bp.route('/chat/direct/send', methods=['POST'])
+@user_required
+def send_direct_chat(current_user):
+    data = request.get_json()
+    if not data or not data.get('message'):
+        return jsonify({'message': 'Message required'}), 400
+
+    # For non-admin users, force the receiver to be 'admin'
+    if current_user.get('role') != 'admin':
+        receiver_id = 'admin'
+    else:
+        # For admin users, require a receiver_id (the user to chat with)
+        if not data.get('receiver_id'):
+            return jsonify({'message': 'Receiver id required for admin'}), 400
+        receiver_id = data.get('receiver_id')
+
+    chat_msg = {
+        'chat_type': 'direct',
+        'sender': str(current_user['_id']),
+        'receiver': receiver_id,
+        'message': data['message'],
+        'timestamp': datetime.datetime.utcnow()
+    }
+    db.chats.insert_one(chat_msg)
+    conversation = receiver_id if current_user.get('role') == 'admin' else chat_msg['sender']
+    chat_hub.publish(direct_channel(conversation), chat_event(chat_msg, current_user.get('email')))
+    return jsonify({'message': 'Direct message sent'}), 200
+
+
+# New route for admin to send direct replies to users
+@bp.route('/admin/chats', methods=['POST'])
+@admin_required
+def admin_send_direct_chat(current_user):
+    data = request.get_json()
+    if not data or not data.get('receiver_id') or not data.get('message'):
+        return jsonify({'message': 'Receiver and message required'}), 400
+    chat_msg = {
+        'chat_type': 'direct',
+        'sender': str(current_user['_id']),
+        'receiver': data['receiver_id'],
+        'message': data['message'],
+        'timestamp': datetime.datetime.utcnow()
+    }
+    db.chats.insert_one(chat_msg)
+    chat_hub.publish(direct_channel(data['receiver_id']), chat_event(chat_msg, current_user.get('email')))
+    return jsonify({'message': 'Direct reply sent from admin'}), 200
+@bp.route('/admin/chats', methods=['GET'])
+@admin_required
+def get_admin_chats(current_user):
+    # Retrieve all direct chats (or filter as needed)
+    messages = load_chat_messages({'chat_type': 'direct'}, sort=-1)
+    return jsonify({'chats': messages}), 200
+
+@bp.route('/chat/direct', methods=['GET'])
+@user_required
+def get_direct_chat(current_user):
+    # If not admin, always retrieve the conversation with admin
+    if current_user.get('role') != 'admin':
+        query = {
+            'chat_type': 'direct',
+            '$or': [
+                {'sender': str(current_user['_id']), 'receiver': 'admin'},
+                {'sender': 'admin', 'receiver': str(current_user['_id'])}
+            ]
+        }
+    else:
+        # For admin, require a user_id query parameter
+        other_user_id = request.args.get('user_id')
+        if not other_user_id:
+            return jsonify({'message': 'user_id query parameter required for admin'}), 400
+        query = {
+            'chat_type': 'direct',
+            '$or': [
+                {'sender': str(current_user['_id']), 'receiver': other_user_id},
+                {'sender': other_user_id, 'receiver': str(current_user['_id'])}
+            ]
+        }
+    return chat_page_response(query)
+
+def chat_stream_response(channel):
+    """Hold the connection open and push new messages on `channel` as Server-Sent Events."""
+    sub = chat_hub.subscribe(channel)
+
+    def generate():
+        try:
+            yield from sse_events(sub, heartbeat=current_app.config['CHAT_STREAM_HEARTBEAT'])
+        finally:
+            chat_hub.unsubscribe(sub)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/chat/direct/stream', methods=['GET'])
+@stream_token_required
+def stream_direct_chat(current_user):
+    """A user's conversation with the admins; admins pick the user with ``user_id``."""
+    if current_user.get('role') != 'admin':
+        return chat_stream_response(direct_channel(str(current_user['_id'])))
+    other_user_id = request.args.get('user_id')
+    if not other_user_id:
+        return jsonify({'message': 'user_id query parameter required for admin'}), 400
+    return chat_stream_response(direct_channel(other_user_id))
+
+# --------------------------
+# 12. Chat – Submit Proposal for Design Changes (Regular Users Only)
+# --------------------------
+@bp.route('/chat/propose', methods=['POST'])
+@user_required
+def propose_design(current_user):
+    data = request.get_json()
+    if not data or not data.get('proposal'):
+        return jsonify({'message': 'Proposal required'}), 400
+    # Optionally, you could include a receiver_id if proposals are meant for a specific admin/user
+    proposal = {
+        'sender': str(current_user['_id']),
+        'proposal': data['proposal'],
+        'status': 'pending',
+        'timestamp': datetime.datetime.utcnow()
+    }
+    db.proposals.insert_one(proposal)
+    log.info('Proposal %s submitted by %s', proposal['_id'], current_user['_id'])
+    return jsonify({'message': 'Proposal submitted'}), 200
+
+# Endpoints for admin to approve or reject proposals remain unchanged
+@bp.route('/chat/proposals', methods=['GET'])
+@admin_required
+def get_proposals(current_user):
+    proposals = db.proposals.find({'status': 'pending'}).sort('timestamp', 1)
+    return jsonify({'proposals': proposals}), 200
+
+@bp.route('/chat/proposals/<proposal_id>/approve', methods=['POST'])
+@admin_required
+def approve_proposal(current_user, proposal_id):
+    db.proposals.update_one({'_id': proposal_id}, {'$set': {'status': 'approved'}})
+    return jsonify({'message': 'Proposal approved'}), 200
+
+@bp.route('/chat/proposals/<proposal_id>/reject', methods=['POST'])
+@admin_required
+def reject_proposal(current_user, proposal_id):
+    db.proposals.update_one({'_id': proposal_id}, {'$set': {'status': 'rejected'}})
+    return jsonify({'message': 'Proposal rejected'}), 200
+# Direct Chat – Send Message (for direct messaging between two users)
+# For regular users sending direct messages to admin
+
+# Workspace Chat – Send Message (for all members in a workspace)
+@bp.route('/workspace/chat/send', methods=['POST'])
+@user_required
+def send_workspace_chat(current_user):
+    data = request.get_json()
+    if not data or not data.get('workspace_id') or not data.get('message'):
+        return jsonify({'message': 'Workspace and message required'}), 400
+    chat_msg = {
+        'chat_type': 'workspace',
+        'workspace_id': data['workspace_id'],
+        'sender': str(current_user['_id']),
+        'message': data['message'],
+        'timestamp': datetime.datetime.utcnow()
+    }
+    db.chats.insert_one(chat_msg)
+    chat_hub.publish(workspace_channel(data['workspace_id']), chat_event(chat_msg, current_user.get('email')))
+    return jsonify({'message': 'Workspace chat message sent'}), 200
+
+# Workspace Chat – Retrieve Messages for a workspace
+@bp.route('/workspace/chat/<workspace_id>', methods=['GET'])
+@user_required
+def get_workspace_chat(current_user, workspace_id):
+    return chat_page_response({
+        'chat_type': 'workspace',
+        'workspace_id': workspace_id
+    })
+
+@bp.route('/workspace/chat/<workspace_id>/stream', methods=['GET'])
+@stream_user_required
+def stream_workspace_chat(current_user, workspace_id):
+    oid = to_obj_id(workspace_id)
+    if not oid:
+        return jsonify({'message': 'Invalid workspace ID'}), 400
+    if not workspace_members().is_member(oid, str(current_user['_id'])):
+        return jsonify({'message': 'Access denied'}), 403
+    return chat_stream_response(workspace_channel(workspace_id))
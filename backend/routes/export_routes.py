@@ -0,0 +1,90 @@
+import itertools
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+import engine
+import services
+from extensions import db
+from services import calculation_report, report_renderer, workspace_members
+from utils.auth import user_required
+from utils.export import render_unordered, stream_zip
+from utils.history import find_calculation
+from utils.mongo import to_obj_id
+
+bp = Blueprint('export', __name__, url_prefix='/api')
+
+# --------------------------
+# 9. Export to PDF (Regular Users Only)
+# --------------------------
+@bp.route('/export_pdf', methods=['GET'])
+@user_required
+def export_pdf(current_user):
+    calc_id = request.args.get('calc_id')
+    if not calc_id:
+        return jsonify({'message': 'Calculation ID required'}), 400
+    calculation = find_calculation(db, calc_id, str(current_user['_id']))
+    if not calculation:
+        return jsonify({'message': 'Calculation not found'}), 404
+    if calculation.get('status', 'completed') != 'completed':
+        return jsonify({'message': f"Calculation is {calculation.get('status')}"}), 409
+
+    key = (calc_id, engine.ENGINE_VERSION)
+    etag = '-'.join(key)
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    data = services.pdf_cache.get(key)
+    if data is None:
+        report = None if calculation.get('kind') == 'sweep' else calculation_report(calculation)
+        data = report_renderer().render(calculation, report)
+        services.pdf_cache.set(key, data)
+    from utils.report import iter_chunks
+
+    response = Response(iter_chunks(data), mimetype='application/pdf', headers={
+        'Content-Disposition': 'attachment; filename=calculation.pdf',
+        'Content-Length': str(len(data)),
+    })
+    response.set_etag(etag)
+    return response
+
+def export_tasks(cursor, batch_size, font_path):
+    """``(name, date_time, args)`` render tasks, or cached PDF bytes, per calculation."""
+    while True:
+        batch = list(itertools.islice(cursor, batch_size))
+        if not batch:
+            return
+        reports = services.calc_cache.load_many([c['result_key'] for c in batch
+                                                 if c.get('result_key') and c.get('kind') != 'sweep'])
+        for calculation in batch:
+            calc_id = str(calculation['_id'])
+            created = calculation.get('created_at') or calculation['_id'].generation_time
+            name = f"{created:%Y%m%d-%H%M%S}-{calculation.get('kind', 'design')}-{calc_id}.pdf"
+            data = services.pdf_cache.get((calc_id, engine.ENGINE_VERSION))
+            if data is not None:
+                yield name, created.timetuple()[:6], data
+                continue
+            report = None
+            if calculation.get('kind') != 'sweep':
+                report = reports.get(calculation.get('result_key')) or calculation_report(calculation)
+            yield name, created.timetuple()[:6], (font_path, calculation, report)
+
+@bp.route('/workspace/<workspace_id>/export', methods=['GET'])
+@user_required
+def export_workspace(current_user, workspace_id):
+    oid = to_obj_id(workspace_id)
+    if not oid:
+        return jsonify({'message': 'Invalid workspace ID'}), 400
+    if not workspace_members().is_member(oid, str(current_user['_id'])):
+        return jsonify({'message': 'Access denied'}), 403
+
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    cursor = db.calculations.find({'workspace_id': workspace_id, 'status': 'completed'},
+                                  batch_size=batch_size)
+    tasks = export_tasks(cursor, batch_size, current_app.config['PDF_FONT_PATH'])
+    # Imported here so workers that never export skip loading fpdf
+    from utils.report import render_pdf
+
+    entries = render_unordered(services.calc_jobs.processes, tasks, render_pdf,
+                               current_app.config['EXPORT_WINDOW'])
+    return Response(stream_with_context(stream_zip(entries)), mimetype='application/zip', headers={
+        'Content-Disposition': f'attachment; filename=workspace-{workspace_id}.zip',
+    })
@@ -0,0 +1,176 @@
+import datetime
+
+from flask import Blueprint, current_app, jsonify, request
+
+import services
+from extensions import db
+from services import workspace_members
+from utils.auth import user_required
+from utils.codes import CodeSpaceExhausted
+from utils.log import get_logger
+from utils.mongo import to_obj_id
+from utils.pagination import parse_limit
+from utils.workspaces import page_workspaces
+
+bp = Blueprint('workspace', __name__, url_prefix='/api')
+log = get_logger('workspace')
+
+# --------------------------
+# 4. Create Workspace (Regular Users Only)
+# --------------------------
+@bp.route('/workspace/create', methods=['POST'])
+@user_required
+def create_workspace(current_user):
+    data = request.get_json()
+    workspace = {
+        'name': data.get('name', 'Untitled Workspace'),
+        'owner': str(current_user['_id']),
+        'created_at': datetime.datetime.utcnow()
+    }
+    members = workspace_members()
+    try:
+        # The code is drawn at insert time and retried until the unique index accepts it
+        workspace['_id'] = members.create(workspace, str(current_user['_id']),
+                                          lambda doc: services.workspace_codes.insert(db.workspaces, doc))
+    except CodeSpaceExhausted:
+        return jsonify({'message': 'Could not allocate a workspace code, please retry'}), 503
+    log.info('Workspace %s created by %s', workspace['_id'], current_user['_id'])
+    members.attach([workspace])
+    return jsonify({'message': 'Workspace created', 'workspace': workspace}), 201
+
+# --------------------------
+# 5. Join Workspace by Code (Regular Users Only)
+# --------------------------
+@bp.route('/workspace/join', methods=['POST'])
+@user_required
+def join_workspace(current_user):
+    data = request.get_json()
+    if not data or not data.get('code'):
+        return jsonify({'message': 'Workspace code is required'}), 400
+
+    workspace = db.workspaces.find_one({'code': str(data['code']).strip()}, {'members': 0})
+    if not workspace:
+        log.debug('No workspace with code %s', data['code'])
+        return jsonify({'message': 'Workspace not found'}), 404
+
+    members = workspace_members()
+    if not members.add(workspace['_id'], str(current_user['_id'])):
+        log.debug('User %s already in workspace %s', current_user['_id'], workspace['_id'])
+        return jsonify({'message': 'Already a member'}), 400
+
+    log.info('User %s joined workspace %s', current_user['_id'], workspace['_id'])
+    members.attach([workspace])
+    return jsonify({'message': 'Joined workspace successfully', 'workspace': workspace}), 200
+
+# --------------------------
+# 6. Leave Workspace (Regular Users Only)
+# --------------------------
+@bp.route('/workspace/leave', methods=['POST'])
+@user_required
+def leave_workspace(current_user):
+    data = request.get_json()
+    if not data or not data.get('workspace_id'):
+        return jsonify({'message': 'Workspace ID required'}), 400
+
+    workspace_id = to_obj_id(data['workspace_id'])
+    workspace = db.workspaces.find_one({'_id': workspace_id}, {'owner': 1}) if workspace_id else None
+    if not workspace:
+        log.debug('No workspace %s to leave', data['workspace_id'])
+        return jsonify({'message': 'Workspace not found'}), 404
+
+    if workspace.get('owner') == str(current_user['_id']):
+        return jsonify({'message': 'Owner cannot leave workspace. Consider deleting it or transferring ownership.'}), 400
+
+    if not workspace_members().remove(workspace_id, str(current_user['_id'])):
+        return jsonify({'message': 'Not a member of this workspace'}), 400
+    log.info('User %s left workspace %s', current_user['_id'], workspace_id)
+    return jsonify({'message': 'Left workspace successfully'}), 200
+
+# --------------------------
+# 7. Delete Workspace (Only Owner can delete)
+# --------------------------
+@bp.route('/workspace/delete', methods=['DELETE'])
+@user_required
+def delete_workspace(current_user):
+    data = request.get_json()
+    if not data or not data.get('workspace_id'):
+        return jsonify({'message': 'Workspace ID required'}), 400
+
+    workspace_id = to_obj_id(data['workspace_id'])
+    workspace = db.workspaces.find_one({'_id': workspace_id}, {'owner': 1}) if workspace_id else None
+    if not workspace:
+        log.debug('No workspace %s to delete', data['workspace_id'])
+        return jsonify({'message': 'Workspace not found'}), 404
+
+    if workspace.get('owner') != str(current_user['_id']):
+        return jsonify({'message': 'Only owner can delete the workspace'}), 403
+
+    db.workspaces.delete_one({'_id': workspace_id})
+    workspace_members().delete_workspace(workspace_id)
+    db.calculations.delete_many({'workspace_id': data['workspace_id']})
+    db.chats.delete_many({'chat_type': 'workspace', 'workspace_id': data['workspace_id']})
+    log.info('Workspace %s deleted by %s', workspace_id, current_user['_id'])
+    return jsonify({'message': 'Workspace deleted successfully'}), 200
+
+# --------------------------
+# 8. List Workspaces Joined by the User
+# --------------------------
+@bp.route('/workspace/list', methods=['GET'])
+@user_required
+def list_workspaces(current_user):
+    maximum = current_app.config['WORKSPACE_PAGE_LIMIT_MAX']
+    after = request.args.get('after')
+    try:
+        # Clients that do not page (the workspace screens) keep getting the full list
+        default = current_app.config['WORKSPACE_PAGE_LIMIT'] if after else None
+        limit = parse_limit(request.args.get('limit'), default, maximum)
+        workspaces, cursor = page_workspaces(db, workspace_members(), str(current_user['_id']), after, limit)
+    except ValueError:
+        return jsonify({'message': 'Invalid cursor or limit'}), 400
+    return jsonify({'workspaces': workspaces, 'cursor': cursor, 'has_more': cursor is not None}), 200
+
+@bp.route('/workspace/detail/<code>', methods=['GET'])
+@user_required
+def workspace_detail(current_user, code):
+    ws = db.workspaces.find_one({'code': code})
+    if not ws:
+        return jsonify({'message': 'Workspace not found'}), 404
+
+    members = workspace_members()
+    if not members.is_member(ws['_id'], str(current_user['_id'])):
+        return jsonify({'message': 'Access denied'}), 403
+
+    members.attach([ws])
+    return jsonify({'workspace': ws}), 200
+
+@bp.route('/workspace/kick', methods=['POST'])
+@user_required
+def kick_member(current_user):
+    data = request.get_json()
+    workspace_id = data.get('workspace_id')
+    member_id = data.get('member_id')
+
+    if not workspace_id or not member_id:
+        return jsonify({'message': 'workspace_id and member_id are required'}), 400
+
+    workspace_id = to_obj_id(workspace_id)
+    if not workspace_id:
+        return jsonify({'message': 'Invalid workspace ID'}), 400
+    workspace = db.workspaces.find_one({'_id': workspace_id}, {'owner': 1})
+
+    if not workspace:
+        return jsonify({'message': 'Workspace not found'}), 404
+
+    # Only the owner can kick members.
+    if workspace.get('owner') != str(current_user['_id']):
+        return jsonify({'message': 'Only the workspace owner can kick members'}), 403
+
+    # Prevent the owner from being kicked.
+    if member_id == workspace.get('owner'):
+        return jsonify({'message': 'Owner cannot be kicked'}), 400
+
+    # Remove the member; this also tells us whether they were one.
+    if not workspace_members().remove(workspace_id, member_id):
+        return jsonify({'message': 'Member not found in workspace'}), 404
+
+    return jsonify({'message': 'Member kicked successfully'}), 200
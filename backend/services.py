@@ -0,0 +1,104 @@
+"""Per-process objects the blueprints share.
+
+:func:`init_services` (called by ``create_app``) builds the caches, the
+catalog and motor indexes and the job queue from the app config, and
+rebinds them here; routes therefore reach them as ``services.<name>``
+rather than importing the objects themselves.
+"""
+import threading
+
+from flask import current_app
+
+import engine
+from extensions import db, mongo
+from utils.cache import TTLCache
+from utils.calc_cache import CalculationCache
+from utils.codes import CodeAllocator
+from utils.jobs import JobQueue
+from utils.metrics import RequestMetrics
+from utils.motors import MotorIndex
+from utils.pubsub import ChatHub, MongoBackplane
+from utils.reference import ReferenceData, legacy_efficiency, legacy_engines, legacy_transmission
+from utils.revocations import RevocationList
+from utils.workspaces import ArrayMembers, CollectionMembers
+
+# Per-endpoint latency, size and Mongo round trips, served at /metrics
+request_metrics = RequestMetrics()
+# Fan-out hub for pushing new chat messages to connected clients
+chat_hub = ChatHub()
+
+user_cache = revocations = calc_cache = reference = motor_index = None
+workspace_codes = calc_jobs = pdf_cache = None
+
+
+def sync_catalog_version(version):
+    # Cached reports were computed against the previous catalogs
+    if calc_cache.catalog_version != version:
+        calc_cache.invalidate(version)
+
+
+def init_services(config):
+    """Build this process's caches, indexes and job queue, sized by ``config``."""
+    global user_cache, revocations, calc_cache, reference, motor_index, workspace_codes
+    global calc_jobs, pdf_cache
+    user_cache = TTLCache(config['USER_CACHE_SIZE'], config['USER_CACHE_TTL'])
+    # Users deleted or re-roled by any process; older tokens' role claims are not trusted, and
+    # this process's cached copy of the user is dropped as soon as the revocation is pulled
+    revocations = RevocationList(mongo.collection('revoked_tokens'), config['JWT_EXPIRATION_HOURS'] * 3600,
+                                 config['JWT_REVOCATION_CHECK_INTERVAL'], on_revoke=user_cache.pop)
+    # Engine reports keyed by a hash of their inputs, shared by every identical calculation;
+    # the catalog version in the key follows the reference catalogs in Mongo
+    calc_cache = CalculationCache(mongo.collection('calc_results'), engine.ENGINE_VERSION,
+                                  config['CALC_CACHE_SIZE'], config['CALC_CACHE_TTL'],
+                                  refresh=lambda: reference.current_version())
+    # Reference catalogs, pre-serialized; a new version resets the calculation cache in every process
+    reference = ReferenceData(mongo.collection('reference_data'),
+                              check_interval=config['REFERENCE_CHECK_INTERVAL'],
+                              on_reload=sync_catalog_version)
+    reference.add_view('get_efficiency', 'efficiency', legacy_efficiency)
+    reference.add_view('get_transmission_ratios', 'transmission', legacy_transmission)
+    reference.add_view('get_engine_data', 'engines', legacy_engines)
+    # Sorted in-memory copy of the motor catalog for /api/engines/search
+    motor_index = MotorIndex(db, config['MOTOR_INDEX_CHECK_INTERVAL'])
+    workspace_codes = CodeAllocator(config['WORKSPACE_CODE_LENGTH'])
+    calc_jobs = JobQueue(config['CALC_JOB_WORKERS'], config['CALC_JOB_PER_USER'])
+    # Rendered reports keyed by (calc_id, engine version); calculations never change once completed
+    pdf_cache = TTLCache(config['PDF_CACHE_SIZE'], config['PDF_CACHE_TTL'])
+
+
+_report_renderer = None
+_report_renderer_lock = threading.Lock()
+
+
+def report_renderer():
+    global _report_renderer
+    with _report_renderer_lock:
+        if _report_renderer is None:
+            # fpdf and fontTools take longer to import than the rest of the app together
+            from utils.report import ReportRenderer
+
+            _report_renderer = ReportRenderer(current_app.config['PDF_FONT_PATH'])
+        return _report_renderer
+
+
+def calculation_report(calculation):
+    """Full engine report of a stored calculation, recomputed if its blob expired."""
+    if calculation.get('steps') is not None:
+        # Stored before results were shared
+        return {'engine_version': calculation.get('engine_version'),
+                'summary': calculation.get('result'), 'steps': calculation['steps']}
+    if not calculation.get('result_key'):
+        # Placeholder results from before the engine existed
+        return {'engine_version': None, 'summary': calculation.get('result'), 'steps': []}
+    return calc_cache.get_or_compute(calculation['parameters'], engine.run)[1]
+
+
+def workspace_members():
+    if current_app.config['WORKSPACE_MEMBERS_COLLECTION']:
+        return CollectionMembers(db)
+    return ArrayMembers(db)
+
+
+def attach_chat_backplane(config):
+    if config['CHAT_BACKPLANE'] == 'mongo':
+        chat_hub.attach(MongoBackplane(db.chat_events))
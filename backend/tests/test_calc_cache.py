@@ -0,0 +1,97 @@
+"""The two-tier calculation cache and its invalidation by catalog version."""
+import pytest
+
+from utils.calc_cache import CalculationCache, cache_key
+from utils.reference import ReferenceData
+
+mongomock = pytest.importorskip('mongomock')
+
+PARAMS = {'P': 5.5, 'n': 40, 'L': 5, 'HB1': 260, 'HB2': 240}
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().db
+
+
+class Engine:
+    """``compute`` stand-in that counts its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, params):
+        self.calls += 1
+        return {'P_ct': params['P'] * 1.28}
+
+
+def test_cache_key_is_canonical():
+    key = cache_key(PARAMS, 'e1', 0)
+    assert cache_key(dict(reversed(list(PARAMS.items()))), 'e1', 0) == key
+    assert cache_key({**PARAMS, 'n': 40.0}, 'e1', 0) == key
+    assert cache_key({'x': -0.0}, 'e1', 0) == cache_key({'x': 0}, 'e1', 0)
+    assert cache_key({**PARAMS, 'n': 41}, 'e1', 0) != key
+    assert cache_key(PARAMS, 'e2', 0) != key
+    assert cache_key(PARAMS, 'e1', 1) != key
+
+
+def test_tiers(db):
+    engine = Engine()
+    cache = CalculationCache(db.calc_results, 'e1')
+    key, report, source = cache.get_or_compute(PARAMS, engine)
+    assert source == 'computed' and report == {'P_ct': pytest.approx(7.04)}
+    assert cache.get_or_compute(PARAMS, engine)[2] == 'memory'
+    # Another process sharing the collection finds the persisted report
+    other = CalculationCache(db.calc_results, 'e1')
+    assert other.get_or_compute(PARAMS, engine) == (key, report, 'persistent')
+    assert other.get_or_compute(PARAMS, engine)[2] == 'memory'
+    assert engine.calls == 1
+    assert cache.stats()['computed'] == 1 and other.stats()['persistent_hits'] == 1
+
+
+def test_load_many_does_not_promote(db):
+    cache = CalculationCache(db.calc_results, 'e1')
+    hot = cache.get_or_compute(PARAMS, Engine())[0]
+    cold = CalculationCache(db.calc_results, 'e1').get_or_compute({**PARAMS, 'P': 7.5}, Engine())[0]
+    found = cache.load_many([hot, cold, hot, 'missing'])
+    assert set(found) == {hot, cold}
+    assert cold not in cache.memory and len(cache.memory) == 1
+
+
+def test_invalidate_drops_older_versions(db):
+    engine = Engine()
+    cache = CalculationCache(db.calc_results, 'e1')
+    old_key = cache.get_or_compute(PARAMS, engine)[0]
+    assert cache.invalidate(1) == 1
+    assert len(cache.memory) == 0 and db.calc_results.count_documents({}) == 0
+    new_key, _, source = cache.get_or_compute(PARAMS, engine)
+    assert source == 'computed' and new_key != old_key and engine.calls == 2
+    # Invalidating again at the same version keeps the current entries
+    assert cache.invalidate(1) == 0
+    assert db.calc_results.count_documents({'catalog_version': 1}) == 1
+
+
+def process(db):
+    """A cache and reference catalogs wired together the way ``services`` does it."""
+    def sync(version):
+        if cache.catalog_version != version:
+            cache.invalidate(version)
+    reference = ReferenceData(db.reference_data, check_interval=0, on_reload=sync)
+    cache = CalculationCache(db.calc_results, 'e1', refresh=reference.current_version)
+    return reference, cache
+
+
+def test_bump_reaches_other_processes(db):
+    engine = Engine()
+    ref_a, cache_a = process(db)
+    ref_b, cache_b = process(db)
+    cache_a.get_or_compute(PARAMS, engine)
+    assert cache_b.get_or_compute(PARAMS, engine)[2] == 'persistent'
+    version = ref_a.bump()
+    assert cache_a.catalog_version == version
+    # Process B picks the new version up on its next lookup and recomputes
+    key, _, source = cache_b.get_or_compute(PARAMS, engine)
+    assert source == 'computed' and cache_b.catalog_version == version
+    assert key == cache_key(PARAMS, 'e1', version)
+    assert cache_a.get_or_compute(PARAMS, engine)[2] == 'persistent'
+    assert engine.calls == 2
@@ -0,0 +1,106 @@
+"""Catalog folder tree: materialized paths through create, move, delete and listing."""
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from indexes import ensure_indexes
+from utils.catalog import (ROOT, backfill_paths, child_folders, create_folder, create_item,
+                           delete_folder, find_folder, move_folder, page_items, under)
+
+mongomock = pytest.importorskip('mongomock')
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    ensure_indexes(db)
+    return db
+
+
+@pytest.fixture
+def tree(db):
+    """a/b/c and d, with one item in each folder and one unfiled."""
+    a = create_folder(db, 'a')
+    b = create_folder(db, 'b', a)
+    c = create_folder(db, 'c', b)
+    d = create_folder(db, 'd')
+    folders = {'a': a, 'b': b, 'c': c, 'd': d}
+    for name, folder in folders.items():
+        create_item(db, {'name': f'item-{name}'}, folder)
+    create_item(db, {'name': 'unfiled'})
+    return folders
+
+
+def path_of(db, folder):
+    return db.catalog_folders.find_one({'_id': folder['_id']})['path']
+
+
+def item_names(items):
+    return sorted(item['name'] for item in items)
+
+
+def test_paths(db, tree):
+    a, b, c = tree['a'], tree['b'], tree['c']
+    assert c['path'] == f",{a['_id']},{b['_id']},{c['_id']},"
+    assert db.catalog.find_one({'name': 'item-c'})['folder_path'] == c['path']
+    assert db.catalog.find_one({'name': 'unfiled'})['folder_path'] == ROOT
+    assert under(a['path'])['$regex'].startswith('^')
+    assert [f['folder_name'] for f in child_folders(db)] == ['a', 'd']
+    assert find_folder(db, str(b['_id']))['path'] == b['path']
+    assert find_folder(db, 'not-an-id') is None
+
+
+def test_sibling_names_are_unique(db, tree):
+    with pytest.raises(DuplicateKeyError):
+        create_folder(db, 'b', tree['a'])
+    create_folder(db, 'b', tree['d'])
+
+
+def test_page_items(db, tree):
+    assert item_names(page_items(db)[0]) == ['unfiled']
+    assert item_names(page_items(db, tree['a'])[0]) == ['item-a']
+    assert item_names(page_items(db, tree['a'], subtree=True)[0]) == ['item-a', 'item-b', 'item-c']
+    first, cursor = page_items(db, tree['a'], subtree=True, limit=2)
+    rest, end = page_items(db, tree['a'], subtree=True, after=cursor, limit=2)
+    assert item_names(first + rest) == ['item-a', 'item-b', 'item-c'] and end is None
+
+
+def test_move_rewrites_the_subtree(db, tree):
+    b, c, d = tree['b'], tree['c'], tree['d']
+    assert move_folder(db, b, d) == (2, 2)
+    new_b = f"{d['path']}{b['_id']},"
+    assert path_of(db, b) == new_b and path_of(db, c) == f"{new_b}{c['_id']},"
+    assert db.catalog_folders.find_one({'_id': b['_id']})['parent_id'] == d['_id']
+    assert db.catalog.find_one({'name': 'item-c'})['folder_path'] == path_of(db, c)
+    assert item_names(page_items(db, d, subtree=True)[0]) == ['item-b', 'item-c', 'item-d']
+    assert item_names(page_items(db, tree['a'], subtree=True)[0]) == ['item-a']
+
+
+def test_move_to_root_and_back_in_place(db, tree):
+    b = tree['b']
+    assert move_folder(db, b) == (2, 2)
+    assert path_of(db, b) == f",{b['_id']},"
+    assert db.catalog_folders.find_one({'_id': b['_id']})['parent_id'] is None
+    assert move_folder(db, find_folder(db, b['_id'])) == (0, 0)
+
+
+@pytest.mark.parametrize('target', ['a', 'c'])
+def test_move_into_itself(db, tree, target):
+    with pytest.raises(ValueError):
+        move_folder(db, tree['a'], tree[target])
+    assert path_of(db, tree['a']) == tree['a']['path']
+
+
+def test_delete_removes_the_subtree(db, tree):
+    assert delete_folder(db, tree['b']) == (2, 2)
+    assert sorted(f['folder_name'] for f in db.catalog_folders.find()) == ['a', 'd']
+    assert item_names(db.catalog.find()) == ['item-a', 'item-d', 'unfiled']
+
+
+def test_backfill_paths(db):
+    db.catalog_folders.insert_one({'folder_name': 'old'})
+    db.catalog.insert_one({'name': 'old item'})
+    assert backfill_paths(db) == (1, 1)
+    folder = db.catalog_folders.find_one()
+    assert folder['path'] == f",{folder['_id']}," and folder['parent_id'] is None
+    assert item_names(page_items(db)[0]) == ['old item']
+    assert backfill_paths(db) == (0, 0)
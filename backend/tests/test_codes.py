@@ -0,0 +1,84 @@
+"""Join-code allocation: retries on a taken code, and nothing else."""
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from utils.codes import CodeAllocator, CodeSpaceExhausted
+
+
+class InsertResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class Collection:
+    """Just enough of a collection with unique indexes on ``unique`` fields."""
+
+    def __init__(self, taken=(), unique=('code',)):
+        self.docs = [{'code': code} for code in taken]
+        self.unique = unique
+        self.inserts = 0
+
+    def insert_one(self, doc):
+        self.inserts += 1
+        for field in self.unique:
+            if any(d.get(field) == doc.get(field) for d in self.docs):
+                raise DuplicateKeyError(f'duplicate {field}', 11000, {'keyPattern': {field: 1}})
+        self.docs.append(dict(doc, _id=len(self.docs)))
+        return InsertResult(len(self.docs) - 1)
+
+
+def scripted(allocator, codes):
+    codes = iter(codes)
+    allocator.generate = lambda: next(codes)
+    return allocator
+
+
+def test_generate():
+    allocator = CodeAllocator(8, 'ab')
+    codes = {allocator.generate() for _ in range(50)}
+    assert all(len(code) == 8 and set(code) <= {'a', 'b'} for code in codes)
+    assert allocator.capacity == 256
+
+
+@pytest.mark.parametrize('length, alphabet', [(0, '0123456789'), (6, '7')])
+def test_rejects_empty_code_space(length, alphabet):
+    with pytest.raises(ValueError):
+        CodeAllocator(length, alphabet)
+
+
+def test_retries_taken_codes():
+    collection = Collection(taken=['111111', '222222'])
+    allocator = scripted(CodeAllocator(), ['111111', '222222', '333333'])
+    doc = {'name': 'w'}
+    assert allocator.insert(collection, doc) == 2
+    assert doc['code'] == '333333' and collection.inserts == 3
+    assert allocator.stats() == {'length': 6, 'capacity': 10 ** 6, 'allocations': 1,
+                                 'collisions': 2, 'max_attempts': 3}
+
+
+def test_exhausted_after_attempts():
+    allocator = scripted(CodeAllocator(1, '01', attempts=5), ['0', '1'] * 3)
+    with pytest.raises(CodeSpaceExhausted):
+        allocator.insert(Collection(taken=['0', '1']), {})
+    assert allocator.stats()['collisions'] == 5 and allocator.stats()['allocations'] == 0
+
+
+def test_other_duplicates_are_not_retried():
+    collection = Collection(unique=('code', 'name'))
+    collection.docs.append({'name': 'w', 'code': '000000'})
+    allocator = scripted(CodeAllocator(), ['123456', '654321'])
+    with pytest.raises(DuplicateKeyError):
+        allocator.insert(collection, {'name': 'w'})
+    assert collection.inserts == 1 and allocator.stats()['collisions'] == 0
+
+
+def test_fills_a_small_code_space():
+    mongomock = pytest.importorskip('mongomock')
+    collection = mongomock.MongoClient().db.workspaces
+    collection.create_index('code', unique=True)
+    allocator = CodeAllocator(1, attempts=500)
+    for _ in range(10):
+        allocator.insert(collection, {})
+    assert sorted(doc['code'] for doc in collection.find()) == list('0123456789')
+    with pytest.raises(CodeSpaceExhausted):
+        allocator.insert(collection, {})
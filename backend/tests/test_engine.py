@@ -0,0 +1,85 @@
+"""Engine outputs pinned to the values Calculation.js prints for the same inputs.
+
+The expected numbers come from the wizard's own functions run under node,
+at the precision the wizard displays (``toFixed(3)``, ``Math.round``).
+"""
+import numpy as np
+import pytest
+
+from engine import evaluate, normalize_params, run
+
+# (inputs, values printed by the wizard)
+REFERENCE_CASES = [
+    (
+        {'P': 5.5, 'n': 40, 'L': 5, 'HB1': 260, 'HB2': 240},
+        {'eta': 0.781, 'P_ct': 7.038, 'u_ch': 63.0, 'n_sb': 2520.0, 'u1': 14.611, 'u2': 0.958,
+         'shafts': {'I': (6.352, 1500, 40440), 'II': (7.067, 102.665, 657349),
+                    'III': (6.352, 107.143, 566157), 'Tải': (5.5, 40, 1313125)},
+         'sigma_H_lim1': 590.0, 'KHL1': 0.453, 'KHL2': 0.687, 'z1': 20, 'z2': 90},
+    ),
+    (
+        {'P': 7.5, 'n': 40, 'L': 5, 'HB1': 300, 'HB2': 250},
+        {'eta': 0.781, 'P_ct': 9.598, 'u_ch': 63.0, 'n_sb': 2520.0, 'u1': 14.611, 'u2': 0.958,
+         'shafts': {'I': (8.662, 1500, 55145), 'II': (9.636, 102.665, 896385),
+                    'III': (8.662, 107.143, 772032), 'Tải': (7.5, 40, 1790625)},
+         'sigma_H_lim1': 670.0, 'KHL1': 0.480, 'KHL2': 0.698, 'z1': 20, 'z2': 90},
+    ),
+    (
+        {'P': 3.2, 'n': 25.5, 'L': 8, 'eta_spur': 0.96, 'eta_bevel': 0.95, 'eta_chain': 0.93,
+         'eta_bearing': 0.99, 'u_h': 11.3, 'u_x': 3.7, 'K_be': 0.25, 'c_K': 1.1, 'psi_bd': 0.5,
+         'HB1': 320, 'HB2': 200},
+        {'eta': 0.823, 'P_ct': 3.888, 'u_ch': 41.81, 'n_sb': 1066.155, 'u1': 12.207, 'u2': 0.926,
+         'shafts': {'I': (3.546, 1500, 22577), 'II': (3.807, 122.875, 295885),
+                    'III': (3.546, 132.743, 255124), 'Tải': (3.2, 25.5, 1198431)},
+         'sigma_H_lim1': 710.0, 'KHL1': 0.455, 'KHL2': 0.573, 'z1': 21, 'z2': 78},
+    ),
+]
+
+
+def step(report, name):
+    return next(s['results'] for s in report['steps'] if s['step'] == name)
+
+
+@pytest.mark.parametrize('inputs, expected', REFERENCE_CASES)
+def test_matches_wizard(inputs, expected):
+    out = evaluate(**normalize_params(inputs))
+    for key in ('eta', 'P_ct', 'u_ch', 'n_sb', 'u1', 'u2', 'KHL1', 'KHL2'):
+        assert round(float(out[key]), 3) == expected[key], key
+    assert float(out['sigma_H_lim1']) == expected['sigma_H_lim1']
+    assert (int(out['z1']), int(out['z2'])) == (expected['z1'], expected['z2'])
+    for shaft, (P, n, T) in expected['shafts'].items():
+        assert round(float(out[f'P_{shaft}']), 3) == P, shaft
+        assert float(out[f'n_{shaft}']) == pytest.approx(n, abs=5e-4), shaft
+        assert float(out[f'T_{shaft}']) == T, shaft
+
+
+def test_full_precision_values():
+    out = evaluate(**normalize_params(REFERENCE_CASES[0][0]))
+    assert float(out['u1']) == pytest.approx(14.6106, abs=1e-4)
+    assert float(out['u2']) == pytest.approx(0.95821, abs=1e-5)
+    assert float(out['eta']) == pytest.approx(0.78145, abs=1e-5)
+    assert float(out['P_ct']) == pytest.approx(7.0382, abs=1e-4)
+
+
+def test_run_reports_wizard_steps():
+    inputs, expected = REFERENCE_CASES[0]
+    report = run(normalize_params(inputs))
+    assert report['summary']['z1'] == expected['z1'] and report['summary']['z2'] == expected['z2']
+    assert step(report, 'efficiency')['P_ct'] == expected['P_ct']
+    assert step(report, 'ratio_split') == {'u1': expected['u1'], 'u2': expected['u2']}
+    assert step(report, 'shaft_characteristic')['II']['T'] == expected['shafts']['II'][2]
+    assert step(report, 'bevel_gear')['σH_lim1'] == expected['sigma_H_lim1']
+
+
+def test_batched_matches_scalar():
+    params = [normalize_params(inputs) for inputs, _ in REFERENCE_CASES]
+    batched = evaluate(**{key: np.array([p[key] for p in params]) for key in params[0]})
+    for i, p in enumerate(params):
+        single = evaluate(**p)
+        for key in ('P_ct', 'u1', 'u2', 'T_II', 'KHL2', 'z2'):
+            assert float(batched[key][i]) == pytest.approx(float(single[key]), rel=1e-12), key
+
+
+def test_rejects_soft_pinion():
+    with pytest.raises(ValueError):
+        normalize_params({'P': 5.5, 'n': 40, 'L': 5, 'HB1': 245, 'HB2': 240})
@@ -0,0 +1,119 @@
+"""The background job queue, cancellation and recovery of jobs lost with their worker."""
+import datetime
+import operator
+import threading
+
+import pytest
+
+from utils.history import active_jobs_query, fail_stale_jobs
+from utils.jobs import (CANCELLED, COMPLETED, FAILED, PENDING, RUNNING, JobLimitExceeded,
+                        JobQueue)
+
+TIMEOUT = 10
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(workers=1, per_owner=2)
+    yield queue
+    queue.shutdown()
+
+
+class Statuses:
+    """``on_status`` callback recording each job's transitions."""
+
+    def __init__(self):
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, job_id, status, result=None, error=None):
+        with self.lock:
+            self.seen.setdefault(job_id, []).append((status, result, error))
+
+    def of(self, job_id):
+        return [status for status, _, _ in self.seen.get(job_id, [])]
+
+
+def blocking_task(started, release):
+    def task(job_id):
+        started.set()
+        assert release.wait(TIMEOUT)
+        return job_id
+    return task
+
+
+def test_reports_each_transition(queue):
+    statuses = Statuses()
+    queue.submit('ok', 'alice', lambda job_id: 42, statuses).result(TIMEOUT)
+    queue.submit('bad', 'alice', lambda job_id: 1 / 0, statuses).result(TIMEOUT)
+    assert statuses.of('ok') == [PENDING, RUNNING, COMPLETED]
+    assert statuses.seen['ok'][-1][1] == 42
+    assert statuses.of('bad') == [PENDING, RUNNING, FAILED]
+    assert 'division' in statuses.seen['bad'][-1][2]
+    assert queue.active('alice') == 0
+
+
+def test_per_owner_limit(queue):
+    statuses, started, release = Statuses(), threading.Event(), threading.Event()
+    futures = [queue.submit('a1', 'alice', blocking_task(started, release), statuses),
+               queue.submit('a2', 'alice', blocking_task(threading.Event(), release), statuses)]
+    with pytest.raises(JobLimitExceeded):
+        queue.submit('a3', 'alice', lambda job_id: None, statuses)
+    assert 'a3' not in statuses.seen
+    futures.append(queue.submit('b1', 'bob', lambda job_id: None, statuses))
+    release.set()
+    for future in futures:
+        future.result(TIMEOUT)
+    assert queue.active('alice') == queue.active('bob') == 0
+
+
+def test_cancel_pending_job_never_runs(queue):
+    statuses, started, release = Statuses(), threading.Event(), threading.Event()
+    first = queue.submit('first', 'alice', blocking_task(started, release), statuses)
+    ran = []
+    queue.submit('second', 'alice', ran.append, statuses)
+    assert started.wait(TIMEOUT)
+    assert queue.cancel('second')
+    release.set()
+    first.result(TIMEOUT)
+    queue.shutdown()
+    assert statuses.of('second') == [PENDING, CANCELLED] and not ran
+    assert statuses.of('first')[-1] == COMPLETED
+    assert queue.active('alice') == 0
+
+
+def test_cancel_running_job_discards_result(queue):
+    statuses, started, release = Statuses(), threading.Event(), threading.Event()
+    future = queue.submit('job', 'alice', blocking_task(started, release), statuses)
+    assert started.wait(TIMEOUT)
+    assert queue.cancel('job')
+    release.set()
+    future.result(TIMEOUT)
+    assert statuses.of('job') == [PENDING, RUNNING, CANCELLED]
+    assert not queue.cancel('job') and not queue.cancel('unknown')
+
+
+def test_run_uses_a_worker_process(queue):
+    statuses = Statuses()
+    queue.submit('job', 'alice', lambda job_id: queue.run(job_id, operator.mul, 6, 7), statuses).result(60)
+    assert statuses.seen['job'][-1][:2] == (COMPLETED, 42)
+
+
+def test_fail_stale_jobs():
+    mongomock = pytest.importorskip('mongomock')
+    db = mongomock.MongoClient().db
+    now = datetime.datetime.utcnow()
+    old = now - datetime.timedelta(hours=2)
+    db.calculations.insert_many([
+        {'_id': 'lost-pending', 'user_id': 'u', 'status': PENDING, 'created_at': old},
+        {'_id': 'lost-running', 'user_id': 'u', 'status': RUNNING, 'created_at': old},
+        {'_id': 'done', 'user_id': 'u', 'status': COMPLETED, 'created_at': old},
+        {'_id': 'fresh', 'user_id': 'u', 'status': RUNNING, 'created_at': now},
+    ])
+    # Stale jobs no longer count against the user's limit, even before they are failed
+    assert db.calculations.count_documents(active_jobs_query('u')) == 3
+    assert db.calculations.count_documents(active_jobs_query('u', stale_after=3600)) == 1
+    assert fail_stale_jobs(db, 3600) == 2
+    status = {doc['_id']: doc['status'] for doc in db.calculations.find()}
+    assert status == {'lost-pending': FAILED, 'lost-running': FAILED, 'done': COMPLETED, 'fresh': RUNNING}
+    assert fail_stale_jobs(db, 3600) == 0
@@ -0,0 +1,73 @@
+"""Keyset cursors: encoding, validation and paging without gaps or repeats."""
+import base64
+import datetime
+
+import pytest
+from bson import ObjectId
+
+from utils.pagination import decode_cursor, encode_cursor, keyset_filter, parse_limit
+
+
+@pytest.mark.parametrize('value', [
+    datetime.datetime(2024, 5, 17, 8, 30, 12, 345000),
+    ',65f0c0ffee0000000000000a,',
+    'email@example.com',
+    42,
+    2.5,
+])
+def test_cursor_round_trip(value):
+    oid = ObjectId()
+    token = encode_cursor(value, oid)
+    assert '=' not in token and '/' not in token and '+' not in token
+    assert decode_cursor(token) == (value, oid)
+
+
+def urlsafe(raw):
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+@pytest.mark.parametrize('token', [
+    '',
+    'not a cursor',
+    urlsafe(b'\xff\xfe'),
+    urlsafe(b'{"kind": "v"}'),
+    urlsafe(b'["v", 1]'),
+    urlsafe(b'["v", 1, "not-an-object-id"]'),
+    urlsafe(b'["dt", "yesterday", "65f0c0ffee0000000000000a"]'),
+])
+def test_malformed_cursor(token):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize('direction', [1, -1])
+def test_keyset_pages_cover_everything_once(direction):
+    mongomock = pytest.importorskip('mongomock')
+    collection = mongomock.MongoClient().db.items
+    base = datetime.datetime(2024, 1, 1)
+    # Runs of equal sort values, so paging has to fall back on _id
+    collection.insert_many([{'created_at': base + datetime.timedelta(minutes=i // 3)} for i in range(20)])
+    order = [('created_at', direction), ('_id', direction)]
+    expected = [doc['_id'] for doc in collection.find().sort(order)]
+    seen, cursor = [], None
+    while True:
+        query = {}
+        if cursor:
+            value, oid = decode_cursor(cursor)
+            query = keyset_filter('created_at', value, oid, direction)
+        page = list(collection.find(query).sort(order).limit(3))
+        if not page:
+            break
+        seen += [doc['_id'] for doc in page]
+        cursor = encode_cursor(page[-1]['created_at'], page[-1]['_id'])
+    assert seen == expected
+
+
+@pytest.mark.parametrize('raw, expected', [(None, 20), ('', 20), ('5', 5), ('0', 1), ('-4', 1), ('500', 100)])
+def test_parse_limit(raw, expected):
+    assert parse_limit(raw, 20, 100) == expected
+
+
+def test_parse_limit_rejects_text():
+    with pytest.raises(ValueError):
+        parse_limit('ten', 20, 100)
@@ -0,0 +1,67 @@
+"""Ratio-split solvers checked against the wizard's bisection."""
+import numpy as np
+import pytest
+
+from engine.solver import (RatioSplitTable, bisect_ratio_split, solve_ratio_split, solve_t,
+                           split_constant)
+
+
+@pytest.fixture(scope='module')
+def table():
+    return RatioSplitTable()
+
+
+def random_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(5, 20, n), rng.uniform(0.3, 1.2, n),
+            rng.uniform(0.25, 0.3, n), rng.uniform(1.0, 1.1, n))
+
+
+def test_solve_t_finds_the_root():
+    c = np.concatenate([np.geomspace(1e-6, 1e6, 500), [0.25, 1.0, 2.5]])
+    t, converged, iterations = solve_t(c)
+    assert converged.all() and iterations < 60
+    assert t ** 3 == pytest.approx(c * (1 + t), rel=1e-12)
+
+
+def test_solve_t_marks_invalid_lanes():
+    t, converged, _ = solve_t(np.array([-1.0, 0.0, np.nan, np.inf, 1.0]))
+    assert np.isnan(t[:4]).all() and not converged[:4].any()
+    assert converged[4]
+
+
+def test_newton_matches_bisection():
+    args = random_inputs(2000)
+    u1, u2, info = solve_ratio_split(*args, return_info=True)
+    b1, b2 = bisect_ratio_split(*args)
+    assert info['converged'].all()
+    # 50 halvings of [1e-3, 1e3] leave about 1e-12 of uncertainty
+    np.testing.assert_allclose(u1, b1, rtol=1e-9)
+    np.testing.assert_allclose(u2, b2, rtol=1e-9)
+
+
+def test_table_matches_exact_solver(table):
+    args = random_inputs(5000, seed=1)
+    u1, u2 = table.ratio_split(*args)
+    e1, e2 = solve_ratio_split(*args)
+    assert table.max_error < table.tol_t
+    assert np.max(np.abs(u1 - e1) / args[0]) <= table.tol_t
+    np.testing.assert_allclose(u2, e2, rtol=1e-8)
+
+
+def test_table_falls_back_outside_its_box(table):
+    c = np.array([0.1, 0.25, 1.0, 2.5, 10.0])
+    t, fallback = table.solve_t(c)
+    assert fallback.tolist() == [True, False, False, False, True]
+    np.testing.assert_allclose(t, solve_t(c)[0], rtol=1e-9)
+
+
+def test_scalar_inputs(table):
+    args = (14.6106 * 0.95821, 0.5, 0.25, 1.1)
+    u1, u2 = solve_ratio_split(*args)
+    t1, t2 = table.ratio_split(*args)
+    assert np.ndim(u1) == np.ndim(t1) == 0
+    assert float(t1) == pytest.approx(float(u1), rel=1e-9)
+    assert float(t2) == pytest.approx(float(u2), rel=1e-9)
+    t, fallback = table.solve_t(float(split_constant(0.5, 0.25, 1.1)))
+    assert np.ndim(t) == 0 and not fallback
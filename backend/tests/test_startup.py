@@ -0,0 +1,23 @@
+"""Cold start-up stays within budget and leaves the heavy modules for first use.
+
+Each probe is a fresh interpreter importing the app and running
+``create_app``; ``STARTUP_BUDGET_MS`` overrides the budget on slow machines.
+"""
+import os
+
+from bench.startup_budget import LAZY_MODULES, probe
+
+BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 300))
+RUNS = 3
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_startup_within_budget():
+    fastest = min(probe(BACKEND)['seconds'] for _ in range(RUNS)) * 1000
+    assert fastest <= BUDGET_MS, f'start-up takes {fastest:.0f} ms, over the {BUDGET_MS:.0f} ms budget'
+
+
+def test_heavy_modules_load_on_first_use():
+    assert {'numpy', 'fpdf', 'fontTools'} <= set(LAZY_MODULES)
+    loaded = probe(BACKEND)['loaded']
+    assert not loaded, f'imported at start-up instead of on first use: {", ".join(loaded)}'
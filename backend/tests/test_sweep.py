@@ -0,0 +1,115 @@
+"""Design-space sweeps checked point by point against the scalar engine."""
+import itertools
+
+import numpy as np
+import pytest
+
+from engine import evaluate, normalize_params
+from engine import sweep as sweep_module
+from engine.sweep import (MAX_POINTS, MAX_RESULTS, axis_length, check_grid, normalize_sweep,
+                          pareto_front, parse_axis, sweep)
+
+FIXED = {'P': 5.5, 'n': 40, 'L': 5, 'HB1': 260, 'HB2': 240}
+
+
+def run_sweep(grid, **kwargs):
+    return sweep(normalize_sweep(FIXED, grid), grid, **kwargs)
+
+
+def dominates(p, q, tol=1e-9):
+    return all(x <= y + tol for x, y in zip(p, q)) and any(x < y - tol for x, y in zip(p, q))
+
+
+def scalar_outputs(point):
+    return evaluate(**normalize_params({**FIXED, **point}))
+
+
+@pytest.mark.parametrize('spec', [
+    [1, 2, 3],
+    {'min': 1, 'max': 2, 'num': 7},
+    {'min': 1, 'max': 2, 'step': 0.25},
+    {'min': 0.3, 'max': 1.2, 'step': 0.1},
+    {'min': 5, 'max': 5, 'step': 1},
+])
+def test_axis_length_matches_parse_axis(spec):
+    assert axis_length('P', spec) == parse_axis('P', spec).size
+
+
+def test_check_grid_counts_points():
+    assert check_grid({'P': [1, 2, 3], 'n': {'min': 10, 'max': 50, 'num': 5}}) == 15
+
+
+@pytest.mark.parametrize('grid', [
+    {'eta': [0.5, 0.6]},
+    {'P': []},
+    {'P': [1, float('nan')]},
+    {'P': [True, 2]},
+    {'P': {'min': 1, 'max': 2, 'step': 0}},
+    {'P': {'min': 0, 'max': 1, 'num': MAX_POINTS + 1}},
+    {'P': {'min': 0, 'max': 1, 'num': 2000}, 'n': {'min': 0, 'max': 1, 'num': 2000}},
+])
+def test_check_grid_rejects(grid):
+    with pytest.raises(ValueError):
+        check_grid(grid)
+
+
+def test_soft_pinion_values_are_filtered_not_rejected():
+    # The first HB1 value breaks HB1 >= HB2 + 10 on its own; only that point should go
+    result = run_sweep({'HB1': [200, 245, 250, 300]})
+    assert result['points'] == 4 and result['feasible'] == 2
+    assert sorted(d['inputs']['HB1'] for d in result['designs']) == [250, 300]
+
+
+def test_fixed_soft_pinion_still_rejected():
+    with pytest.raises(ValueError):
+        normalize_sweep({**FIXED, 'HB1': 245}, {'P': [4, 5]})
+
+
+def test_top_k_matches_scalar_evaluation():
+    grid = {'P': {'min': 3, 'max': 8, 'num': 6}, 'n': [30, 40, 50]}
+    result = run_sweep(grid, objectives={'P_ct': 'min'}, top_k=4)
+    assert result['mode'] == 'top_k' and result['points'] == 18
+    points = [{'P': P, 'n': n} for P, n in itertools.product(parse_axis('P', grid['P']), grid['n'])]
+    expected = sorted(float(scalar_outputs(p)['P_ct']) for p in points)[:4]
+    assert [d['outputs']['P_ct'] for d in result['designs']] == pytest.approx(expected, rel=1e-9)
+    for design in result['designs']:
+        single = scalar_outputs(design['inputs'])
+        for key in ('u1', 'u2', 'T_II', 'z2'):
+            assert design['outputs'][key] == pytest.approx(float(single[key]), rel=1e-8), key
+
+
+@pytest.mark.parametrize('top_k', [0, -3, MAX_RESULTS + 1])
+def test_top_k_out_of_range(top_k):
+    with pytest.raises(ValueError):
+        run_sweep({'P': [4, 5]}, top_k=top_k)
+
+
+def test_objectives_checked_before_full_pass(monkeypatch):
+    def fail():
+        raise AssertionError('the full grid was evaluated')
+    monkeypatch.setattr(sweep_module, 'split_table', fail)
+    with pytest.raises(ValueError, match='Unknown objective'):
+        run_sweep({'P': [4, 5]}, objectives={'nope': 'min'})
+    with pytest.raises(ValueError, match='min or max'):
+        run_sweep({'P': [4, 5]}, objectives={'P_ct': 'lowest'})
+
+
+def test_pareto_front_matches_brute_force():
+    rng = np.random.default_rng(0)
+    a, b = rng.integers(0, 20, 300).astype(float), rng.integers(0, 20, 300).astype(float)
+    front = set(pareto_front(a, b).tolist())
+    dominated = {i for i in range(a.size) for j in range(a.size) if dominates((a[j], b[j]), (a[i], b[i]))}
+    # Ties keep one representative, so compare the (a, b) pairs
+    assert {(a[i], b[i]) for i in front} == {(a[i], b[i]) for i in set(range(a.size)) - dominated}
+    assert len(front) == len({(a[i], b[i]) for i in front})
+
+
+def test_pareto_sweep_designs_are_not_dominated():
+    grid = {'P': {'min': 3, 'max': 8, 'num': 6}, 'n': [30, 40, 50]}
+    result = run_sweep(grid, objectives={'P_ct': 'min', 'T_Tải': 'max'})
+    assert result['mode'] == 'pareto' and result['designs']
+    chosen = [(d['outputs']['P_ct'], -d['outputs']['T_Tải']) for d in result['designs']]
+    points = [{'P': P, 'n': n} for P, n in itertools.product(parse_axis('P', grid['P']), grid['n'])]
+    everything = [(float(o['P_ct']), -float(o['T_Tải'])) for o in map(scalar_outputs, points)]
+    for point in chosen:
+        assert not any(dominates(other, point) for other in everything), point
@@ -0,0 +1,72 @@
+"""Workspace membership in both layouts, and the move from arrays to the collection."""
+import datetime
+
+import pytest
+
+from indexes import ensure_indexes
+from utils.codes import CodeAllocator
+from utils.workspaces import ArrayMembers, CollectionMembers, migrate_members, page_workspaces
+
+mongomock = pytest.importorskip('mongomock')
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    ensure_indexes(db)
+    db.users.insert_many([{'email': f'{name}@example.com'} for name in ('owner', 'ann', 'bob')])
+    return db
+
+
+def user_ids(db):
+    return {u['email'].split('@')[0]: str(u['_id']) for u in db.users.find()}
+
+
+def create(db, members, name, owner, minutes=0):
+    workspace = {'name': name, 'owner': owner,
+                 'created_at': datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=minutes)}
+    return members.create(workspace, owner, lambda doc: CodeAllocator().insert(db.workspaces, doc))
+
+
+@pytest.mark.parametrize('layout', [ArrayMembers, CollectionMembers])
+def test_membership(db, layout):
+    members, users = layout(db), user_ids(db)
+    ws = create(db, members, 'w', users['owner'])
+    assert members.is_member(ws, users['owner']) and not members.is_member(ws, users['ann'])
+    assert members.add(ws, users['ann']) and members.add(ws, users['bob'])
+    assert not members.add(ws, users['ann'])
+    assert db.workspaces.find_one({'_id': ws})['member_count'] == 3
+    assert members.remove(ws, users['bob']) and not members.remove(ws, users['bob'])
+    assert db.workspaces.find_one({'_id': ws})['member_count'] == 2
+    [listed] = members.attach([db.workspaces.find_one(members.workspaces_of(users['ann']))])
+    assert listed['member_count'] == 2
+    assert [m['email'] for m in listed['members']] == ['owner@example.com', 'ann@example.com']
+
+
+@pytest.mark.parametrize('layout', [ArrayMembers, CollectionMembers])
+def test_page_workspaces(db, layout):
+    members, users = layout(db), user_ids(db)
+    for i in range(5):
+        create(db, members, f'w{i}', users['owner'], minutes=i)
+    create(db, members, 'other', users['ann'], minutes=10)
+    first, cursor = page_workspaces(db, members, users['owner'], limit=3)
+    rest, end = page_workspaces(db, members, users['owner'], after=cursor, limit=3)
+    assert [ws['name'] for ws in first + rest] == ['w4', 'w3', 'w2', 'w1', 'w0']
+    assert end is None
+    everything, cursor = page_workspaces(db, members, users['owner'])
+    assert len(everything) == 5 and cursor is None
+
+
+def test_migrate_members(db):
+    users = user_ids(db)
+    arrays = ArrayMembers(db)
+    ws = create(db, arrays, 'w', users['owner'])
+    arrays.add(ws, users['ann'])
+    assert migrate_members(db) == (1, 2)
+    # Re-running skips memberships that already exist
+    assert migrate_members(db) == (1, 0)
+    collection = CollectionMembers(db)
+    assert collection.is_member(ws, users['ann']) and not collection.is_member(ws, users['bob'])
+    assert migrate_members(db, drop_arrays=True) == (1, 0)
+    doc = db.workspaces.find_one({'_id': ws})
+    assert 'members' not in doc and doc['member_count'] == 2
@@ -1,36 +1,100 @@
-import jwt
+"""Token authentication for the blueprints.
+
+Tokens are HS256 JWTs carrying ``user_id`` (and, with ``JWT_ROLE_CLAIMS``,
+the role and email). The user behind a token is served from
+``services.user_cache`` so most requests skip Mongo. Role changes and
+deletions are published through ``services.revocations`` in Mongo, so every
+process stops trusting older role claims and drops its cached copy of the
+user within ``JWT_REVOCATION_CHECK_INTERVAL`` seconds.
+"""
 from functools import wraps
-from flask import request, jsonify, current_app
-from .mongo import db, to_obj_id
 
-def token_required(f):
+import jwt
+from bson import ObjectId
+from flask import current_app, jsonify, request
+
+import services
+from extensions import db
+
+from .log import get_logger
+
+log = get_logger('auth')
+USER_AUTH_PROJECTION = {'email': 1, 'role': 1}
+
+def load_current_user(claims):
+    user_id = claims['user_id']
+    # Also pulls revocations made by other processes into the user cache
+    revoked = services.revocations.is_revoked(user_id, claims.get('iat'))
+    if current_app.config['JWT_ROLE_CLAIMS'] and 'role' in claims and not revoked:
+        return {'_id': ObjectId(user_id), 'email': claims.get('email'), 'role': claims['role']}
+    user = services.user_cache.get(user_id)
+    if user is None:
+        user = db.users.find_one({'_id': ObjectId(user_id)}, USER_AUTH_PROJECTION)
+        if not user:
+            return None
+        services.user_cache.set(user_id, user)
+    # Routes get their own copy so nothing they do can leak into the cache
+    return dict(user)
+
+def invalidate_user(user_id):
+    services.user_cache.pop(str(user_id))
+    services.revocations.revoke(user_id)
+
+def _token_required(f, allow_query):
     @wraps(f)
     def decorated(*args, **kwargs):
         token = request.headers.get('x-access-token')
+        if not token and allow_query:
+            token = request.args.get('token')
         if not token:
+            log.debug('No token provided')
             return jsonify({'message': 'Token is missing!'}), 401
         try:
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            user = db.users.find_one({'_id': to_obj_id(data['user_id'])})
-            if not user:
+            current_user = load_current_user(data)
+            if not current_user:
+                log.debug('No user found for token of user %s', data.get('user_id'))
                 return jsonify({'message': 'User not found!'}), 401
-            kwargs['current_user'] = user
-        except Exception:
+            kwargs['current_user'] = current_user
+        except Exception as e:
+            log.debug('Rejected token: %s', e)
             return jsonify({'message': 'Token is invalid!'}), 401
         return f(*args, **kwargs)
     return decorated
 
-def role_required(role):
-    def decorator(f):
-        @wraps(f)
-        @token_required
-        def wrapped(*args, **kwargs):
-            user = kwargs.get('current_user', {})
-            if user.get('role') != role:
-                return jsonify({'message': f'{role.capitalize()} privilege required'}), 403
-            return f(*args, **kwargs)
-        return wrapped
-    return decorator
-
-user_required  = role_required('user')
-admin_required = role_required('admin')
+def token_required(f):
+    return _token_required(f, allow_query=False)
+
+def stream_token_required(f):
+    """``token_required`` that also accepts ``?token=``, for EventSource clients.
+
+    EventSource cannot set headers. Use it only on streaming endpoints: a
+    token in the URL ends up in access logs and browser history.
+    """
+    return _token_required(f, allow_query=True)
+
+
+def user_required(f, authenticate=token_required):
+    @wraps(f)
+    @authenticate
+    def decorated(*args, **kwargs):
+        current_user = kwargs.get('current_user')
+        if current_user.get('role', 'user') != 'user':
+            log.debug('User endpoint refused to role %s', current_user.get('role', 'user'))
+            return jsonify({'message': 'Only regular users can access this endpoint'}), 403
+        return f(*args, **kwargs)
+    return decorated
+
+def stream_user_required(f):
+    return user_required(f, authenticate=stream_token_required)
+
+def admin_required(f):
+    @wraps(f)
+    @token_required
+    def decorated(*args, **kwargs):
+        current_user = kwargs.get('current_user')
+        if current_user.get('role', 'user') != 'admin':
+            log.debug('Admin endpoint refused to role %s', current_user.get('role', 'user'))
+            return jsonify({'message': 'Admin privilege required'}), 403
+        return f(*args, **kwargs)
+    return decorated
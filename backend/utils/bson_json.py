@@ -0,0 +1,122 @@
+"""JSON encoding of Mongo documents for ``jsonify``.
+
+``ObjectId`` becomes its hex string, ``datetime`` ISO 8601 with a ``Z``
+(pymongo hands back naive UTC, which Flask used to send as an HTTP date, so
+clients still read it as UTC), ``date`` ISO 8601, ``Decimal128`` and
+``Decimal`` a number, numpy scalars their Python value, and cursors or other
+iterables a list. Routes can therefore hand documents, or a cursor, to
+``jsonify`` without converting fields one by one.
+
+Encoding goes through orjson when it is installed, with the stdlib encoder
+as the fallback for anything orjson refuses (indented output, integers
+beyond 64 bits). :func:`install` picks the hook the running Flask offers: a
+JSON provider on Flask 2.2 and later, ``app.json_encoder`` before that.
+"""
+import datetime
+import decimal
+import json
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:
+    DefaultJSONProvider = None
+try:
+    from flask.json import JSONEncoder
+except ImportError:  # removed in Flask 2.3, where the provider is used instead
+    JSONEncoder = json.JSONEncoder
+
+
+def to_json(value):
+    """JSON-ready stand-in for a value ``json`` cannot encode; raises ``TypeError`` otherwise."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None or not value.utcoffset():
+            return value.replace(tzinfo=None).isoformat() + 'Z'
+        return value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if hasattr(value, 'item') and hasattr(value, 'dtype'):
+        # numpy scalars; arrays fall through to the iterable case
+        return value.item() if value.ndim == 0 else value.tolist()
+    if hasattr(value, '__iter__') and not isinstance(value, (str, bytes, dict)):
+        return list(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _orjson_options(sort_keys):
+    # orjson writes datetimes itself; these options make it agree with to_json
+    options = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    return options | orjson.OPT_SORT_KEYS if sort_keys else options
+
+
+class BSONJSONEncoder(JSONEncoder):
+    """``app.json_encoder`` for Flask before 2.2."""
+
+    def default(self, o):
+        try:
+            return to_json(o)
+        except TypeError:
+            return super().default(o)
+
+    def encode(self, o):
+        # Pretty-printing (debug mode) keeps the stdlib path
+        if orjson is None or self.indent is not None:
+            return super().encode(o)
+        try:
+            return orjson.dumps(o, default=self.default, option=_orjson_options(self.sort_keys)).decode('utf-8')
+        except TypeError:
+            return super().encode(o)
+
+
+if DefaultJSONProvider is not None:
+    class BSONJSONProvider(DefaultJSONProvider):
+        """``app.json`` for Flask 2.2 and later."""
+
+        @staticmethod
+        def default(o):
+            try:
+                return to_json(o)
+            except TypeError:
+                return DefaultJSONProvider.default(o)
+
+        def dumps(self, obj, **kwargs):
+            if orjson is None or kwargs.get('indent') is not None:
+                return super().dumps(obj, **kwargs)
+            try:
+                return orjson.dumps(obj, default=self.default,
+                                    option=_orjson_options(kwargs.get('sort_keys', self.sort_keys))).decode('utf-8')
+            except TypeError:
+                return super().dumps(obj, **kwargs)
+
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            if orjson is None or self.compact is False or (self.compact is None and self._app.debug):
+                return super().response(*args, **kwargs)
+            try:
+                body = orjson.dumps(obj, default=self.default, option=_orjson_options(self.sort_keys))
+            except TypeError:
+                return super().response(*args, **kwargs)
+            return self._app.response_class(body, mimetype=self.mimetype)
+else:
+    BSONJSONProvider = None
+
+
+def install(app):
+    """Make ``jsonify`` and ``json.dumps`` of ``app`` understand BSON types."""
+    if BSONJSONProvider is not None:
+        app.json = BSONJSONProvider(app)
+    else:
+        app.json_encoder = BSONJSONEncoder
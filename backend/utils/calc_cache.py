@@ -0,0 +1,117 @@
+import datetime
+import hashlib
+import json
+import threading
+
+from .cache import TTLCache
+
+
+def cache_key(params, engine_version, catalog_version):
+    """Canonical SHA-256 of normalized parameters plus engine and catalog versions."""
+    # -0.0 and 0.0 must hash the same; integers and floats too
+    canonical = {k: (float(v) + 0.0 if isinstance(v, (int, float)) else v)
+                 for k, v in params.items()}
+    payload = json.dumps([engine_version, catalog_version, canonical],
+                         sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CalculationCache:
+    """Two-tier memo of engine reports: an in-process LRU over a Mongo collection.
+
+    Reports are stored once per key in ``collection`` (``calc_results``), which
+    a TTL index on ``created_at`` expires; ``calculations`` documents only keep
+    the key. Because reports are a pure function of their inputs, an expired
+    entry is simply recomputed on the next lookup.
+
+    ``catalog_version`` is owned by the reference catalogs in Mongo, shared by
+    every process: ``refresh`` is called before each lookup and is expected
+    to call :meth:`invalidate` when that version has moved on.
+    """
+
+    def __init__(self, collection, engine_version, maxsize=1024, ttl=600, refresh=None):
+        self.collection = collection
+        self.engine_version = engine_version
+        self.catalog_version = 0
+        self.refresh = refresh
+        self.memory = TTLCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        self.persistent_hits = 0
+        self.computed = 0
+
+    def key(self, params):
+        return cache_key(params, self.engine_version, self.catalog_version)
+
+    def get_or_compute(self, params, compute):
+        """Return ``(key, report, source)``; ``source`` is memory, persistent or computed."""
+        if self.refresh:
+            self.refresh()
+        key = self.key(params)
+        report = self.memory.get(key)
+        if report is not None:
+            return key, report, 'memory'
+        doc = self.collection.find_one({'_id': key}, {'report': 1})
+        if doc is not None:
+            with self._lock:
+                self.persistent_hits += 1
+            self.memory.set(key, doc['report'])
+            return key, doc['report'], 'persistent'
+        report = compute(params)
+        with self._lock:
+            self.computed += 1
+        # Concurrent computations of the same key race harmlessly: the first insert wins
+        self.collection.update_one({'_id': key}, {'$setOnInsert': {
+            'report': report,
+            'parameters': params,
+            'engine_version': self.engine_version,
+            'catalog_version': self.catalog_version,
+            'created_at': datetime.datetime.utcnow(),
+        }}, upsert=True)
+        self.memory.set(key, report)
+        return key, report, 'computed'
+
+    def load_many(self, keys):
+        """Return ``{key: report}`` for the cached ones among ``keys`` with one query.
+
+        Meant for bulk reads such as exports, so persisted reports are not
+        promoted into the in-process tier, where they would evict hot entries.
+        """
+        if self.refresh:
+            self.refresh()
+        found, missing = {}, []
+        for key in dict.fromkeys(keys):
+            report = self.memory.get(key)
+            if report is None:
+                missing.append(key)
+            else:
+                found[key] = report
+        if missing:
+            cached = len(found)
+            for doc in self.collection.find({'_id': {'$in': missing}}, {'report': 1}):
+                found[doc['_id']] = doc['report']
+            with self._lock:
+                self.persistent_hits += len(found) - cached
+        return found
+
+    def invalidate(self, catalog_version):
+        """Switch to the catalog version now published in Mongo and drop older reports.
+
+        ``catalog_version`` is part of every key. Persisted entries written
+        under any other version are deleted; since every process converges on
+        the same published version, none deletes another's current entries.
+        """
+        self.catalog_version = catalog_version
+        self.memory.clear()
+        return self.collection.delete_many({'catalog_version': {'$ne': self.catalog_version}}).deleted_count
+
+    def stats(self):
+        memory = self.memory.stats()
+        lookups = memory['hits'] + self.persistent_hits + self.computed
+        return {
+            'memory': memory,
+            'persistent_hits': self.persistent_hits,
+            'computed': self.computed,
+            'hit_ratio': (memory['hits'] + self.persistent_hits) / lookups if lookups else 0.0,
+            'catalog_version': self.catalog_version,
+            'engine_version': self.engine_version,
+        }
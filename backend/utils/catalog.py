@@ -0,0 +1,139 @@
+"""Catalog folder tree and the items filed in it.
+
+Folders keep a materialized path of ancestor ids including their own, e.g.
+``,<root id>,<child id>,``; items copy their folder's path into
+``folder_path``. A subtree is then one anchored-prefix regex on an indexed
+path field, and moving or deleting a folder rewrites or removes its whole
+subtree with one ``update_many`` / ``delete_many`` per collection.
+Unfiled items live at the root path ``,``.
+"""
+import datetime
+import re
+
+from bson import ObjectId
+
+from .mongo import to_obj_id
+from .pagination import decode_cursor, encode_cursor, keyset_filter
+
+ROOT = ','
+
+
+def under(path):
+    """Filter value matching ``path`` and every path below it; anchored so the index is used."""
+    return {'$regex': '^' + re.escape(path)}
+
+
+def find_folder(db, folder_id):
+    """The folder with this id string, or ``None`` if it is malformed or missing."""
+    oid = to_obj_id(folder_id)
+    if oid is None:
+        return None
+    return db.catalog_folders.find_one({'_id': oid})
+
+
+def create_folder(db, name, parent=None):
+    """Insert a folder under ``parent`` (root if ``None``) and return it.
+
+    Raises ``DuplicateKeyError`` if the parent already has a folder of that name.
+    """
+    folder_id = ObjectId()
+    folder = {
+        '_id': folder_id,
+        'folder_name': name,
+        'parent_id': parent['_id'] if parent else None,
+        'path': (parent['path'] if parent else ROOT) + f'{folder_id},',
+        'created_at': datetime.datetime.utcnow(),
+    }
+    db.catalog_folders.insert_one(folder)
+    return folder
+
+
+def child_folders(db, parent=None):
+    return list(db.catalog_folders.find({'parent_id': parent['_id'] if parent else None})
+                .sort('folder_name', 1))
+
+
+def _rebase(field, old, new):
+    """Pipeline update swapping the ``old`` prefix of ``field`` for ``new``."""
+    # Paths are commas and hex ids, so byte offsets are character offsets
+    return [{'$set': {field: {'$concat': [new, {'$substr': ['$' + field, len(old), 1 << 20]}]}}}]
+
+
+def move_folder(db, folder, parent=None):
+    """Re-parent ``folder`` with its subtree and items; returns ``(folders, items)`` updated.
+
+    Raises ``ValueError`` when ``parent`` lies inside ``folder``, and
+    ``DuplicateKeyError`` (before anything changes) on a name clash.
+    """
+    old = folder['path']
+    if parent and parent['path'].startswith(old):
+        raise ValueError('Cannot move a folder into itself')
+    new = (parent['path'] if parent else ROOT) + f"{folder['_id']},"
+    db.catalog_folders.update_one({'_id': folder['_id']},
+                                  {'$set': {'parent_id': parent['_id'] if parent else None}})
+    if new == old:
+        return 0, 0
+    folders = db.catalog_folders.update_many({'path': under(old)},
+                                             _rebase('path', old, new)).modified_count
+    items = db.catalog.update_many({'folder_path': under(old)},
+                                   _rebase('folder_path', old, new)).modified_count
+    return folders, items
+
+
+def delete_folder(db, folder):
+    """Delete ``folder``, its subfolders and every item in them; returns ``(folders, items)``."""
+    folders = db.catalog_folders.delete_many({'path': under(folder['path'])}).deleted_count
+    items = db.catalog.delete_many({'folder_path': under(folder['path'])}).deleted_count
+    return folders, items
+
+
+def create_item(db, fields, folder=None):
+    item = {
+        **fields,
+        'folder_id': folder['_id'] if folder else None,
+        'folder_path': folder['path'] if folder else ROOT,
+        'created_at': datetime.datetime.utcnow(),
+    }
+    item['_id'] = db.catalog.insert_one(item).inserted_id
+    return item
+
+
+def item_projection(raw):
+    """``None`` (whole items) or a projection of the comma-separated ``raw`` fields."""
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    # folder_path is always needed for the next cursor
+    return {field: 1 for field in fields + ['folder_path']}
+
+
+def page_items(db, folder=None, subtree=False, after=None, limit=50, projection=None):
+    """Items of ``folder`` (root if ``None``), or of its whole subtree; returns ``(items, next_cursor)``.
+
+    Ordered by ``(folder_path, _id)``, so one index serves both listings and
+    a subtree comes back folder by folder. Raises ``ValueError`` for
+    malformed cursors.
+    """
+    path = folder['path'] if folder else ROOT
+    query = {'folder_path': under(path) if subtree else path}
+    if after:
+        value, oid = decode_cursor(after)
+        query = {'$and': [query, keyset_filter('folder_path', value, oid, 1)]}
+    items = list(db.catalog.find(query, projection)
+                 .sort([('folder_path', 1), ('_id', 1)]).limit(limit + 1))
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]['folder_path'], items[-1]['_id'])
+    return items, next_cursor
+
+
+def backfill_paths(db):
+    """Give folders and items created before the tree existed a root-level path."""
+    folders = db.catalog_folders.update_many(
+        {'path': {'$exists': False}},
+        [{'$set': {'path': {'$concat': [ROOT, {'$toString': '$_id'}, ',']}, 'parent_id': None}}],
+    ).modified_count
+    items = db.catalog.update_many({'folder_path': {'$exists': False}},
+                                   {'$set': {'folder_path': ROOT, 'folder_id': None}}).modified_count
+    return folders, items
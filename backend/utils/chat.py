@@ -0,0 +1,126 @@
+import json
+
+from .pagination import decode_cursor, encode_cursor, keyset_filter
+from .users import ADMIN_ID, resolve_emails
+
+UNKNOWN_EMAIL = 'Unknown'
+
+
+def enrich_messages(db, messages, fields=('sender',)):
+    """Attach ``<field>_email`` to every message using one batched user query.
+
+    The distinct ids of all ``fields`` across the page are resolved together,
+    so the cost is one round trip regardless of how many messages there are.
+    """
+    ids = {m.get(f) for m in messages for f in fields if m.get(f)}
+    emails = resolve_emails(db, ids)
+    emails[ADMIN_ID] = ADMIN_ID
+    for m in messages:
+        m['_id'] = str(m['_id'])
+        for f in fields:
+            m[f + '_email'] = emails.get(str(m.get(f)), UNKNOWN_EMAIL)
+    return messages
+
+
+def lookup_pipeline(query, sort=1, fields=('sender',), limit=None):
+    """Build a ``$lookup`` aggregation that joins sender/receiver emails in Mongo."""
+    pipeline = [{'$match': query}, {'$sort': {'timestamp': sort, '_id': sort}}]
+    if limit:
+        pipeline.append({'$limit': limit})
+    added = {'_id': {'$toString': '$_id'}}
+    joined = {}
+    for f in fields:
+        alias = '_' + f + '_user'
+        pipeline.append({'$lookup': {
+            'from': 'users',
+            'let': {'uid': {'$convert': {'input': '$' + f, 'to': 'objectId',
+                                         'onError': None, 'onNull': None}}},
+            'pipeline': [
+                {'$match': {'$expr': {'$eq': ['$_id', '$$uid']}}},
+                {'$project': {'_id': 0, 'email': 1}},
+            ],
+            'as': alias,
+        }})
+        added[f + '_email'] = {'$cond': [
+            {'$eq': ['$' + f, ADMIN_ID]},
+            ADMIN_ID,
+            {'$ifNull': [{'$arrayElemAt': ['$' + alias + '.email', 0]}, UNKNOWN_EMAIL]},
+        ]}
+        joined[alias] = 0
+    pipeline.append({'$addFields': added})
+    if joined:
+        pipeline.append({'$project': joined})
+    return pipeline
+
+
+def load_messages(db, query, sort=1, fields=('sender',), use_lookup=False, limit=None):
+    """Fetch chat messages matching ``query`` with emails for ``fields`` attached."""
+    if use_lookup:
+        return list(db.chats.aggregate(lookup_pipeline(query, sort, fields, limit)))
+    cursor = db.chats.find(query).sort([('timestamp', sort), ('_id', sort)])
+    if limit:
+        cursor = cursor.limit(limit)
+    return enrich_messages(db, list(cursor), fields)
+
+
+def message_cursor(message):
+    # Mongo stores datetimes with millisecond precision; match it for freshly inserted messages
+    ts = message['timestamp']
+    ts = ts.replace(microsecond=ts.microsecond // 1000 * 1000)
+    return encode_cursor(ts, message['_id'])
+
+
+def page_messages(db, query, since=None, before=None, limit=None,
+                  fields=('sender',), use_lookup=False):
+    """Load one page of a conversation in chronological order.
+
+    ``since`` returns only messages newer than that cursor (incremental
+    polling); ``before`` returns the ``limit`` messages older than it
+    (scrolling back). With neither, the newest ``limit`` messages are
+    returned, or the whole history when no limit is given.
+
+    Returns ``(messages, page)`` where ``page`` holds ``cursor`` (pass back as
+    ``since``), ``prev_cursor`` (pass back as ``before``) and ``has_more``.
+    Raises ``ValueError`` for malformed cursors.
+    """
+    if since:
+        ts, oid = decode_cursor(since)
+        query = {'$and': [query, keyset_filter('timestamp', ts, oid, 1)]}
+        fetch = limit + 1 if limit else None
+        messages = load_messages(db, query, 1, fields, use_lookup, fetch)
+        has_more = bool(limit) and len(messages) > limit
+        messages = messages[:limit] if limit else messages
+    elif before or limit:
+        if before:
+            ts, oid = decode_cursor(before)
+            query = {'$and': [query, keyset_filter('timestamp', ts, oid, -1)]}
+        fetch = limit + 1 if limit else None
+        messages = load_messages(db, query, -1, fields, use_lookup, fetch)
+        has_more = bool(limit) and len(messages) > limit
+        messages = messages[:limit] if limit else messages
+        messages.reverse()
+    else:
+        messages = load_messages(db, query, 1, fields, use_lookup)
+        has_more = False
+
+    page = {
+        'cursor': message_cursor(messages[-1]) if messages else since,
+        'prev_cursor': message_cursor(messages[0]) if messages else before,
+        'has_more': has_more,
+    }
+    return messages, page
+
+
+def chat_event(message, sender_email):
+    """Serialize a freshly inserted message once, for fan-out to every subscriber."""
+    return json.dumps({
+        '_id': str(message['_id']),
+        'chat_type': message.get('chat_type'),
+        'workspace_id': message.get('workspace_id'),
+        'sender': message['sender'],
+        'sender_email': sender_email,
+        'receiver': message.get('receiver'),
+        'message': message['message'],
+        'timestamp': message['timestamp'].isoformat() + 'Z',
+        'cursor': message_cursor(message),
+    })
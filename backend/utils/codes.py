@@ -0,0 +1,70 @@
+"""Join-code allocation backed by a unique index.
+
+Codes are drawn with :mod:`secrets` and claimed by inserting the document:
+the unique index on the code field rejects a taken code atomically, across
+threads and processes, and the insert is retried with a fresh code. At a
+fill ratio ``f`` of the code space an insert needs ``1 / (1 - f)`` attempts
+on average, so raise the length long before the space fills up.
+"""
+import secrets
+import string
+import threading
+
+from pymongo.errors import DuplicateKeyError
+
+
+class CodeSpaceExhausted(RuntimeError):
+    pass
+
+
+class CodeAllocator:
+    def __init__(self, length=6, alphabet=string.digits, attempts=16, field='code'):
+        if length < 1 or len(alphabet) < 2:
+            raise ValueError('Codes need at least one character from two symbols')
+        self.length = length
+        self.alphabet = alphabet
+        self.attempts = attempts
+        self.field = field
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.collisions = 0
+        self.max_attempts = 0
+
+    @property
+    def capacity(self):
+        return len(self.alphabet) ** self.length
+
+    def generate(self):
+        return ''.join(secrets.choice(self.alphabet) for _ in range(self.length))
+
+    def insert(self, collection, doc):
+        """Insert ``doc`` under a fresh unique code and return its ``_id``.
+
+        Raises :class:`CodeSpaceExhausted` after ``attempts`` collisions in a row.
+        """
+        for attempt in range(1, self.attempts + 1):
+            doc[self.field] = self.generate()
+            try:
+                inserted_id = collection.insert_one(doc).inserted_id
+            except DuplicateKeyError as e:
+                # Only a clash on the code is ours to retry
+                if self.field not in (e.details or {}).get('keyPattern', {self.field: 1}):
+                    raise
+                with self._lock:
+                    self.collisions += 1
+                continue
+            with self._lock:
+                self.allocations += 1
+                self.max_attempts = max(self.max_attempts, attempt)
+            return inserted_id
+        raise CodeSpaceExhausted(f'No free {self.length}-character code after {self.attempts} attempts')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'length': self.length,
+                'capacity': self.capacity,
+                'allocations': self.allocations,
+                'collisions': self.collisions,
+                'max_attempts': self.max_attempts,
+            }
@@ -0,0 +1,73 @@
+"""Streaming ZIP archives of rendered reports.
+
+Entries are rendered by a process pool with a bounded number of reports in
+flight and written to the archive in completion order. The archive is
+produced for a non-seekable sink, so each entry is flushed to the client as
+soon as it is written and memory does not grow with the size of the export.
+"""
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+class _Sink:
+    """Write-only file object that hands written bytes back on ``drain()``."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """Yield the bytes of a ZIP archive of ``(name, date_time, data)`` entries."""
+    sink = _Sink()
+    # PDFs are compressed already; storing them saves CPU for nothing lost
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+        for name, date_time, data in entries:
+            archive.writestr(zipfile.ZipInfo(name, date_time=date_time), data)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def render_unordered(pool, tasks, fn, window):
+    """Run ``fn(*args)`` for every ``(name, date_time, args)`` task on ``pool``.
+
+    Tasks whose ``args`` are already ``bytes`` are passed through untouched.
+    Yields ``(name, date_time, data)`` as results arrive, keeping at most
+    ``window`` tasks in flight. A failed render becomes a ``.txt`` entry
+    with the error so one bad calculation does not abort the archive.
+    """
+    pending = {}
+
+    def collect(block):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED) if block else (
+            [f for f in pending if f.done()], None)
+        for future in done:
+            name, date_time = pending.pop(future)
+            try:
+                yield name, date_time, future.result()
+            except Exception as e:
+                yield f'{name}.txt', date_time, f'Rendering failed: {e}\n'.encode('utf-8')
+
+    try:
+        for name, date_time, args in tasks:
+            if isinstance(args, bytes):
+                yield name, date_time, args
+                continue
+            pending[pool.submit(fn, *args)] = (name, date_time)
+            yield from collect(block=len(pending) >= window)
+        while pending:
+            yield from collect(block=True)
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,141 @@
+import datetime
+
+from .jobs import ACTIVE, FAILED
+from .mongo import to_obj_id
+from .pagination import decode_cursor, encode_cursor, keyset_filter
+
+# Enough for list views: no parameters, and only the scalar part of results
+SUMMARY_FIELDS = (
+    'workspace_id', 'kind', 'status', 'error', 'engine_version', 'created_at',
+    'result.eta', 'result.P_ct', 'result.u_ch', 'result.n_sb', 'result.u1', 'result.u2',
+    'result.z1', 'result.z2', 'result.mode', 'result.points', 'result.feasible',
+)
+FIELDS = ('workspace_id', 'kind', 'status', 'error', 'engine_version', 'created_at',
+          'started_at', 'finished_at', 'parameters', 'result', 'result_key')
+
+
+def parse_date(raw):
+    """``YYYY-MM-DD`` or an ISO datetime (UTC); raises ``ValueError``."""
+    value = datetime.datetime.fromisoformat(raw.replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def history_query(user_id, args):
+    """Filter for ``/api/history`` from its query parameters.
+
+    ``from`` is inclusive and ``to`` exclusive, so ``from=2024-05-01&to=2024-05-02``
+    selects one day.
+    """
+    query = {'user_id': user_id}
+    for field in ('workspace_id', 'status', 'kind'):
+        if args.get(field):
+            query[field] = args[field]
+    created = {}
+    if args.get('from'):
+        created['$gte'] = parse_date(args['from'])
+    if args.get('to'):
+        created['$lt'] = parse_date(args['to'])
+    if created:
+        query['created_at'] = created
+    return query
+
+
+def history_projection(raw):
+    """``None`` (summary fields), ``all``, or a comma-separated subset of :data:`FIELDS`."""
+    if not raw:
+        return {field: 1 for field in SUMMARY_FIELDS}
+    if raw == 'all':
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    # created_at is always needed for the next cursor
+    return {field: 1 for field in fields + ['created_at']}
+
+
+def find_calculation(db, calc_id, user_id):
+    """The calculation with id string ``calc_id`` if it belongs to ``user_id``, else ``None``."""
+    oid = to_obj_id(calc_id)
+    if oid is None:
+        return None
+    return db.calculations.find_one({'_id': oid, 'user_id': user_id})
+
+
+def page_history(db, query, after=None, limit=50, projection=None):
+    """Newest-first page of calculations; returns ``(items, next_cursor)``.
+
+    Pass ``next_cursor`` back as ``after`` for the following page; it is
+    ``None`` on the last one. Raises ``ValueError`` for malformed cursors.
+    """
+    if after:
+        created_at, oid = decode_cursor(after)
+        query = {'$and': [query, keyset_filter('created_at', created_at, oid, -1)]}
+    docs = list(db.calculations.find(query, projection)
+                .sort([('created_at', -1), ('_id', -1)]).limit(limit + 1))
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1]['created_at'], docs[-1]['_id']) if has_more else None
+    return docs, next_cursor
+
+
+def history_summary(db, query):
+    """Totals, runs per status and per day, and result averages, computed in Mongo."""
+    pipeline = [
+        {'$match': query},
+        {'$facet': {
+            'totals': [{'$group': {
+                '_id': None,
+                'count': {'$sum': 1},
+                'first': {'$min': '$created_at'},
+                'last': {'$max': '$created_at'},
+                # $avg skips documents where the field is missing or not a number
+                'avg_P_ct': {'$avg': '$result.P_ct'},
+                'avg_u_ch': {'$avg': '$result.u_ch'},
+            }}],
+            'by_status': [{'$group': {'_id': '$status', 'count': {'$sum': 1}}},
+                          {'$sort': {'_id': 1}}],
+            'per_day': [
+                {'$group': {
+                    '_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at'}},
+                    'count': {'$sum': 1},
+                    'avg_P_ct': {'$avg': '$result.P_ct'},
+                }},
+                {'$sort': {'_id': 1}},
+            ],
+        }},
+    ]
+    facets = next(db.calculations.aggregate(pipeline))
+    totals = facets['totals'][0] if facets['totals'] else {'count': 0}
+    totals.pop('_id', None)
+    return {
+        **totals,
+        'by_status': {row['_id'] or 'unknown': row['count'] for row in facets['by_status']},
+        'per_day': [{'day': row['_id'], 'count': row['count'], 'avg_P_ct': row['avg_P_ct']}
+                    for row in facets['per_day']],
+    }
+
+
+def active_jobs_query(user_id=None, stale_after=None):
+    """Pending or running calculations, optionally of one user and younger than ``stale_after`` seconds."""
+    query = {'status': {'$in': list(ACTIVE)}}
+    if user_id is not None:
+        query['user_id'] = user_id
+    if stale_after is not None:
+        query['created_at'] = {'$gte': datetime.datetime.utcnow() - datetime.timedelta(seconds=stale_after)}
+    return query
+
+
+def fail_stale_jobs(db, stale_after):
+    """Mark jobs still active after ``stale_after`` seconds as failed; returns how many.
+
+    Jobs run inside web workers, so a restart or a recycled worker loses
+    them without a final status update.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=stale_after)
+    return db.calculations.update_many(
+        {'status': {'$in': list(ACTIVE)}, 'created_at': {'$lt': cutoff}},
+        {'$set': {'status': FAILED, 'error': 'Interrupted: the server stopped before the job finished',
+                  'finished_at': datetime.datetime.utcnow()}}).modified_count
@@ -0,0 +1,139 @@
+"""Background jobs: a dispatcher thread pool in front of a process pool.
+
+Dispatcher threads live in the web process and own all bookkeeping (status
+callbacks, database writes); CPU-heavy work is handed to worker processes
+with :meth:`JobQueue.run`, so it neither holds the GIL of the web workers nor
+needs a database connection of its own. Worker processes are spawned rather
+than forked because the web process already runs threads (Mongo monitors,
+chat backplanes) that a fork would copy in an arbitrary state.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+ACTIVE = (PENDING, RUNNING)
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueue:
+    """Run jobs off the request thread with a per-owner concurrency limit.
+
+    ``submit(job_id, owner, task, on_status)`` calls ``task(job_id)`` on a
+    dispatcher thread and reports every transition through
+    ``on_status(job_id, status, result=None, error=None)``. Pools are created
+    on the first submit.
+    """
+
+    def __init__(self, workers=2, per_owner=2, mp_context='spawn'):
+        self.workers = workers
+        self.per_owner = per_owner
+        self.mp_context = mp_context
+        self._lock = threading.Lock()
+        self._threads = None
+        self._processes = None
+        self._active = {}
+        self._futures = {}
+        self._cancelled = set()
+
+    def _pools(self):
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(self.workers, thread_name_prefix='job')
+                self._processes = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context(self.mp_context))
+            return self._threads
+
+    @property
+    def processes(self):
+        """The worker process pool, for callers that schedule work of their own."""
+        self._pools()
+        return self._processes
+
+    def active(self, owner):
+        with self._lock:
+            return len(self._active.get(owner, ()))
+
+    def submit(self, job_id, owner, task, on_status):
+        """Queue ``task``; raises :class:`JobLimitExceeded` when ``owner`` is at the limit."""
+        threads = self._pools()
+        with self._lock:
+            jobs = self._active.setdefault(owner, set())
+            if len(jobs) >= self.per_owner:
+                raise JobLimitExceeded(f'At most {self.per_owner} jobs may run at once')
+            jobs.add(job_id)
+        on_status(job_id, PENDING)
+        # Registered under the lock so a job that finishes at once cannot release first
+        with self._lock:
+            try:
+                future = threads.submit(self._execute, job_id, owner, task, on_status)
+            except Exception:
+                jobs.discard(job_id)
+                raise
+            self._futures[job_id] = (future, owner, on_status)
+        return future
+
+    def _execute(self, job_id, owner, task, on_status):
+        try:
+            if job_id in self._cancelled:
+                raise JobCancelled()
+            on_status(job_id, RUNNING)
+            result = task(job_id)
+            if job_id in self._cancelled:
+                raise JobCancelled()
+        except (JobCancelled, CancelledError):
+            on_status(job_id, CANCELLED)
+        except Exception as e:
+            on_status(job_id, FAILED, error=str(e))
+        else:
+            on_status(job_id, COMPLETED, result=result)
+        finally:
+            self._release(job_id, owner)
+
+    def _release(self, job_id, owner):
+        with self._lock:
+            self._active.get(owner, set()).discard(job_id)
+            self._futures.pop(job_id, None)
+            self._cancelled.discard(job_id)
+
+    def run(self, job_id, fn, *args):
+        """Run ``fn(*args)`` in a worker process and wait for the result.
+
+        A job cancelled while its function runs is not interrupted, but its
+        result is discarded and the job ends as cancelled.
+        """
+        if job_id in self._cancelled:
+            raise JobCancelled()
+        return self._processes.submit(fn, *args).result()
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns False if it is not known here."""
+        with self._lock:
+            if job_id not in self._futures:
+                return False
+            future, owner, on_status = self._futures[job_id]
+            self._cancelled.add(job_id)
+        # Jobs still waiting for a dispatcher thread never start
+        if future.cancel():
+            on_status(job_id, CANCELLED)
+            self._release(job_id, owner)
+        return True
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            threads, processes = self._threads, self._processes
+            self._threads = self._processes = None
+        if threads is not None:
+            threads.shutdown(wait=wait, cancel_futures=True)
+            processes.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,188 @@
+"""Structured logging through a background writer.
+
+:func:`setup_logging` gives the ``mixer`` logger a :class:`QueueHandler`, so
+a log call on the request path only appends the record to a queue; a
+:class:`~logging.handlers.QueueListener` thread formats each record as one
+JSON line and writes it. Messages keep their ``%`` arguments until the
+writer formats them, so a disabled level costs one ``isEnabledFor`` check,
+and the writer redacts tokens and password hashes on the way out. Requests
+are sampled per endpoint; warnings and errors are always kept.
+
+Records are formatted after the call returns, so do not mutate objects you
+pass as arguments.
+
+:func:`setup_logging` does not start the writer thread unless asked to;
+:func:`start_logging` does, once per process. Records logged before that
+wait in the queue. A forked child inherits a running writer only as a
+dead thread, so the child gets a fresh queue and writer of its own.
+"""
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+ROOT = 'mixer'
+_listener = None
+_settings = None
+_running = False
+REDACTED = '[redacted]'
+# Values under these keys are never written, whatever they contain
+SENSITIVE_KEYS = frozenset({'password', 'token', 'x-access-token', 'authorization', 'secret',
+                            'secret_key', 'seed_key', 'x-seed-key'})
+SENSITIVE_PATTERN = re.compile(
+    r'eyJ[\w-]+\.[\w-]+\.[\w-]*'          # JWTs
+    r'|(?:pbkdf2|scrypt):[\w:$./+=-]+'    # werkzeug password hashes
+)
+
+
+def get_logger(name):
+    return logging.getLogger(f'{ROOT}.{name}')
+
+
+def redact(value, depth=0):
+    """Copy of ``value`` with sensitive keys and token- or hash-like strings masked."""
+    if depth > 8:
+        return value
+    if isinstance(value, str):
+        return SENSITIVE_PATTERN.sub(REDACTED, value)
+    if isinstance(value, dict):
+        return {k: REDACTED if str(k).lower() in SENSITIVE_KEYS else redact(v, depth + 1)
+                for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(v, depth + 1) for v in value)
+    return value
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, endpoint, message and ``fields``."""
+
+    def format(self, record):
+        args = record.args
+        if isinstance(args, dict):
+            args = redact(args)
+        elif args:
+            args = tuple(redact(a) if isinstance(a, (str, dict, list, tuple)) else a for a in args)
+        try:
+            message = str(record.msg) % args if args else str(record.msg)
+        except (TypeError, ValueError):
+            message = f'{record.msg} {args!r}'
+        entry = {
+            'ts': datetime.datetime.utcfromtimestamp(record.created).isoformat(timespec='milliseconds') + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': SENSITIVE_PATTERN.sub(REDACTED, message),
+        }
+        if getattr(record, 'endpoint', None):
+            entry['endpoint'] = record.endpoint
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(redact(fields))
+        if record.exc_info:
+            entry['exc'] = SENSITIVE_PATTERN.sub(REDACTED, self.formatException(record.exc_info))
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestSampler(logging.Filter):
+    """Keep all or none of a request's records below WARNING, at a per-endpoint rate.
+
+    The decision is made once per request, so a sampled request logs every line.
+    """
+
+    def __init__(self, rates=None, default=1.0):
+        super().__init__()
+        self.rates = rates or {}
+        self.default = default
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        record.endpoint = request.endpoint
+        if record.levelno >= logging.WARNING:
+            return True
+        keep = g.get('_log_sampled')
+        if keep is None:
+            keep = g._log_sampled = random.random() < self.rates.get(request.endpoint, self.default)
+        return keep
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueues the record as is; the listener thread does all formatting."""
+
+    def prepare(self, record):
+        return record
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener, _running
+    if _listener is not None:
+        if _running:
+            _listener.stop()
+        _listener = None
+        _running = False
+
+
+def start_logging():
+    """Start the writer thread of the current setup; does nothing if it already runs."""
+    global _running
+    if _listener is not None and not _running:
+        _listener.start()
+        _running = True
+
+
+def setup_logging(level='INFO', sample_rates=None, sample_default=1.0, stream=None, queue_size=10000,
+                  start=True):
+    """Route the ``mixer`` loggers through a queue to a JSON writer; returns the listener.
+
+    A full queue drops records instead of blocking the request. With
+    ``start=False`` the writer thread is left to :func:`start_logging`, so a
+    pre-fork master can set up logging without owning a thread. Calling it
+    again replaces the previous setup.
+    """
+    global _listener, _settings
+    stop_logging()
+    logger = logging.getLogger(ROOT)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    records = queue.Queue(queue_size)
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(RequestSampler(sample_rates, sample_default))
+    # Dropped records go through handleError, which would print to stderr on the request path
+    handler.handleError = lambda record: None
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(JSONFormatter())
+    listener = QueueListener(records, writer, respect_handler_level=True)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    _listener = listener
+    _settings = dict(level=level, sample_rates=sample_rates, sample_default=sample_default,
+                     stream=stream, queue_size=queue_size)
+    if start:
+        start_logging()
+    return listener
+
+
+def _after_fork():
+    # The parent's writer thread does not exist here and its queue lock may be held; never touch
+    # them, just set up anew with the same settings
+    global _listener, _running
+    if _listener is None:
+        return
+    was_running = _running
+    _listener = None
+    _running = False
+    setup_logging(**_settings, start=was_running)
+
+
+atexit.register(stop_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,256 @@
+"""Request and Mongo metrics in Prometheus text format.
+
+Counters and histograms are sharded per thread: a thread only ever writes
+its own dict, so recording takes no lock, and :meth:`Registry.render` sums
+the shards when scraped. Histograms have fixed buckets, so an observation
+is one ``bisect`` and two increments. Shards of finished threads are
+folded into a base total, so thread-per-request servers do not grow
+without bound.
+
+:class:`MongoMetrics` is a pymongo ``CommandListener``; pymongo calls it on
+the thread that issued the command, which is how each request's round
+trips and Mongo time are attributed to its endpoint.
+"""
+import bisect
+import math
+import threading
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+# Round trips per request; the upper buckets are where N+1 loops show up
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+COMMAND_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+
+class _Shards:
+    """One dict per thread, merged on read."""
+
+    def __init__(self, merge):
+        self._merge = merge
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._base = {}
+
+    def mine(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._fold_dead()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _fold_dead(self):
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                # Nothing writes to a dead thread's shard any more
+                for key, value in shard.items():
+                    self._base[key] = self._merge(self._base.get(key), value)
+        self._shards = alive
+
+    def collect(self):
+        with self._lock:
+            self._fold_dead()
+            total = {key: self._merge(None, value) for key, value in self._base.items()}
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            # items() is copied in one step, so a concurrent insert cannot break the loop
+            for key, value in list(shard.items()):
+                total[key] = self._merge(total.get(key), value)
+        return total
+
+
+def _add_number(total, value):
+    return (total or 0) + value
+
+
+def _add_buckets(total, value):
+    return list(value) if total is None else [a + b for a, b in zip(total, value)]
+
+
+class Counter:
+    def __init__(self, name, description, labelnames):
+        self.name, self.description, self.labelnames = name, description, labelnames
+        self._shards = _Shards(_add_number)
+
+    def inc(self, labels, amount=1):
+        shard = self._shards.mine()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def samples(self):
+        return self._shards.collect()
+
+    def render(self):
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self.samples().items()):
+            yield f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram; each shard value is ``[per-bucket counts..., +Inf, sum]``."""
+
+    def __init__(self, name, description, labelnames, buckets):
+        self.name, self.description, self.labelnames = name, description, labelnames
+        self.buckets = tuple(buckets)
+        self._shards = _Shards(_add_buckets)
+
+    def observe(self, labels, value):
+        shard = self._shards.mine()
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self):
+        return self._shards.collect()
+
+    def quantile(self, counts, q):
+        """Estimate the ``q`` quantile from bucket counts the way Prometheus does."""
+        total = sum(counts[:-1])
+        if not total:
+            return None
+        rank, seen = q * total, 0
+        for i, count in enumerate(counts[:-1]):
+            if seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0
+                return lower + (self.buckets[i] - lower) * ((rank - seen) / count if count else 0)
+            seen += count
+        return self.buckets[-1]
+
+    def render(self):
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, counts in sorted(self.samples().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == math.inf else _number(bound)
+                yield f'{self.name}_bucket{_labels(self.labelnames + ("le",), labels + (le,))} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(counts[-1])}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return '{' + ','.join(f'{n}="{v}"' for n, v in zip(names, escaped)) + '}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, description, labelnames=()):
+        metric = Counter(name, description, tuple(labelnames))
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, description, tuple(labelnames), buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+
+class RequestMetrics:
+    """Per-endpoint requests, latency, response size and Mongo usage."""
+
+    def __init__(self, registry=None):
+        self.registry = registry or Registry()
+        r = self.registry
+        self.requests = r.counter('http_requests_total', 'Requests handled.',
+                                  ('endpoint', 'method', 'status'))
+        self.latency = r.histogram('http_request_duration_seconds',
+                                   'Time to build the response (to the first byte when streaming).',
+                                   ('endpoint',), LATENCY_BUCKETS)
+        self.size = r.histogram('http_response_size_bytes', 'Response bodies of known length.',
+                                ('endpoint',), SIZE_BUCKETS)
+        self.mongo_ops = r.histogram('mongo_commands_per_request', 'Mongo round trips per request.',
+                                     ('endpoint',), COUNT_BUCKETS)
+        self.mongo_time = r.histogram('mongo_seconds_per_request', 'Mongo time per request.',
+                                      ('endpoint',), LATENCY_BUCKETS)
+        self.commands = r.counter('mongo_commands_total', 'Mongo commands by endpoint and name.',
+                                  ('endpoint', 'command', 'outcome'))
+        self.command_latency = r.histogram('mongo_command_duration_seconds', 'Mongo command latency.',
+                                           ('command',), COMMAND_BUCKETS)
+        self._current = threading.local()
+        self.listener = MongoMetrics(self)
+
+    def begin(self, endpoint):
+        """Start attributing this thread's Mongo commands to ``endpoint``."""
+        current = self._current
+        current.endpoint, current.ops, current.seconds = endpoint, 0, 0.0
+
+    def finish(self, method, status, seconds, size=None):
+        current = self._current
+        endpoint = getattr(current, 'endpoint', None)
+        if endpoint is None:
+            return
+        labels = (endpoint,)
+        self.requests.inc((endpoint, method, str(status)))
+        self.latency.observe(labels, seconds)
+        if size is not None:
+            self.size.observe(labels, size)
+        self.mongo_ops.observe(labels, current.ops)
+        self.mongo_time.observe(labels, current.seconds)
+        current.endpoint = None
+
+    def command(self, name, seconds, ok):
+        current = self._current
+        endpoint = getattr(current, 'endpoint', None)
+        if endpoint is not None:
+            current.ops += 1
+            current.seconds += seconds
+        self.commands.inc((endpoint or '-', name, 'ok' if ok else 'failed'))
+        self.command_latency.observe((name,), seconds)
+
+    def summary(self):
+        """Per-endpoint counts and estimated p50/p95/p99, for people rather than Prometheus."""
+        latency, ops = self.latency.samples(), self.mongo_ops.samples()
+        size = self.size.samples()
+        report = {}
+        for (endpoint,), counts in latency.items():
+            count = sum(counts[:-1])
+            entry = report[endpoint] = {
+                'requests': count,
+                **{f'p{q}_ms': round(self.latency.quantile(counts, q / 100) * 1000, 2) for q in (50, 95, 99)},
+            }
+            if (endpoint,) in ops:
+                op_counts = ops[(endpoint,)]
+                entry['mongo_ops_avg'] = round(op_counts[-1] / max(sum(op_counts[:-1]), 1), 2)
+                entry['mongo_ops_p95'] = self.mongo_ops.quantile(op_counts, 0.95)
+            if (endpoint,) in size:
+                size_counts = size[(endpoint,)]
+                entry['bytes_avg'] = round(size_counts[-1] / max(sum(size_counts[:-1]), 1))
+        return report
+
+
+class MongoMetrics(monitoring.CommandListener):
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.metrics.command(event.command_name, event.duration_micros / 1e6, True)
+
+    def failed(self, event):
+        self.metrics.command(event.command_name, event.duration_micros / 1e6, False)
@@ -1,14 +1,18 @@
+"""Small helpers for ids coming from requests."""
 from bson import ObjectId
-from extensions import mongo
-
-db = mongo.db
+from bson.errors import InvalidId
 
 def to_obj_id(id_str):
+    """``id_str`` as an ObjectId (ObjectIds pass through), or ``None`` if it is not a valid id."""
     try:
         return ObjectId(id_str)
-    except:
+    except (InvalidId, TypeError):
         return None
 
+def to_obj_ids(ids):
+    """ObjectIds of the valid ids among ``ids``; invalid ones are dropped."""
+    return [oid for oid in map(to_obj_id, ids) if oid is not None]
+
 def stringify_id(doc):
     doc['_id'] = str(doc['_id'])
     return doc
@@ -0,0 +1,209 @@
+"""Motor catalog: CSV import and selection by required power and speed.
+
+A motor fits when its rated power ``cong_suat_kw`` is at least the required
+``P_ct``; among fitting motors the smallest power wins, then the rated speed
+``van_toc_50Hz`` nearest to ``n_sb``. :class:`MotorIndex` answers that from
+a sorted in-memory array (bisect on power, then on speed inside each power
+level); :func:`search_motors` runs the same selection in Mongo on the
+``power_speed`` index.
+"""
+import bisect
+import csv
+import datetime
+import threading
+import time
+
+from pymongo import UpdateOne
+
+MODEL, POWER, SPEED, EFFICIENCY = 'kieu_dong_co', 'cong_suat_kw', 'van_toc_50Hz', 'hieu_suat'
+
+# CSV header spellings accepted for each field
+COLUMNS = {
+    MODEL: ('kieu_dong_co', 'model', 'type', 'kiểu động cơ'),
+    POWER: ('cong_suat_kw', 'power_kw', 'power', 'p_kw', 'công suất'),
+    SPEED: ('van_toc_50hz', 'speed_rpm', 'speed', 'n_rpm', 'vận tốc'),
+    EFFICIENCY: ('hieu_suat', 'efficiency', 'eta', 'hiệu suất'),
+}
+
+
+def _number(raw):
+    # Catalogs typed in Vietnamese locales use a decimal comma
+    return float(str(raw).strip().replace(',', '.'))
+
+
+def read_motor_csv(lines, delimiter=','):
+    """Yield motor documents from CSV lines; raises ``ValueError`` naming the bad line.
+
+    Model, power and speed columns are required; columns that are not known
+    fields are kept, as numbers where they parse as one.
+    """
+    reader = csv.DictReader(lines, delimiter=delimiter)
+    fields = {}
+    for header in reader.fieldnames or []:
+        name = header.strip().lower()
+        fields[header] = next((field for field, aliases in COLUMNS.items() if name in aliases),
+                              header.strip())
+    missing = {MODEL, POWER, SPEED} - set(fields.values())
+    if missing:
+        raise ValueError(f'CSV lacks columns: {", ".join(sorted(missing))}')
+    for row in reader:
+        doc = {}
+        for header, raw in row.items():
+            if header is None or raw is None or not raw.strip():
+                continue
+            field = fields[header]
+            if field == MODEL:
+                doc[field] = raw.strip()
+                continue
+            try:
+                doc[field] = _number(raw)
+            except ValueError:
+                if field in COLUMNS:
+                    raise ValueError(f'line {reader.line_num}: {field} is not a number: {raw!r}')
+                doc[field] = raw.strip()
+        if not doc:
+            continue
+        if MODEL not in doc or POWER not in doc or SPEED not in doc:
+            raise ValueError(f'line {reader.line_num}: model, power and speed are required')
+        yield doc
+
+
+def import_motors(db, docs, replace=False, source=None, batch_size=1000):
+    """Upsert motors by model and log the import; returns counts.
+
+    With ``replace`` motors missing from ``docs`` are deleted, so the
+    collection mirrors the file; raises ``ValueError`` if ``docs`` is empty
+    then, rather than deleting the whole catalog.
+    """
+    now = datetime.datetime.utcnow()
+    models, ops = [], []
+    inserted = updated = 0
+
+    def flush():
+        nonlocal inserted, updated
+        result = db.motors.bulk_write(ops, ordered=False)
+        inserted += result.upserted_count
+        updated += result.modified_count
+        ops.clear()
+
+    for doc in docs:
+        models.append(doc[MODEL])
+        ops.append(UpdateOne({MODEL: doc[MODEL]}, {'$set': {**doc, 'updated_at': now}}, upsert=True))
+        if len(ops) >= batch_size:
+            flush()
+    if ops:
+        flush()
+    if replace and not models:
+        raise ValueError('no motors to replace the catalog with')
+    removed = db.motors.delete_many({MODEL: {'$nin': models}}).deleted_count if replace else 0
+    counts = {'rows': len(models), 'inserted': inserted, 'updated': updated, 'removed': removed}
+    # MotorIndex reloads when it sees a newer import
+    db.motor_imports.insert_one({'source': source, 'imported_at': now, **counts})
+    return counts
+
+
+def serialize_motor(doc):
+    doc = dict(doc)
+    doc['_id'] = str(doc['_id'])
+    doc.pop('updated_at', None)
+    return doc
+
+
+def search_motors(collection, power, speed=None, limit=10, max_power=None, tolerance=None):
+    """:meth:`MotorIndex.search` as one aggregation on the ``power_speed`` index."""
+    match = {POWER: {'$gte': power}}
+    if max_power is not None:
+        match[POWER]['$lte'] = max_power
+    if speed is not None and tolerance is not None:
+        match[SPEED] = {'$gte': speed - tolerance, '$lte': speed + tolerance}
+    pipeline = [{'$match': match}]
+    if speed is None:
+        pipeline.append({'$sort': {POWER: 1, SPEED: 1, '_id': 1}})
+    else:
+        pipeline += [
+            {'$addFields': {'_distance': {'$abs': {'$subtract': ['$' + SPEED, speed]}}}},
+            {'$sort': {POWER: 1, '_distance': 1, SPEED: 1, '_id': 1}},
+            {'$project': {'_distance': 0}},
+        ]
+    pipeline.append({'$limit': limit})
+    return [serialize_motor(doc) for doc in collection.aggregate(pipeline)]
+
+
+class MotorIndex:
+    """Every motor sorted by ``(power, speed)`` with the start of each power level."""
+
+    def __init__(self, db, check_interval=30):
+        self.db = db
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._import_id = None
+        self._motors = []
+        self._speeds = []
+        self._levels = []
+        self._level_starts = []
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._motors)
+
+    def load(self):
+        latest = self.db.motor_imports.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+        motors = sorted((serialize_motor(doc) for doc in self.db.motors.find()),
+                        key=lambda m: (m[POWER], m[SPEED], m['_id']))
+        levels, starts = [], []
+        for i, motor in enumerate(motors):
+            if not levels or motor[POWER] != levels[-1]:
+                levels.append(motor[POWER])
+                starts.append(i)
+        starts.append(len(motors))
+        with self._lock:
+            # Swapped in one go so concurrent searches never see a half-built index
+            self._motors, self._speeds = motors, [m[SPEED] for m in motors]
+            self._levels, self._level_starts = levels, starts
+            self._import_id = latest and latest['_id']
+            self._checked = time.monotonic()
+            self.loaded = True
+        return len(motors)
+
+    def refresh(self):
+        """Reload after an import by any process; at most one check per interval."""
+        with self._lock:
+            if self.loaded and time.monotonic() - self._checked < self.check_interval:
+                return False
+            self._checked = time.monotonic()
+        latest = self.db.motor_imports.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+        if not self.loaded or (latest and latest['_id']) != self._import_id:
+            self.load()
+            return True
+        return False
+
+    def search(self, power, speed=None, limit=10, max_power=None, tolerance=None):
+        """Up to ``limit`` motors with power >= ``power``, smallest power first,
+        then nearest speed; ``tolerance`` drops speeds further than that from ``speed``."""
+        self.refresh()
+        with self._lock:
+            motors, speeds = self._motors, self._speeds
+            levels, starts = self._levels, self._level_starts
+        found = []
+        for level in range(bisect.bisect_left(levels, power), len(levels)):
+            if len(found) >= limit or (max_power is not None and levels[level] > max_power):
+                break
+            start, end = starts[level], starts[level + 1]
+            if speed is None:
+                found.extend(motors[start:min(end, start + limit - len(found))])
+                continue
+            if tolerance is not None:
+                start = bisect.bisect_left(speeds, speed - tolerance, start, end)
+                end = bisect.bisect_right(speeds, speed + tolerance, start, end)
+            # Walk outwards from the speed, taking the nearer neighbour each step
+            right = bisect.bisect_left(speeds, speed, start, end)
+            left = right - 1
+            while len(found) < limit and (left >= start or right < end):
+                if right >= end or (left >= start and speed - speeds[left] <= speeds[right] - speed):
+                    found.append(motors[left])
+                    left -= 1
+                else:
+                    found.append(motors[right])
+                    right += 1
+        return found
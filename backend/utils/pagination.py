@@ -0,0 +1,47 @@
+import base64
+import datetime
+import json
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def encode_cursor(value, oid):
+    """Pack a sort-key value and a document ``_id`` into an opaque URL-safe token."""
+    if isinstance(value, datetime.datetime):
+        payload = ['dt', value.isoformat(), str(oid)]
+    else:
+        payload = ['v', value, str(oid)]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` on malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        kind, value, oid = json.loads(raw)
+        if kind == 'dt':
+            value = datetime.datetime.fromisoformat(value)
+        return value, ObjectId(oid)
+    except (ValueError, TypeError, InvalidId) as e:
+        raise ValueError(f'Invalid cursor: {token!r}') from e
+
+
+def keyset_filter(field, value, oid, direction=1):
+    """Match documents strictly after ``(value, oid)`` in ``(field, _id)`` order.
+
+    ``direction=-1`` matches documents strictly before it instead.
+    """
+    op = '$gt' if direction > 0 else '$lt'
+    return {'$or': [
+        {field: {op: value}},
+        {field: value, '_id': {op: oid}},
+    ]}
+
+
+def parse_limit(raw, default, maximum):
+    """Clamp a ``limit`` query parameter to ``[1, maximum]``."""
+    if raw in (None, ''):
+        return default
+    return max(1, min(int(raw), maximum))
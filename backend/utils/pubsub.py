@@ -0,0 +1,203 @@
+import queue
+import threading
+import uuid
+
+from pymongo import CursorType
+
+from .log import get_logger
+
+log = get_logger('pubsub')
+
+
+class Backplane:
+    """Carries chat events between the hubs of separate worker processes.
+
+    A hub publishes locally first and then hands the event to its backplane,
+    which must deliver it to every *other* attached hub via ``deliver``.
+    """
+
+    def attach(self, hub_id, deliver):
+        raise NotImplementedError
+
+    def detach(self, hub_id):
+        raise NotImplementedError
+
+    def publish(self, channel, data, origin):
+        raise NotImplementedError
+
+
+class InMemoryBackplane(Backplane):
+    """Connects hubs living in the same process; used for tests and benchmarks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hubs = {}
+
+    def attach(self, hub_id, deliver):
+        with self._lock:
+            self._hubs[hub_id] = deliver
+
+    def detach(self, hub_id):
+        with self._lock:
+            self._hubs.pop(hub_id, None)
+
+    def publish(self, channel, data, origin):
+        with self._lock:
+            targets = [d for hid, d in self._hubs.items() if hid != origin]
+        for deliver in targets:
+            deliver(channel, data)
+
+
+class MongoBackplane(Backplane):
+    """Shares events through a capped collection followed with a tailable cursor.
+
+    Every attached hub runs one tailing thread, so N worker processes cost N
+    idle cursors on the server no matter how many clients are connected.
+    """
+
+    def __init__(self, collection, size=16 * 1024 * 1024, retry_delay=0.5):
+        self.collection = collection
+        self.size = size
+        self.retry_delay = retry_delay
+        self._threads = {}
+
+    def _ensure_capped(self):
+        db = self.collection.database
+        if self.collection.name not in db.list_collection_names():
+            db.create_collection(self.collection.name, capped=True, size=self.size)
+
+    def attach(self, hub_id, deliver):
+        self._ensure_capped()
+        stop = threading.Event()
+        thread = threading.Thread(target=self._tail, args=(hub_id, deliver, stop),
+                                  name=f'chat-backplane-{hub_id}', daemon=True)
+        self._threads[hub_id] = (thread, stop)
+        thread.start()
+
+    def detach(self, hub_id):
+        _, stop = self._threads.pop(hub_id, (None, None))
+        if stop:
+            stop.set()
+
+    def publish(self, channel, data, origin):
+        self.collection.insert_one({'channel': channel, 'data': data, 'origin': origin})
+
+    def _tail(self, hub_id, deliver, stop):
+        last_id = None
+        started = False
+        while not stop.is_set():
+            cursor = None
+            try:
+                if not started:
+                    # Start from the newest event so a restarted worker does not replay history
+                    last = self.collection.find_one(sort=[('$natural', -1)])
+                    last_id = last['_id'] if last else None
+                    started = True
+                query = {'_id': {'$gt': last_id}} if last_id else {}
+                cursor = self.collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive and not stop.is_set():
+                    for doc in cursor:
+                        last_id = doc['_id']
+                        if doc.get('origin') != hub_id:
+                            deliver(doc['channel'], doc['data'])
+            except Exception:
+                log.exception('Chat backplane tail failed; retrying in %ss', self.retry_delay)
+            finally:
+                if cursor is not None:
+                    cursor.close()
+            stop.wait(self.retry_delay)
+
+
+class Subscription:
+    """A bounded mailbox for one connected client."""
+
+    def __init__(self, channel, maxsize):
+        self.channel = channel
+        self._queue = queue.Queue(maxsize)
+
+    def put(self, data):
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            # A stalled client loses its oldest event rather than blocking the publisher
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(data)
+
+    def get(self, timeout=None):
+        """Next event, or ``None`` when ``timeout`` expires first."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class ChatHub:
+    """In-process fan-out of chat events to subscribers, keyed by channel."""
+
+    def __init__(self, backplane=None, queue_size=256):
+        self.id = uuid.uuid4().hex
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._channels = {}
+        self.backplane = None
+        if backplane is not None:
+            self.attach(backplane)
+
+    def attach(self, backplane):
+        if self.backplane is not None:
+            self.backplane.detach(self.id)
+        self.backplane = backplane
+        backplane.attach(self.id, self._deliver)
+
+    def subscribe(self, channel):
+        sub = Subscription(channel, self.queue_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._channels.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._channels[sub.channel]
+
+    def publish(self, channel, data):
+        """Deliver ``data`` (an already serialized string) to every subscriber."""
+        self._deliver(channel, data)
+        if self.backplane is not None:
+            self.backplane.publish(channel, data, self.id)
+
+    def _deliver(self, channel, data):
+        with self._lock:
+            subs = list(self._channels.get(channel, ()))
+        for sub in subs:
+            sub.put(data)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._channels.values())
+
+
+def workspace_channel(workspace_id):
+    return f'workspace:{workspace_id}'
+
+
+def direct_channel(user_id):
+    # Every direct conversation is between one user and the admin side
+    return f'direct:{user_id}'
+
+
+def sse_events(sub, heartbeat=15.0, retry_ms=3000):
+    """Yield Server-Sent Events for ``sub``, with comment heartbeats while idle."""
+    yield f'retry: {retry_ms}\n\n'
+    while True:
+        data = sub.get(timeout=heartbeat)
+        if data is None:
+            yield ': keep-alive\n\n'
+        else:
+            yield f'data: {data}\n\n'
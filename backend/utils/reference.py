@@ -0,0 +1,197 @@
+"""Reference catalogs (efficiencies, ratios, materials, motors) served from memory.
+
+Each catalog is one document ``{_id: name, items, version, updated_at}`` in
+``reference_data``; a counter document hands out versions, so the largest
+catalog version identifies the whole set. :meth:`ReferenceData.load` reads
+every catalog once and renders each registered view to JSON bytes with an
+ETag, so a request is a dict lookup plus a header comparison. Edits go
+through :meth:`ReferenceData.update`, which reloads this process at once;
+other processes notice the new version within ``check_interval`` seconds.
+:meth:`ReferenceData.bump` publishes a new version without editing any
+catalog, which makes every process drop its cached calculation reports.
+"""
+import datetime
+import hashlib
+import json
+import threading
+import time
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from engine.constants import EFFICIENCY_CATALOG, TRANSMISSION_CATALOG
+
+VERSION_ID = '__version__'
+
+# Seeded on first start; later edits live only in Mongo
+DEFAULT_CATALOGS = {
+    'efficiency': [{'key': key, 'label': label, 'covered': list(covered), 'open': list(open_)}
+                   for key, label, covered, open_ in EFFICIENCY_CATALOG],
+    'transmission': [{'key': key, 'label': label, 'range': list(bounds)}
+                     for key, label, bounds in TRANSMISSION_CATALOG],
+    'materials': [
+        {'label': 'Thép 40XH', 'HB_range': [200, 350]},
+        {'label': 'Thép 50X', 'HB_range': [180, 330]},
+    ],
+    'engines': [
+        {'id': 'engine1', 'kieu_dong_co': 'Động cơ A', 'cong_suat_kw': 100,
+         'van_toc_50Hz': 1500, 'hieu_suat': 0.95},
+        {'id': 'engine2', 'kieu_dong_co': 'Động cơ B', 'cong_suat_kw': 150,
+         'van_toc_50Hz': 1450, 'hieu_suat': 0.93},
+    ],
+}
+
+# Fields the views rely on; other fields are passed through untouched
+REQUIRED_FIELDS = {
+    'efficiency': ('key', 'label', 'covered', 'open'),
+    'transmission': ('key', 'label', 'range'),
+    'materials': ('label', 'HB_range'),
+    'engines': ('id',),
+}
+RANGE_FIELDS = ('covered', 'open', 'range', 'HB_range')
+
+
+def validate_items(name, items):
+    """Raise ``ValueError`` unless ``items`` is a list of objects fit for catalog ``name``."""
+    if name == VERSION_ID or not isinstance(items, list) or not items:
+        raise ValueError('items must be a non-empty list')
+    required = REQUIRED_FIELDS.get(name, ())
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f'item {i} is not an object')
+        missing = [field for field in required if field not in item]
+        if missing:
+            raise ValueError(f'item {i} lacks {", ".join(missing)}')
+        for field in RANGE_FIELDS:
+            bounds = item.get(field)
+            if bounds is not None and not (
+                    isinstance(bounds, list) and len(bounds) == 2
+                    and all(isinstance(b, (int, float)) for b in bounds) and bounds[0] <= bounds[1]):
+                raise ValueError(f'item {i}: {field} must be [min, max]')
+
+
+def legacy_efficiency(items):
+    return {'success': True, 'data': [{
+        'TenGoi': item['label'],
+        'HieuSuatDuoccheMin': item['covered'][0], 'HieuSuatDuoccheMax': item['covered'][1],
+        'HieuSuatDeHoMin': item['open'][0], 'HieuSuatDeHoMax': item['open'][1],
+    } for item in items]}
+
+
+def legacy_transmission(items):
+    return {'success': True, 'data': [{
+        'LoaiTruyen': item['label'], 'TisoTruyenMin': item['range'][0], 'TisoTruyenMax': item['range'][1],
+    } for item in items]}
+
+
+def legacy_engines(items):
+    return {'success': True, 'engines': items}
+
+
+class ReferenceData:
+    def __init__(self, collection, defaults=DEFAULT_CATALOGS, check_interval=5, on_reload=None):
+        self.collection = collection
+        self.defaults = defaults
+        self.check_interval = check_interval
+        # Called with the new version after a reload that changed it
+        self.on_reload = on_reload
+        self.version = None
+        self._views = {name: (name, None) for name in defaults}
+        self._rendered = {}
+        self._lock = threading.Lock()
+        self._checked = 0.0
+
+    def add_view(self, name, catalog, render):
+        """Serve ``render(items)`` of ``catalog`` under ``name``; takes effect on the next load."""
+        self._views[name] = (catalog, render)
+
+    def _seed(self):
+        missing = set(self.defaults) - {doc['_id'] for doc in self.collection.find({}, {'_id': 1})}
+        if not missing:
+            return
+        now = datetime.datetime.utcnow()
+        try:
+            self.collection.insert_many([{'_id': name, 'items': self.defaults[name], 'version': 0,
+                                          'updated_at': now} for name in missing], ordered=False)
+        except BulkWriteError:
+            # Another process seeded them first
+            pass
+
+    def load(self):
+        """Read every catalog and pre-render every view; returns the version."""
+        self._seed()
+        catalogs = {doc['_id']: doc for doc in self.collection.find()}
+        # The counter runs ahead of every catalog after a bump
+        counter = catalogs.pop(VERSION_ID, {}).get('value', 0)
+        version = max([counter] + [doc.get('version', 0) for doc in catalogs.values()])
+        rendered = {}
+        for name, (catalog, render) in self._views.items():
+            if catalog not in catalogs:
+                continue
+            items = catalogs[catalog]['items']
+            payload = render(items) if render else {
+                'name': catalog, 'version': catalogs[catalog].get('version', 0), 'items': items}
+            body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            etag = f'{name}-{hashlib.sha256(body).hexdigest()[:16]}'
+            rendered[name] = (body, etag)
+        with self._lock:
+            changed = version != self.version
+            self._rendered = rendered
+            self.version = version
+            self._checked = time.monotonic()
+        if changed and self.on_reload:
+            self.on_reload(version)
+        return version
+
+    def refresh(self):
+        """Reload if another process published a newer version; at most one check per interval."""
+        with self._lock:
+            if time.monotonic() - self._checked < self.check_interval:
+                return False
+            self._checked = time.monotonic()
+        current = self.collection.find_one({'_id': VERSION_ID}, {'value': 1})
+        if current and current['value'] != self.version:
+            self.load()
+            return True
+        return False
+
+    def current_version(self):
+        """The published version, loading or refreshing first as needed."""
+        if self.version is None:
+            self.load()
+        else:
+            self.refresh()
+        return self.version
+
+    def get(self, name):
+        """``(body, etag)`` of a view, or ``None`` if there is no such view."""
+        self.current_version()
+        return self._rendered.get(name)
+
+    def items(self, name):
+        doc = self.collection.find_one({'_id': name}, {'items': 1})
+        return doc['items'] if doc else None
+
+    def _next_version(self):
+        return self.collection.find_one_and_update(
+            {'_id': VERSION_ID}, {'$inc': {'value': 1}}, upsert=True,
+            return_document=ReturnDocument.AFTER)['value']
+
+    def bump(self):
+        """Publish a new version with unchanged catalogs and reload; returns the version."""
+        self._next_version()
+        return self.load()
+
+    def update(self, name, items):
+        """Replace a catalog's items under a new version and reload; returns the version."""
+        validate_items(name, items)
+        version = self._next_version()
+        self.collection.update_one({'_id': name}, {'$set': {
+            'items': items, 'version': version, 'updated_at': datetime.datetime.utcnow()}}, upsert=True)
+        self.load()
+        return version
+
+    def catalogs(self):
+        return [{'name': doc['_id'], 'version': doc.get('version', 0), 'items': len(doc.get('items', [])),
+                 'updated_at': doc.get('updated_at')}
+                for doc in self.collection.find({'_id': {'$ne': VERSION_ID}}).sort('_id', 1)]
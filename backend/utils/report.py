@@ -0,0 +1,243 @@
+"""PDF design reports rendered from stored calculations.
+
+A :class:`ReportRenderer` loads its TrueType fonts once, cut down to the
+scripts a report can contain (Latin with Vietnamese, Greek, symbols), into a
+template document that every report deep-copies. fpdf2 still subsets each
+embedded font per document, but from a ~140 KB face instead of the full
+~700 KB DejaVu Sans, and without re-reading glyph metrics. Without a Unicode
+font the core Helvetica font is used and text is reduced to Latin-1
+(``Bộ truyền`` becomes ``Bo truyen``, ``η`` becomes ``eta``).
+"""
+import atexit
+import copy
+import io
+import os
+import tempfile
+import unicodedata
+
+from fontTools import subset, ttLib
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+FONT_CANDIDATES = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+    '/Library/Fonts/DejaVuSans.ttf',
+]
+# Basic Latin to Latin Extended-B, combining marks, Greek, Vietnamese, punctuation and symbols
+UNICODE_RANGES = [(0x20, 0x24F), (0x300, 0x36F), (0x370, 0x3FF), (0x1E00, 0x1EFF),
+                  (0x2000, 0x209F), (0x2190, 0x22FF)]
+CHUNK_SIZE = 64 * 1024
+
+STEP_TITLES = {
+    'efficiency': 'Efficiency',
+    'transmission_ratio': 'Transmission ratio',
+    'ratio_split': 'Ratio split',
+    'shaft_characteristic': 'Shaft characteristics',
+    'bevel_gear': 'Bevel gear',
+    'chain': 'Chain drive',
+}
+SHAFT_COLUMNS = (('P', 'P (kW)'), ('n', 'n (rpm)'), ('T', 'T (N·mm)'))
+SWEEP_STATISTICS = ('min', 'p5', 'p50', 'p95', 'max')
+SWEEP_DESIGN_OUTPUTS = ('P_ct', 'u1', 'u2', 'T_III')
+GREEK = {'η': 'eta', 'σ': 'sigma', 'ψ': 'psi', 'λ': 'lambda', 'Đ': 'D', 'đ': 'd', '·': '.'}
+
+
+def latin1(text):
+    text = ''.join(GREEK.get(ch, ch) for ch in text)
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).encode(
+        'latin-1', 'replace').decode('latin-1')
+
+
+def fmt(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.6g}'
+    return str(value)
+
+
+class ReportPDF(FPDF):
+    font_name = 'helvetica'
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font(self.font_name, size=8)
+        self.cell(0, 8, f'Page {self.page_no()}/{{nb}}', align='C')
+
+
+def subset_font(path):
+    """Write ``path`` cut down to :data:`UNICODE_RANGES` to a temporary file."""
+    font = ttLib.TTFont(path)
+    options = subset.Options()
+    options.notdef_outline = True
+    options.recommended_glyphs = True
+    options.layout_features = []
+    options.drop_tables += ['FFTM', 'GSUB', 'GPOS', 'GDEF']
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=[u for lo, hi in UNICODE_RANGES for u in range(lo, hi + 1)])
+    subsetter.subset(font)
+    fd, subset_path = tempfile.mkstemp(suffix='.ttf', prefix='report-font-')
+    with os.fdopen(fd, 'wb') as f:
+        font.save(f)
+    atexit.register(os.remove, subset_path)
+    return subset_path
+
+
+class ReportRenderer:
+    def __init__(self, font_path=None, bold_font_path=None):
+        font_path = font_path or next((p for p in FONT_CANDIDATES if os.path.exists(p)), None)
+        self.template = ReportPDF()
+        self.template.set_margins(15, 15, 15)
+        self.template.set_auto_page_break(True, margin=15)
+        self.font_data = {}
+        if font_path:
+            self.template.font_name = 'report'
+            self._add_font('', font_path)
+            bold_font_path = bold_font_path or font_path.replace('.ttf', '-Bold.ttf')
+            if os.path.exists(bold_font_path):
+                self._add_font('B', bold_font_path)
+        self.unicode = bool(self.font_data)
+        self.bold = 'B' if 'B' in self.font_data or not self.unicode else ''
+
+    def _add_font(self, style, path):
+        path = subset_font(path)
+        known = set(self.template.fonts)
+        self.template.add_font('report', style, path)
+        (key,) = set(self.template.fonts) - known
+        with open(path, 'rb') as f:
+            self.font_data[key] = f.read()
+
+    def _new_pdf(self):
+        pdf = copy.deepcopy(self.template)
+        # Copies share the parsed font with the template, and fpdf2 subsets it in
+        # place on output; give each document its own (lazily parsed) instance
+        for key, data in self.font_data.items():
+            pdf.fonts[key].ttfont = ttLib.TTFont(io.BytesIO(data), recalcTimestamp=False, lazy=True)
+        return pdf
+
+    def text(self, value):
+        value = fmt(value)
+        return value if self.unicode else latin1(value)
+
+    def _document(self, title, lines):
+        pdf = self._new_pdf()
+        pdf.add_page()
+        pdf.set_font(pdf.font_name, self.bold, 16)
+        pdf.cell(0, 10, self.text(title), align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_font(pdf.font_name, size=8)
+        for line in lines:
+            pdf.cell(0, 5, self.text(line), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        return pdf
+
+    def _heading(self, pdf, title):
+        pdf.ln(2)
+        pdf.set_font(pdf.font_name, self.bold, 11)
+        pdf.cell(0, 6, self.text(title), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_font(pdf.font_name, size=8)
+
+    def _table(self, pdf, header, rows, col_widths=None, height=5):
+        """Grid of single-line cells; the header is repeated after page breaks.
+
+        Drawn with plain ``cell`` calls: ``FPDF.table`` wraps every cell through
+        ``multi_cell`` and is about ten times slower for short values.
+        """
+        ratios = col_widths or (1,) * len(header)
+        widths = [pdf.epw * r / sum(ratios) for r in ratios]
+
+        def row(values, style=''):
+            pdf.set_font(pdf.font_name, style, 8)
+            for width, value in zip(widths, values):
+                pdf.cell(width, height, self.text(value), border=1)
+            pdf.ln(height)
+
+        row(header, self.bold)
+        for values in rows:
+            if pdf.will_page_break(height):
+                pdf.add_page()
+                row(header, self.bold)
+            row(values)
+
+    def _pairs(self, pdf, header, items):
+        """Key/value table laid out as two pairs per row to save vertical space."""
+        items = list(items)
+        half = (len(items) + 1) // 2
+        rows = [tuple(items[i]) + (tuple(items[i + half]) if i + half < len(items) else ('', ''))
+                for i in range(half)]
+        self._table(pdf, header + header, rows, (2, 1, 2, 1))
+
+    def _finish(self, pdf):
+        return bytes(pdf.output())
+
+    def render_calculation(self, calculation, report):
+        """Full design report: inputs plus one section per engine step."""
+        pdf = self._document('Drive design report', [
+            f"Calculation: {calculation.get('_id')}",
+            f"Created: {calculation.get('created_at')}",
+            f"Engine version: {report.get('engine_version')}",
+        ])
+        self._heading(pdf, 'Input parameters')
+        self._pairs(pdf, ('Parameter', 'Value'), sorted((calculation.get('parameters') or {}).items()))
+        for step in report.get('steps') or []:
+            self._heading(pdf, STEP_TITLES.get(step['step'], step['step']))
+            results = step['results']
+            if step['step'] == 'shaft_characteristic':
+                self._table(pdf, ('Shaft',) + tuple(label for _, label in SHAFT_COLUMNS),
+                            [(shaft,) + tuple(values.get(key) for key, _ in SHAFT_COLUMNS)
+                             for shaft, values in results.items()])
+            else:
+                self._pairs(pdf, ('Quantity', 'Value'), results.items())
+        return self._finish(pdf)
+
+    def render_sweep(self, calculation):
+        """Sweep report: grid, statistics of every output and the chosen designs."""
+        params = calculation.get('parameters') or {}
+        result = calculation.get('result') or {}
+        objectives = result.get('objectives') or {}
+        pdf = self._document('Design-space sweep report', [
+            f"Calculation: {calculation.get('_id')}",
+            f"Created: {calculation.get('created_at')}",
+            f"Points: {result.get('points')}, feasible: {result.get('feasible')}",
+            'Objectives: ' + ', '.join(f'{k} ({v})' for k, v in objectives.items()),
+        ])
+        self._heading(pdf, 'Fixed inputs')
+        self._pairs(pdf, ('Parameter', 'Value'), sorted((params.get('fixed') or {}).items()))
+        self._heading(pdf, 'Swept inputs')
+        self._table(pdf, ('Parameter', 'Values'),
+                    [(name, str(spec)) for name, spec in (params.get('grid') or {}).items()], (1, 3))
+        self._heading(pdf, 'Output statistics (feasible designs)')
+        self._table(pdf, ('Output',) + SWEEP_STATISTICS,
+                    [(key,) + tuple((stats or {}).get(s) for s in SWEEP_STATISTICS)
+                     for key, stats in (result.get('statistics') or {}).items()])
+        designs = result.get('designs') or []
+        if designs:
+            inputs = list(designs[0]['inputs'])
+            outputs = list(dict.fromkeys(list(objectives) + list(SWEEP_DESIGN_OUTPUTS)))
+            self._heading(pdf, 'Designs')
+            self._table(pdf, ['#'] + inputs + outputs,
+                        [[i + 1] + [d['inputs'].get(k) for k in inputs]
+                         + [d['outputs'].get(k) for k in outputs] for i, d in enumerate(designs)])
+        return self._finish(pdf)
+
+    def render(self, calculation, report=None):
+        if calculation.get('kind') == 'sweep':
+            return self.render_sweep(calculation)
+        return self.render_calculation(calculation, report)
+
+
+_renderers = {}
+
+
+def render_pdf(font_path, calculation, report=None):
+    """Render in a worker process, reusing one renderer per font for its lifetime."""
+    if font_path not in _renderers:
+        _renderers[font_path] = ReportRenderer(font_path)
+    return _renderers[font_path].render(calculation, report)
+
+
+def iter_chunks(data, chunk_size=CHUNK_SIZE):
+    """Yield ``data`` in slices without copying it."""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
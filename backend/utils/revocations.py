@@ -0,0 +1,85 @@
+"""Revoked role claims, shared by every process through Mongo.
+
+A user whose role changed, or who was deleted, gets one document
+``{_id: user_id, revoked_at, expires_at}`` in ``revoked_tokens``. Tokens
+issued at or before ``revoked_at`` no longer have their role claim trusted;
+tokens issued later (a fresh login) are trusted again. Documents expire
+through a TTL index once every token they cover has expired.
+
+Each process mirrors the collection in a dict and pulls newer revocations
+at most once per ``check_interval`` seconds, so a revocation made by one
+worker holds in every worker within that interval, and the check on the
+request path is a dict lookup. The mirror is not size-bounded: it holds one
+entry per revocation within the token lifetime.
+"""
+import datetime
+import threading
+import time
+
+
+class RevocationList:
+    def __init__(self, collection, token_ttl, check_interval=5, on_revoke=None):
+        self.collection = collection
+        self.token_ttl = datetime.timedelta(seconds=token_ttl)
+        self.check_interval = check_interval
+        # Called with the user id of each revocation pulled from other processes
+        self.on_revoke = on_revoke
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._checked = None
+        self._since = None
+
+    def revoke(self, user_id):
+        user_id = str(user_id)
+        now = datetime.datetime.utcnow()
+        self.collection.update_one({'_id': user_id}, {'$set': {
+            'revoked_at': now, 'expires_at': now + self.token_ttl}}, upsert=True)
+        with self._lock:
+            self._revoked[user_id] = (now, now + self.token_ttl)
+
+    def sync(self, force=False):
+        """Pull revocations made since the last pull; at most one query per interval."""
+        with self._lock:
+            if not force and self._checked is not None and time.monotonic() - self._checked < self.check_interval:
+                return False
+            self._checked = time.monotonic()
+            since = self._since
+        started = datetime.datetime.utcnow()
+        # Overlap the previous pull by an interval so clock skew between workers cannot hide one
+        query = {} if since is None else {'revoked_at': {'$gte': since - datetime.timedelta(
+            seconds=self.check_interval)}}
+        pulled = []
+        for doc in self.collection.find(query, {'revoked_at': 1, 'expires_at': 1}):
+            pulled.append((doc['_id'], doc['revoked_at'], doc['expires_at']))
+        with self._lock:
+            for user_id, revoked_at, expires_at in pulled:
+                known = self._revoked.get(user_id)
+                if known is None or known[0] < revoked_at:
+                    self._revoked[user_id] = (revoked_at, expires_at)
+            for user_id in [k for k, (_, expires_at) in self._revoked.items() if expires_at <= started]:
+                del self._revoked[user_id]
+            self._since = started
+        if self.on_revoke and since is not None:
+            for user_id, _, _ in pulled:
+                self.on_revoke(user_id)
+        return True
+
+    def is_revoked(self, user_id, issued_at=None):
+        """Whether a token of ``user_id`` issued at ``issued_at`` (epoch seconds) is revoked.
+
+        Tokens without an issue time are treated as revoked once any
+        revocation exists for the user.
+        """
+        self.sync()
+        entry = self._revoked.get(str(user_id))
+        if entry is None or entry[1] <= datetime.datetime.utcnow():
+            return False
+        if issued_at is None:
+            return True
+        # iat has whole seconds; a token from the same second as the revocation counts as older
+        issued = datetime.datetime.utcfromtimestamp(int(issued_at))
+        return issued <= entry[0]
+
+    def stats(self):
+        with self._lock:
+            return {'revoked': len(self._revoked), 'check_interval': self.check_interval}
@@ -0,0 +1,74 @@
+import re
+
+from .mongo import to_obj_ids
+from .pagination import decode_cursor, encode_cursor, keyset_filter
+
+# Direct chats use this literal instead of a user id for the admin side.
+ADMIN_ID = 'admin'
+ROLES = ('user', 'admin')
+# The only user fields the admin directory ever returns
+DIRECTORY_FIELDS = {'email': 1, 'role': 1, 'created_at': 1}
+# Sortable fields and their default direction; each has an index, alone and after role
+DIRECTORY_SORTS = {'created_at': -1, 'email': 1}
+
+
+def resolve_emails(db, user_ids):
+    """Map user id strings to emails with a single ``$in`` query."""
+    object_ids = to_obj_ids(set(user_ids) - {ADMIN_ID})
+    if not object_ids:
+        return {}
+    cursor = db.users.find({'_id': {'$in': object_ids}}, {'email': 1})
+    return {str(u['_id']): u.get('email') for u in cursor}
+
+
+def directory_query(args):
+    """Filter for the admin user directory; raises ``ValueError`` for an unknown role.
+
+    ``q`` is a case-sensitive email prefix, so it runs as an index range scan.
+    """
+    query = {}
+    if args.get('q'):
+        query['email'] = {'$regex': '^' + re.escape(args['q'])}
+    if args.get('role'):
+        if args['role'] not in ROLES:
+            raise ValueError(f"role must be one of {', '.join(ROLES)}")
+        query['role'] = args['role']
+    return query
+
+
+def page_directory(db, query, sort='created_at', direction=None, after=None, limit=50):
+    """One page of users ordered by ``sort``; returns ``(users, next_cursor)``.
+
+    Raises ``ValueError`` for an unknown sort field or a malformed cursor.
+    """
+    if sort not in DIRECTORY_SORTS:
+        raise ValueError(f"sort must be one of {', '.join(DIRECTORY_SORTS)}")
+    direction = direction or DIRECTORY_SORTS[sort]
+    if after:
+        value, oid = decode_cursor(after)
+        query = {'$and': [query, keyset_filter(sort, value, oid, direction)]}
+    # Emails are unique, so they need no _id tiebreak and the email indexes cover the sort
+    order = [(sort, direction)] if sort == 'email' else [(sort, direction), ('_id', direction)]
+    users = list(db.users.find(query, DIRECTORY_FIELDS).sort(order).limit(limit + 1))
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].get(sort), users[-1]['_id'])
+    return users, next_cursor
+
+
+def count_directory(db, query):
+    """Total users matching ``query`` plus a per-role breakdown, all from indexes.
+
+    Without filters the total is the collection's metadata count.
+    """
+    total = db.users.count_documents(query) if query else db.users.estimated_document_count()
+    by_role = {role: db.users.count_documents({**query, 'role': role})
+               for role in ([query['role']] if 'role' in query else ROLES)}
+    return {'total': total, 'by_role': by_role}
+
+
+def backfill_created_at(db):
+    """Date users stored without ``created_at`` by their ObjectId, so keyset pages include them."""
+    return db.users.update_many({'created_at': None},
+                                [{'$set': {'created_at': {'$toDate': '$_id'}}}]).modified_count
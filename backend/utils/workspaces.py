@@ -0,0 +1,186 @@
+"""Workspace membership and listing.
+
+Membership lives either in each workspace's ``members`` array
+(:class:`ArrayMembers`, the original layout) or in a ``workspace_members``
+collection with one document per membership (:class:`CollectionMembers`).
+The collection keeps workspace documents small no matter how many members
+join, and every membership check is a single probe of the unique
+``(workspace_id, user_id)`` index. Both keep a denormalized ``member_count``
+on the workspace. :func:`migrate_members` moves existing arrays over.
+"""
+import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from .mongo import to_obj_ids
+from .pagination import decode_cursor, encode_cursor, keyset_filter
+from .users import resolve_emails
+
+
+def attach_members(db, workspaces, member_ids=None):
+    """Replace each workspace's member ids with ``{'_id', 'email'}`` objects.
+
+    ``member_ids`` maps workspace id strings to member ids and defaults to
+    each workspace's ``members`` array. One ``$in`` query over the union of
+    member ids serves every workspace; ids without a user are dropped.
+    """
+    if member_ids is None:
+        member_ids = {str(ws['_id']): ws.get('members', []) for ws in workspaces}
+    emails = resolve_emails(db, {uid for ids in member_ids.values() for uid in ids})
+    for ws in workspaces:
+        ids = member_ids.get(str(ws['_id']), [])
+        ws['member_count'] = len(ids)
+        ws['members'] = [{'_id': uid, 'email': emails[uid]} for uid in ids if uid in emails]
+    return workspaces
+
+
+class ArrayMembers:
+    """Members as a string-id array on the workspace document."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def create(self, workspace, owner_id, insert):
+        """Store a new workspace through ``insert(doc) -> _id`` with its owner as member."""
+        workspace.update({'members': [owner_id], 'member_count': 1})
+        return insert(workspace)
+
+    def is_member(self, workspace_id, user_id):
+        return self.db.workspaces.find_one({'_id': workspace_id, 'members': user_id},
+                                           {'_id': 1}) is not None
+
+    def add(self, workspace_id, user_id):
+        """Add ``user_id``; returns False if it already was a member."""
+        result = self.db.workspaces.update_one(
+            {'_id': workspace_id, 'members': {'$ne': user_id}},
+            {'$push': {'members': user_id}, '$inc': {'member_count': 1}})
+        return result.modified_count == 1
+
+    def remove(self, workspace_id, user_id):
+        """Remove ``user_id``; returns False if it was not a member."""
+        result = self.db.workspaces.update_one(
+            {'_id': workspace_id, 'members': user_id},
+            {'$pull': {'members': user_id}, '$inc': {'member_count': -1}})
+        return result.modified_count == 1
+
+    def workspaces_of(self, user_id):
+        """Filter on ``workspaces`` matching every workspace ``user_id`` belongs to."""
+        return {'members': user_id}
+
+    def attach(self, workspaces):
+        missing = [ws['_id'] for ws in workspaces if 'members' not in ws]
+        if missing:
+            arrays = {ws['_id']: ws.get('members', []) for ws in
+                      self.db.workspaces.find({'_id': {'$in': missing}}, {'members': 1})}
+            for ws in workspaces:
+                ws.setdefault('members', arrays.get(ws['_id'], []))
+        return attach_members(self.db, workspaces)
+
+    def delete_workspace(self, workspace_id):
+        pass
+
+
+class CollectionMembers:
+    """Members as ``{workspace_id, user_id, joined_at}`` documents in ``workspace_members``."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def create(self, workspace, owner_id, insert):
+        workspace['member_count'] = 1
+        workspace_id = insert(workspace)
+        self.db.workspace_members.insert_one({'workspace_id': str(workspace_id), 'user_id': owner_id,
+                                              'joined_at': workspace.get('created_at')})
+        return workspace_id
+
+    def is_member(self, workspace_id, user_id):
+        return self.db.workspace_members.find_one(
+            {'workspace_id': str(workspace_id), 'user_id': user_id}, {'_id': 1}) is not None
+
+    def add(self, workspace_id, user_id):
+        try:
+            self.db.workspace_members.insert_one({'workspace_id': str(workspace_id), 'user_id': user_id,
+                                                  'joined_at': datetime.datetime.utcnow()})
+        except DuplicateKeyError:
+            return False
+        self.db.workspaces.update_one({'_id': workspace_id}, {'$inc': {'member_count': 1}})
+        return True
+
+    def remove(self, workspace_id, user_id):
+        result = self.db.workspace_members.delete_one({'workspace_id': str(workspace_id),
+                                                       'user_id': user_id})
+        if not result.deleted_count:
+            return False
+        self.db.workspaces.update_one({'_id': workspace_id}, {'$inc': {'member_count': -1}})
+        return True
+
+    def workspaces_of(self, user_id):
+        ids = self.db.workspace_members.find({'user_id': user_id}, {'workspace_id': 1, '_id': 0})
+        return {'_id': {'$in': to_obj_ids(m['workspace_id'] for m in ids)}}
+
+    def attach(self, workspaces):
+        member_ids = {str(ws['_id']): [] for ws in workspaces}
+        cursor = self.db.workspace_members.find(
+            {'workspace_id': {'$in': list(member_ids)}},
+            {'workspace_id': 1, 'user_id': 1, '_id': 0}).sort('joined_at', 1)
+        for m in cursor:
+            member_ids[m['workspace_id']].append(m['user_id'])
+        return attach_members(self.db, workspaces, member_ids)
+
+    def delete_workspace(self, workspace_id):
+        self.db.workspace_members.delete_many({'workspace_id': str(workspace_id)})
+
+
+def page_workspaces(db, members, user_id, after=None, limit=None):
+    """Newest-first workspaces of ``user_id``; returns ``(workspaces, next_cursor)``.
+
+    Raises ``ValueError`` for malformed cursors.
+    """
+    query = members.workspaces_of(user_id)
+    if after:
+        created_at, oid = decode_cursor(after)
+        query = {'$and': [query, keyset_filter('created_at', created_at, oid, -1)]}
+    cursor = db.workspaces.find(query).sort([('created_at', -1), ('_id', -1)])
+    if limit:
+        cursor = cursor.limit(limit + 1)
+    workspaces = list(cursor)
+    next_cursor = None
+    if limit and len(workspaces) > limit:
+        workspaces = workspaces[:limit]
+        next_cursor = encode_cursor(workspaces[-1]['created_at'], workspaces[-1]['_id'])
+    members.attach(workspaces)
+    return workspaces, next_cursor
+
+
+def migrate_members(db, drop_arrays=False, batch_size=500):
+    """Copy every ``members`` array into ``workspace_members`` and set ``member_count``.
+
+    Idempotent: memberships that already exist are skipped. With
+    ``drop_arrays`` the arrays are removed afterwards; keep them until every
+    process runs with the collection enabled. Returns ``(workspaces, memberships)``.
+    """
+    workspaces = inserted = 0
+    counts = []
+    cursor = db.workspaces.find({'members': {'$exists': True}}, {'members': 1, 'created_at': 1})
+    for ws in cursor.batch_size(batch_size):
+        workspace_id = str(ws['_id'])
+        docs = [{'workspace_id': workspace_id, 'user_id': uid, 'joined_at': ws.get('created_at')}
+                for uid in dict.fromkeys(ws.get('members', []))]
+        if docs:
+            try:
+                inserted += len(db.workspace_members.insert_many(docs, ordered=False).inserted_ids)
+            except BulkWriteError as e:
+                inserted += e.details['nInserted']
+        update = {'$set': {'member_count': db.workspace_members.count_documents(
+            {'workspace_id': workspace_id})}}
+        if drop_arrays:
+            update['$unset'] = {'members': ''}
+        counts.append(UpdateOne({'_id': ws['_id']}, update))
+        workspaces += 1
+        if len(counts) >= batch_size:
+            db.workspaces.bulk_write(counts, ordered=False)
+            counts = []
+    if counts:
+        db.workspaces.bulk_write(counts, ordered=False)
+    return workspaces, inserted
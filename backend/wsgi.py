@@ -0,0 +1,11 @@
+"""Production entry point: ``gunicorn -c gunicorn.conf.py wsgi:app`` from ``backend/``.
+
+Set SECRET_KEY (and MONGO_URI unless Mongo is local) in the environment;
+``MIXER_CONFIG`` picks another config object.
+"""
+import os
+
+from app import create_app, start
+
+app = create_app(os.environ.get('MIXER_CONFIG', 'config.ProductionConfig'))
+start(app)
@@ -4,6 +4,11 @@ import './AdminUsers.css'; // Ensure this CSS file is imported
 
 const AdminUsers = () => {
     const [users, setUsers] = useState([]);
+    const [usersCursor, setUsersCursor] = useState(null);
+    const [userCount, setUserCount] = useState(null);
+    const [userSearch, setUserSearch] = useState('');
+    // The query of the listed results; `userSearch` is only the text box until submitted
+    const [usersQuery, setUsersQuery] = useState('');
     const [chats, setChats] = useState([]);
     const [workspaces, setWorkspaces] = useState([]);
     const [error, setError] = useState('');
@@ -15,33 +20,54 @@ const AdminUsers = () => {
     const [isReplyError, setIsReplyError] = useState(false); // Track if reply status is an error
     const token = localStorage.getItem('token');
 
-    useEffect(() => {
-        const fetchUsers = async () => {
-            setError('');
-            try {
-                const response = await fetch('http://localhost:5000/api/admin/users', {
-                    headers: { 'x-access-token': token || '' }
-                });
-                if (response.status === 401 || response.status === 403) {
-                    setError('You are not authorized to view this page.');
-                    setUsers([]);
-                    return;
-                }
-                if (response.ok) {
-                    const data = await response.json();
-                    // Ensure users are sorted, e.g., by creation date descending
-                    const sortedUsers = (data.users || []).sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
-                    setUsers(sortedUsers);
-                } else {
-                    const errorData = await response.json().catch(() => ({}));
-                    setError(errorData.message || 'Failed to fetch users.');
-                }
-            } catch (err) {
-                console.error('Error fetching users:', err);
-                setError('An error occurred while fetching users.');
+    // The server sorts newest first and pages with a cursor; `after` appends the next page
+    const fetchUsers = async (after = null, q = '') => {
+        setError('');
+        try {
+            const params = new URLSearchParams({ limit: '50' });
+            if (q) params.set('q', q);
+            if (after) params.set('after', after);
+            const response = await fetch(`http://localhost:5000/api/admin/users?${params}`, {
+                headers: { 'x-access-token': token || '' }
+            });
+            if (response.status === 401 || response.status === 403) {
+                setError('You are not authorized to view this page.');
+                setUsers([]);
+                return;
             }
-        };
+            if (response.ok) {
+                const data = await response.json();
+                setUsers(prev => after ? [...prev, ...(data.users || [])] : (data.users || []));
+                setUsersCursor(data.next_cursor || null);
+            } else {
+                const errorData = await response.json().catch(() => ({}));
+                setError(errorData.message || 'Failed to fetch users.');
+            }
+        } catch (err) {
+            console.error('Error fetching users:', err);
+            setError('An error occurred while fetching users.');
+        }
+    };
+
+    const fetchUserCount = async () => {
+        try {
+            const response = await fetch('http://localhost:5000/api/admin/users/count', {
+                headers: { 'x-access-token': token || '' }
+            });
+            if (response.ok) setUserCount(await response.json());
+        } catch (err) {
+            console.error('Error fetching user count:', err);
+        }
+    };
+
+    const handleUserSearch = (e) => {
+        e.preventDefault();
+        const q = userSearch.trim();
+        setUsersQuery(q);
+        fetchUsers(null, q);
+    };
 
+    useEffect(() => {
         const fetchChats = async () => {
             setChatsError('');
             try {
@@ -96,6 +122,7 @@ const AdminUsers = () => {
 
         if (token) {
             fetchUsers();
+            fetchUserCount();
             fetchChats();
             fetchWorkspaces();
         } else {
@@ -161,7 +188,16 @@ const AdminUsers = () => {
 
             {/* Users Section */}
             <div className="admin-section">
-                <h2>All Users</h2>
+                <h2>All Users{userCount && ` (${userCount.total})`}</h2>
+                <form onSubmit={handleUserSearch} className="admin-reply-form">
+                    <input
+                        type="text"
+                        value={userSearch}
+                        onChange={(e) => setUserSearch(e.target.value)}
+                        placeholder="Search by email prefix..."
+                    />
+                    <button type="submit" className="admin-button admin-button-primary">Search</button>
+                </form>
                 {error && <p className="admin-error-message">{error}</p>}
                 {!error && (
                     <div className="table-responsive-wrapper">
@@ -187,6 +223,11 @@ const AdminUsers = () => {
                         ) : (
                              <p className="admin-info-message">No users found.</p>
                         )}
+                        {usersCursor && (
+                            <button type="button" className="admin-button" onClick={() => fetchUsers(usersCursor, usersQuery)}>
+                                Load more
+                            </button>
+                        )}
                     </div>
                 )}
             </div>
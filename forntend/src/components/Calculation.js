@@ -15,7 +15,9 @@ import {
 import { FaCogs, FaList } from "react-icons/fa";
 import './Calculation.css'; // <--- IMPORT THE CSS FILE HERE
 
-// —— Catalogs ——
+const API = process.env.REACT_APP_API_URL || 'http://localhost:5000';
+
+// —— Catalogs (built-in copies; the server's /api/reference catalogs replace them once loaded) ——
 const EFFICIENCY_CATALOG = [
   { label: "Bộ truyền bánh răng trụ", covered: [0.96, 0.98], open: [0.94, 0.97] },
   { label: "Bộ truyền bánh răng côn", covered: [0.95, 0.97], open: [0.93, 0.96] },
@@ -31,7 +33,6 @@ const BEVEL_MATERIAL_CATALOG = [
   { label: "Thép 40XH", HB_range: [200, 350] },
   { label: "Thép 50X",  HB_range: [180, 330] },
 ];
-const SPUR_MATERIAL_CATALOG = [...BEVEL_MATERIAL_CATALOG];
 
 const STEP_TITLES = [
   "Nhập liệu",
@@ -84,10 +85,19 @@ export default function Calculation() {
   const [chainZ1, setChainZ1] = useState(null);
   const [chainZ2, setChainZ2] = useState(null);
 
+  const [materials, setMaterials] = useState(BEVEL_MATERIAL_CATALOG);
+
   // init
   useEffect(() => {
-    setEffRows(initEffRows());
-    setTrRows(initTrRows());
+    setEffRows(initEffRows(EFFICIENCY_CATALOG));
+    setTrRows(initTrRows(TRANSMISSION_CATALOG));
+    // Responses carry an ETag and Cache-Control, so repeat visits revalidate from the browser cache
+    const load = name => fetch(`${API}/api/reference/${name}`).then(r => r.ok ? r.json() : null).catch(() => null);
+    Promise.all(["efficiency", "transmission", "materials"].map(load)).then(([eff, tr, mats]) => {
+      if (eff) setEffRows(initEffRows(eff.items));
+      if (tr) setTrRows(initTrRows(tr.items));
+      if (mats) setMaterials(mats.items);
+    });
     const saved = JSON.parse(localStorage.getItem(lsKey) || "{}");
     if (saved.P) setP(saved.P);
     if (saved.n) setN(saved.n);
@@ -99,11 +109,11 @@ export default function Calculation() {
     localStorage.setItem(lsKey, JSON.stringify({ P, n, L, step, results }));
   }, [P, n, L, step, results]);
 
-  function initEffRows() {
-    return EFFICIENCY_CATALOG.map(c => ({ label: c.label, covered: c.covered, open: c.open, value: ((c.open[0]+c.open[1])/2).toFixed(3) }));
+  function initEffRows(catalog) {
+    return catalog.map(c => ({ label: c.label, covered: c.covered, open: c.open, value: ((c.open[0]+c.open[1])/2).toFixed(3) }));
   }
-  function initTrRows() {
-    return TRANSMISSION_CATALOG.map(c => ({ label: c.label, range: c.range, value: ((c.range[0]+c.range[1])/2).toFixed(1) }));
+  function initTrRows(catalog) {
+    return catalog.map(c => ({ label: c.label, range: c.range, value: ((c.range[0]+c.range[1])/2).toFixed(1) }));
   }
   function upsertResult(name, data) {
     setResults(prev => { const i = prev.findIndex(r=>r.name===name); if(i>=0){ const a=[...prev]; a[i]={name,data}; return a;} return [...prev,{name,data}]; });
@@ -140,8 +150,8 @@ export default function Calculation() {
       case 3: return <Table bordered size="sm"><tbody>{trRows.map((r,i)=><tr key={i}><td>{r.label}</td><td>{r.range[0]}–{r.range[1]}</td><td><Form.Range min={r.range[0]} max={r.range[1]} step={0.1} value={r.value} onChange={e=>{const v=e.target.value;setTrRows(a=>{a[i].value=v;return[...a]});}}/>{r.value}</td></tr>)}</tbody></Table>;
       case 4: return <Row><Col md={3}><Form.Label>K_be</Form.Label><Form.Control type="number" min={0.25} max={0.3} step={0.01} value={Kbe} onChange={e=>setKbe(+e.target.value)}/></Col><Col md={3}><Form.Label>c_K</Form.Label><Form.Control type="number" min={1} max={1.1} step={0.01} value={cK} onChange={e=>setCK(+e.target.value)}/></Col><Col md={3}><Form.Label>ψ_ba</Form.Label><Form.Control type="number" step={0.01} value={psiBa} onChange={e=>setPsiBa(+e.target.value)}/></Col><Col md={3}><Form.Label>ψ_bdmax</Form.Label><Form.Control type="number" step={0.01} value={psiBd} onChange={e=>setPsiBd(+e.target.value)}/></Col>{u1&&u2&&<Col md={12}><Alert>u1={u1.toFixed(3)}, u2={u2.toFixed(3)}</Alert></Col>}</Row>;
       case 5: return <Table bordered size="sm"><thead><tr>{characteristic.fields.map(f=><th key={f}>{f}</th>)}</tr></thead><tbody>{characteristic.rows.map((r,i)=><tr key={i}>{characteristic.fields.map((f,j)=><td key={j}>{r[j]}</td>)}</tr>)}</tbody></Table>;
-      case 6: return <div><h5>3.1 Thiết kế bánh răng côn</h5><Row><Col><Form.Label>Vật liệu dẫn</Form.Label><Form.Select onChange={e=>setBevelMat1(BEVEL_MATERIAL_CATALOG.find(m=>m.label===e.target.value))}><option/>{BEVEL_MATERIAL_CATALOG.map(m=><option key={m.label}>{m.label}</option>)}</Form.Select></Col><Col><Form.Label>Vật liệu bị dẫn</Form.Label><Form.Select onChange={e=>setBevelMat2(BEVEL_MATERIAL_CATALOG.find(m=>m.label===e.target.value))}><option/>{BEVEL_MATERIAL_CATALOG.map(m=><option key={m.label}>{m.label}</option>)}</Form.Select></Col><Col><Form.Label>HB1</Form.Label><Form.Control type="number" min={bevelMat1?.HB_range[0]} max={bevelMat1?.HB_range[1]} value={HB1} onChange={e=>setHB1(+e.target.value)}/></Col><Col><Form.Label>HB2</Form.Label><Form.Control type="number" min={bevelMat2?.HB_range[0]} max={bevelMat2?.HB_range[1]} value={HB2} onChange={e=>setHB2(+e.target.value)}/></Col></Row></div>;
-      case 7: return <div><h5>3.2 Thiết kế bánh răng trụ</h5><Row><Col><Form.Label>Vật liệu dẫn</Form.Label><Form.Select onChange={e=>setSpurMat1(SPUR_MATERIAL_CATALOG.find(m=>m.label===e.target.value))}><option/>{SPUR_MATERIAL_CATALOG.map(m=><option key={m.label}>{m.label}</option>)}</Form.Select></Col><Col><Form.Label>Vật liệu bị dẫn</Form.Label><Form.Select onChange={e=>setSpurMat2(SPUR_MATERIAL_CATALOG.find(m=>m.label===e.target.value))}><option/>{SPUR_MATERIAL_CATALOG.map(m=><option key={m.label}>{m.label}</option>)}</Form.Select></Col></Row></div>;
+      case 6: return <div><h5>3.1 Thiết kế bánh răng côn</h5><Row><Col><Form.Label>Vật liệu dẫn</Form.Label><Form.Select onChange={e=>setBevelMat1(materials.find(m=>m.label===e.target.value))}><option/>{materials.map(m=><option key={m.label}>{m.label}</option>)}</Form.Select></Col><Col><Form.Label>Vật liệu bị dẫn</Form.Label><Form.Select onChange={e=>setBevelMat2(materials.find(m=>m.label===e.target.value))}><option/>{materials.map(m=><option key={m.label}>{m.label}</option>)}</Form.Select></Col><Col><Form.Label>HB1</Form.Label><Form.Control type="number" min={bevelMat1?.HB_range[0]} max={bevelMat1?.HB_range[1]} value={HB1} onChange={e=>setHB1(+e.target.value)}/></Col><Col><Form.Label>HB2</Form.Label><Form.Control type="number" min={bevelMat2?.HB_range[0]} max={bevelMat2?.HB_range[1]} value={HB2} onChange={e=>setHB2(+e.target.value)}/></Col></Row></div>;
+      case 7: return <div><h5>3.2 Thiết kế bánh răng trụ</h5><Row><Col><Form.Label>Vật liệu dẫn</Form.Label><Form.Select onChange={e=>setSpurMat1(materials.find(m=>m.label===e.target.value))}><option/>{materials.map(m=><option key={m.label}>{m.label}</option>)}</Form.Select></Col><Col><Form.Label>Vật liệu bị dẫn</Form.Label><Form.Select onChange={e=>setSpurMat2(materials.find(m=>m.label===e.target.value))}><option/>{materials.map(m=><option key={m.label}>{m.label}</option>)}</Form.Select></Col></Row></div>;
       case 8: return <div><h5>3.3 Thiết kế xích</h5><Row><Col><Form.Label>u_x</Form.Label><Form.Control readOnly value={trRows[1]?.value}/></Col><Col><Form.Label>z1</Form.Label><Form.Control readOnly value={chainZ1}/></Col><Col><Form.Label>z2</Form.Label><Form.Control readOnly value={chainZ2}/></Col></Row></div>;
       default: return null;
     }
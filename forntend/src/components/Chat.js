@@ -9,6 +9,7 @@ const Chat = ({ receiverId }) => {
   const [popupPassword, setPopupPassword] = useState('');
   const [popupMessage, setPopupMessage] = useState('');
   const messagesEndRef = useRef(null);
+  const cursorRef = useRef(null);
   
   // Retrieve token and role from localStorage
   const token = localStorage.getItem('token');
@@ -23,10 +24,12 @@ const Chat = ({ receiverId }) => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
-  // Fetch chat messages between the logged-in user and the targetReceiverId
+  // Fetch chat messages between the logged-in user and the targetReceiverId.
+  // After the first load only messages newer than the last cursor are requested.
   const fetchChatMessages = async () => {
+    const since = cursorRef.current;
     try {
-      const response = await fetch(`http://localhost:5000/api/chat/${targetReceiverId}`, {
+      const response = await fetch(`http://localhost:5000/api/chat/${targetReceiverId}${since ? `?since=${since}` : ''}`, {
         headers: { 'x-access-token': token || '' }
       });
       if (response.status === 401) {
@@ -36,7 +39,9 @@ const Chat = ({ receiverId }) => {
       }
       if (response.ok) {
         const data = await response.json();
-        setMessages(data.messages);
+        cursorRef.current = data.cursor || since;
+        if (!data.messages.length) return;
+        setMessages(prev => (since ? [...prev, ...data.messages] : data.messages));
         scrollToBottom();
       } else {
         console.error('Error fetching chat messages');
@@ -48,6 +53,8 @@ const Chat = ({ receiverId }) => {
 
   // Poll for messages every 3 seconds
   useEffect(() => {
+    cursorRef.current = null;
+    setMessages([]);
     fetchChatMessages();
     const interval = setInterval(fetchChatMessages, 3000);
     return () => clearInterval(interval);
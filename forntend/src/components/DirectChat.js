@@ -6,16 +6,23 @@ const DirectChat = () => {
   const [newMessage, setNewMessage] = useState('');
   const [showLoginPopup, setShowLoginPopup] = useState(false);
   const messagesEndRef = useRef(null);
+  const cursorRef = useRef(null);
   const token = localStorage.getItem('token');
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
-  // Fetch messages from the conversation between the user and admin
+  // Append messages that are not already shown (stream and catch-up fetch can overlap)
+  const appendNew = (prev, incoming) =>
+    [...prev, ...incoming.filter(m => !prev.some(p => p._id === m._id))];
+
+  // Fetch messages from the conversation between the user and admin.
+  // After the first load only messages newer than the last cursor are requested.
   const fetchMessages = async () => {
+    const since = cursorRef.current;
     try {
-      const response = await fetch(`http://localhost:5000/api/chat/direct`, {
+      const response = await fetch(`http://localhost:5000/api/chat/direct${since ? `?since=${since}` : ''}`, {
         headers: { 'x-access-token': token || '' }
       });
       if (response.status === 401) {
@@ -24,7 +31,9 @@ const DirectChat = () => {
       }
       if (response.ok) {
         const data = await response.json();
-        setMessages(data.messages);
+        cursorRef.current = data.cursor || since;
+        if (!data.messages.length) return;
+        setMessages(prev => (since ? appendNew(prev, data.messages) : data.messages));
         scrollToBottom();
       } else {
         console.error('Error fetching direct chat messages');
@@ -36,8 +45,21 @@ const DirectChat = () => {
 
   useEffect(() => {
     fetchMessages();
-    const interval = setInterval(fetchMessages, 3000);
-    return () => clearInterval(interval);
+    // New messages arrive over Server-Sent Events; poll only when EventSource is unavailable
+    if (!window.EventSource || !token) {
+      const interval = setInterval(fetchMessages, 3000);
+      return () => clearInterval(interval);
+    }
+    const es = new EventSource(`http://localhost:5000/api/chat/direct/stream?token=${token}`);
+    es.onmessage = e => {
+      const m = JSON.parse(e.data);
+      cursorRef.current = m.cursor;
+      setMessages(prev => appendNew(prev, [m]));
+      scrollToBottom();
+    };
+    // After a reconnect, catch up on anything sent while the stream was down
+    es.onopen = () => { if (cursorRef.current) fetchMessages(); };
+    return () => es.close();
   }, []);
 
   const handleSendMessage = async (e) => {
@@ -18,6 +18,7 @@ export default function WorkspaceDetailPage() {
   const [newMessage, setNewMessage] = useState('');
   const [showLoginPopup, setShowLoginPopup] = useState(false);
   const messagesEndRef = useRef(null);
+  const cursorRef = useRef(null);
 
   // Scroll helper
   const scrollToBottom = () => messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -35,22 +36,44 @@ export default function WorkspaceDetailPage() {
       .catch(() => setMsg('Network error'));
   }, [workspaceId]);
 
-  // 2) Poll chat messages every 3s
+  // Append messages that are not already shown (stream and catch-up fetch can overlap)
+  const appendNew = (prev, incoming) =>
+    [...prev, ...incoming.filter(m => !prev.some(p => p._id === m._id))];
+
+  // 2) Load chat history once, then receive new messages over Server-Sent Events.
+  //    Browsers without EventSource poll every 3s for messages newer than the cursor.
   useEffect(() => {
     if (!workspace) return;
+    cursorRef.current = null;
+    setMessages([]);
     const load = () => {
-      fetch(`${API}/api/workspace/chat/${workspaceId}`, {
+      const since = cursorRef.current;
+      fetch(`${API}/api/workspace/chat/${workspaceId}${since ? `?since=${since}` : ''}`, {
         headers: { 'x-access-token': token }
       })
         .then(r => r.json())
         .then(d => {
-          setMessages(d.messages);
+          cursorRef.current = d.cursor || since;
+          if (!d.messages.length) return;
+          setMessages(prev => (since ? appendNew(prev, d.messages) : d.messages));
           scrollToBottom();
         });
     };
     load();
-    const iv = setInterval(load, 3000);
-    return () => clearInterval(iv);
+    if (!window.EventSource) {
+      const iv = setInterval(load, 3000);
+      return () => clearInterval(iv);
+    }
+    const es = new EventSource(`${API}/api/workspace/chat/${workspaceId}/stream?token=${token}`);
+    es.onmessage = e => {
+      const m = JSON.parse(e.data);
+      cursorRef.current = m.cursor;
+      setMessages(prev => appendNew(prev, [m]));
+      scrollToBottom();
+    };
+    // After a reconnect, catch up on anything sent while the stream was down
+    es.onopen = () => { if (cursorRef.current) load(); };
+    return () => es.close();
   }, [workspace, workspaceId]);
 
   // Kick member
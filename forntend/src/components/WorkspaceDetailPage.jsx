@@ -15,6 +15,7 @@ export default function WorkspaceDetailPage() {
   const [chatMessages, setChatMessages] = useState([]);
   const [newChat, setNewChat] = useState('');
   const chatEndRef = useRef(null);
+  const chatCursorRef = useRef(null);
 
   // Fetch workspace detail
   useEffect(() => {
@@ -29,25 +30,47 @@ export default function WorkspaceDetailPage() {
       .catch(() => setMessage('Network error'));
   }, [code]);
 
+  // Append messages that are not already shown (stream and catch-up fetch can overlap)
+  const appendNew = (prev, incoming) =>
+    [...prev, ...incoming.filter(m => !prev.some(p => p._id === m._id))];
+
   // Scroll chat to bottom
   const scrollToBottom = () => chatEndRef.current?.scrollIntoView({ behavior: 'smooth' });
 
-  // Fetch chat messages every 3s
+  // Load chat history once, then receive new messages over Server-Sent Events.
+  // Browsers without EventSource poll every 3s for messages newer than the cursor.
   useEffect(() => {
     if (!workspace) return;
+    chatCursorRef.current = null;
+    setChatMessages([]);
     const fetchChat = () => {
-      fetch(`${API}/api/workspace/chat/${workspace._id}`, {
+      const since = chatCursorRef.current;
+      fetch(`${API}/api/workspace/chat/${workspace._id}${since ? `?since=${since}` : ''}`, {
         headers: { 'x-access-token': token }
       })
         .then(r => r.json())
         .then(data => {
-          setChatMessages(data.messages);
+          chatCursorRef.current = data.cursor || since;
+          if (!data.messages.length) return;
+          setChatMessages(prev => (since ? appendNew(prev, data.messages) : data.messages));
           scrollToBottom();
         });
     };
     fetchChat();
-    const iv = setInterval(fetchChat, 3000);
-    return () => clearInterval(iv);
+    if (!window.EventSource) {
+      const iv = setInterval(fetchChat, 3000);
+      return () => clearInterval(iv);
+    }
+    const es = new EventSource(`${API}/api/workspace/chat/${workspace._id}/stream?token=${token}`);
+    es.onmessage = e => {
+      const m = JSON.parse(e.data);
+      chatCursorRef.current = m.cursor;
+      setChatMessages(prev => appendNew(prev, [m]));
+      scrollToBottom();
+    };
+    // After a reconnect, catch up on anything sent while the stream was down
+    es.onopen = () => { if (chatCursorRef.current) fetchChat(); };
+    return () => es.close();
   }, [workspace]);
 
   // Kick member